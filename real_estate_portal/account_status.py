@@ -0,0 +1,110 @@
+"""
+Account status cache for the DreamHome Real Estate Portal.
+Remembers for a short time whether each signed-in user is banned or
+deactivated, so the per-request ban check does not reload the user row.
+Entries are dropped as soon as a user_changed signal is sent (e.g. by an
+admin banning or deactivating the account), so bans still take effect on
+the user's next request.
+
+Backends (ACCOUNT_STATUS_CACHE_BACKEND): 'memory', 'redis' or 'null',
+see cache_backends.py.
+"""
+from sqlalchemy import select
+from models import db, User
+from cache_backends import NullBackend, create_backend
+from signals import user_changed
+
+
+class AccountStatus:
+    """
+    Flask extension caching the ban and active flags of users.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.backend = NullBackend()
+        self.ttl = 30
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ACCOUNT_STATUS_CACHE_BACKEND', 'memory')
+        app.config.setdefault('ACCOUNT_STATUS_TTL', 30)
+        app.config.setdefault('ACCOUNT_STATUS_MAX_ENTRIES', 10000)
+        app.config.setdefault('ACCOUNT_STATUS_REDIS_URL', None)
+
+        self.backend = create_backend(
+            app.config['ACCOUNT_STATUS_CACHE_BACKEND'],
+            max_entries=app.config['ACCOUNT_STATUS_MAX_ENTRIES'],
+            redis_url=app.config['ACCOUNT_STATUS_REDIS_URL'],
+            prefix='dreamhome:account:'
+        )
+        self.ttl = app.config['ACCOUNT_STATUS_TTL']
+
+        user_changed.connect(self._on_user_changed, weak=False)
+
+    @staticmethod
+    def _key(user_id):
+        return f'status:{user_id}'
+
+    def remember(self, user):
+        """
+        Cache the status of a user row that was just loaded.
+
+        Args:
+            user: User (or any object with userId, isBanned and isActive)
+
+        Returns:
+            dict: The cached status
+        """
+        status = {'banned': bool(user.isBanned), 'active': user.isActive is not False}
+        self.backend.set(self._key(user.userId), status, self.ttl)
+        return status
+
+    def get(self, user_id):
+        """
+        Get a user's status, loading it on a cache miss.
+
+        Args:
+            user_id (int): ID of the user
+
+        Returns:
+            dict: {'banned': bool, 'active': bool}, or None if the user does not exist
+        """
+        status = self.backend.get(self._key(user_id))
+        if status is None:
+            row = db.session.execute(
+                select(User.userId, User.isBanned, User.isActive).where(User.userId == user_id)
+            ).first()
+            if row is None:
+                return None
+            status = self.remember(row)
+        return status
+
+    def is_banned(self, user_id):
+        """
+        Check whether a user is banned.
+
+        Args:
+            user_id (int): ID of the user
+
+        Returns:
+            bool: True if the user is banned or no longer exists
+        """
+        status = self.get(user_id)
+        return status is None or status['banned']
+
+    def invalidate(self, user_id):
+        """
+        Forget a user's cached status.
+
+        Args:
+            user_id (int): ID of the changed user
+        """
+        self.backend.delete(self._key(user_id))
+
+    def _on_user_changed(self, sender, user_id, **kwargs):
+        self.invalidate(user_id)
+
+
+account_status = AccountStatus()
@@ -0,0 +1,388 @@
+"""
+Content-addressed file storage for the DreamHome Real Estate Portal.
+Uploaded property images and verification documents are stored once per
+distinct content: a file is named by the SHA-256 of the uploaded bytes, in
+directories sharded by the first hash characters (ab/cd/abcd...), so a
+photo re-uploaded for another listing, or a document uploaded twice, costs
+no extra disk and no second image processing run.
+
+An image blob is the set of its variants (see image_variants.py), named
+<hash>-<variant>.<webp|jpg>, plus <hash>.json describing them, which is
+written last and so marks the blob complete. A document blob is a single
+file <hash>; UserDocument.file_path holds its key.
+
+The Blobs table counts the PropertyImages and UserDocuments rows referring
+to each blob (their contentHash / content_hash column). Session listeners
+keep the counts up to date in the same transaction as the rows change,
+whichever route adds or deletes them. After a commit that drops a blob's
+count to zero, its files are removed. Image blobs uploaded within
+BLOB_ORPHAN_TTL are kept, as an open property form may still be about to
+use them; those, and images uploaded but never used (e.g. for a form that
+was never submitted), are removed by `flask blobs purge`. Documents are
+always removed at once: a deleted or rejected document is not used again.
+
+Files are kept in two storages (see storage.py): 'images', served
+publicly, and 'documents', served only through the access-checked
+document routes (their local folder is outside the static folder, so
+nothing else serves them).
+
+Usage:
+    flask blobs purge    # remove unreferenced blobs older than BLOB_ORPHAN_TTL
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, inspect, insert, select, update
+from sqlalchemy.orm import Session
+from models import db, Blob, PropertyImages, UserDocument
+from image_variants import VARIANTS, FORMATS, FULL_SUFFIX, variant_filename, process_image
+from storage import create_storage
+
+# Bytes read per block when hashing a file
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Models referring to blobs: (model, blob kind, hash attribute)
+REFERENCES = (
+    (PropertyImages, 'image', 'contentHash'),
+    (UserDocument, 'document', 'content_hash'),
+)
+
+blobs_cli = AppGroup('blobs', help='Content-addressed file storage commands.')
+
+
+def file_digest(path):
+    """
+    Compute the SHA-256 of a file, reading it block by block.
+
+    Args:
+        path (str): File to hash
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def shard(digest):
+    """
+    Get the sharded directory of a blob.
+
+    Args:
+        digest (str): SHA-256 hex digest
+
+    Returns:
+        str: Relative directory, e.g. 'ab/cd'
+    """
+    return f'{digest[:2]}/{digest[2:4]}'
+
+
+def image_keys(digest):
+    """Keys of every variant file of an image blob"""
+    return [f'{shard(digest)}/{variant_filename(digest, variant, image_format)}'
+            for variant, _ in VARIANTS for image_format in FORMATS]
+
+
+def image_manifest_key(digest):
+    """Key of the description of an image blob's variants"""
+    return f'{shard(digest)}/{digest}.json'
+
+
+def document_key(digest):
+    """Key of a document blob"""
+    return f'{shard(digest)}/{digest}'
+
+
+class BlobStore:
+    """
+    Flask extension holding the image and document storages.
+    """
+
+    def __init__(self, app=None):
+        self.images = None
+        self.documents = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('STORAGE_BACKEND', 'local')
+        app.config.setdefault('IMAGE_BLOB_FOLDER', os.path.join('static', 'images', 'blobs'))
+        app.config.setdefault('IMAGE_BLOB_URL', '/static/images/blobs')
+        app.config.setdefault('DOCUMENT_BLOB_FOLDER', os.path.join('uploads', 'documents'))
+        app.config.setdefault('DOCUMENT_ACCEL_REDIRECT', None)
+        app.config.setdefault('STORAGE_S3_BUCKET', None)
+        app.config.setdefault('STORAGE_S3_ENDPOINT_URL', None)
+        app.config.setdefault('STORAGE_S3_REGION', None)
+        app.config.setdefault('STORAGE_S3_IMAGE_URL', None)
+        app.config.setdefault('STORAGE_PRESIGN_TTL', 300)
+        app.config.setdefault('BLOB_ORPHAN_TTL', 24 * 3600)
+
+        self.images = create_storage(self._storage_spec(app.config, 'images'))
+        self.documents = create_storage(self._storage_spec(app.config, 'documents'))
+        app.extensions['blob_store'] = self
+        app.cli.add_command(blobs_cli)
+
+    @staticmethod
+    def _storage_spec(config, name):
+        """Spec of the 'images' or 'documents' storage for the configured backend"""
+        backend = config['STORAGE_BACKEND']
+        if backend == 'local':
+            if name == 'images':
+                return {'backend': 'local', 'folder': os.path.abspath(config['IMAGE_BLOB_FOLDER']),
+                        'base_url': config['IMAGE_BLOB_URL']}
+            return {'backend': 'local', 'folder': os.path.abspath(config['DOCUMENT_BLOB_FOLDER']),
+                    'accel_redirect': config['DOCUMENT_ACCEL_REDIRECT']}
+        if backend == 's3':
+            bucket, endpoint_url = config['STORAGE_S3_BUCKET'], config['STORAGE_S3_ENDPOINT_URL']
+            spec = {'backend': 's3', 'bucket': bucket, 'prefix': f'{name}/', 'endpoint_url': endpoint_url,
+                    'region': config['STORAGE_S3_REGION'], 'presign_ttl': config['STORAGE_PRESIGN_TTL']}
+            if name == 'images':
+                # Images are public: a CDN in front of the bucket, else the bucket itself
+                spec['base_url'] = config['STORAGE_S3_IMAGE_URL'] or (
+                    f'{endpoint_url.rstrip("/")}/{bucket}/images' if endpoint_url
+                    else f'https://{bucket}.s3.amazonaws.com/images')
+            return spec
+        raise ValueError(f"Unknown storage backend '{backend}'")
+
+    def image_url(self, digest):
+        """URL of the full JPEG variant of an image blob (PropertyImages.imageURL)"""
+        return self.images.url(f'{shard(digest)}/{variant_filename(digest, "full")}')
+
+    def image_digest(self, image_url):
+        """
+        Get the hash of the image blob a URL points at.
+
+        Args:
+            image_url (str): Full JPEG variant URL, e.g. from a property form
+
+        Returns:
+            str: SHA-256 hex digest, or None if the URL is not an image blob
+        """
+        prefix = self.images.base_url + '/'
+        if not image_url or not image_url.startswith(prefix) or not image_url.endswith(FULL_SUFFIX):
+            return None
+        digest = image_url.rsplit('/', 1)[-1][:-len(FULL_SUFFIX)]
+        if len(digest) != 64 or image_url != self.image_url(digest):
+            return None
+        return digest
+
+    def image_details(self, digest):
+        """
+        Read the description of a complete image blob.
+
+        Args:
+            digest (str): SHA-256 hex digest
+
+        Returns:
+            dict: PropertyImages column values (width, height, variants), see
+                  describe_variants(); None until the blob has been written
+        """
+        manifest = self.images.read_bytes(image_manifest_key(digest))
+        return json.loads(manifest) if manifest is not None else None
+
+    def put_document(self, source_path):
+        """
+        Store an uploaded document, unless the same content is stored already.
+
+        Args:
+            source_path (str): Uploaded file; gone afterwards
+
+        Returns:
+            tuple: (digest, key of the blob in the document storage)
+        """
+        digest = file_digest(source_path)
+        key = document_key(digest)
+        if self.documents.exists(key):
+            os.remove(source_path)
+        else:
+            self.documents.put_file(key, source_path)
+        return digest, key
+
+    def delete_files(self, kind, digest):
+        """Remove every file of a blob"""
+        if kind == 'image':
+            # The description goes first, so a partly deleted blob never counts as complete
+            self.images.delete(image_manifest_key(digest))
+            for key in image_keys(digest):
+                self.images.delete(key)
+        else:
+            self.documents.delete(document_key(digest))
+
+
+blob_store = BlobStore()
+
+
+def store_image(staging_path, storage_spec, digest):
+    """
+    Write the variants of an upload saved to the staging folder into its
+    image blob, then delete the staged file. Run as a background job (see
+    jobs.py), so it gets the image storage as a spec.
+
+    A blob that is already complete is reused as it is, without decoding
+    the upload: it holds an earlier upload of the same file.
+
+    Args:
+        staging_path (str): Path the upload was saved to
+        storage_spec (dict): Spec of the image storage (see storage.py)
+        digest (str): SHA-256 of the upload
+
+    Returns:
+        dict: PropertyImages column values (width, height, variants)
+
+    Raises:
+        InvalidImage: If the upload is not a decodable image
+    """
+    storage = create_storage(storage_spec)
+    try:
+        manifest = storage.read_bytes(image_manifest_key(digest))
+        if manifest is not None:
+            return json.loads(manifest)
+        work_folder = tempfile.mkdtemp(dir=os.path.dirname(staging_path))
+        try:
+            details = process_image(staging_path, work_folder, digest)
+            for variant, _ in VARIANTS:
+                for image_format in FORMATS:
+                    filename = variant_filename(digest, variant, image_format)
+                    storage.put_file(f'{shard(digest)}/{filename}', os.path.join(work_folder, filename),
+                                     f'image/{image_format}')
+        finally:
+            shutil.rmtree(work_folder, ignore_errors=True)
+        # Written last: readers take the blob as complete once it exists
+        storage.put_bytes(image_manifest_key(digest), json.dumps(details).encode(), 'application/json')
+        return details
+    finally:
+        try:
+            os.remove(staging_path)
+        except FileNotFoundError:
+            pass
+
+
+def register_blob(kind, digest, size):
+    """
+    Record an upload of a blob in the current session. Until
+    BLOB_ORPHAN_TTL has passed since its last upload, an unreferenced image
+    blob is only removed by `flask blobs purge`.
+
+    Args:
+        kind (str): 'image' or 'document'
+        digest (str): SHA-256 hex digest
+        size (int): Bytes stored
+    """
+    blob = db.session.get(Blob, (kind, digest))
+    if blob is None:
+        db.session.add(Blob(kind=kind, contentHash=digest, refCount=0, size=size, updatedAt=datetime.now()))
+    else:
+        blob.size = size
+        blob.updatedAt = datetime.now()
+
+
+def remove_unreferenced(conn, blobs, older_than=None):
+    """
+    Delete blobs that nothing refers to, rows and files.
+
+    Args:
+        conn: SQLAlchemy connection; each blob row is deleted in its own
+            transaction before its files
+        blobs (iterable): (kind, digest) pairs to check
+        older_than (datetime): Only blobs last registered before this time
+
+    Returns:
+        int: Number of blobs removed
+    """
+    table = Blob.__table__
+    removed = 0
+    for kind, digest in blobs:
+        # The count is checked in the DELETE itself, so a blob referenced again meanwhile stays
+        stmt = delete(table).where(table.c.kind == kind, table.c.contentHash == digest, table.c.refCount <= 0)
+        if older_than is not None:
+            stmt = stmt.where(table.c.updatedAt < older_than)
+        with conn.begin():
+            deleted = conn.execute(stmt).rowcount
+        if deleted:
+            blob_store.delete_files(kind, digest)
+            removed += 1
+    return removed
+
+
+def _reference_changes(session):
+    """Count the blob references added and removed by a flush"""
+    changes = Counter()
+    for obj in session.new:
+        for model, kind, attribute in REFERENCES:
+            if isinstance(obj, model) and getattr(obj, attribute):
+                changes[kind, getattr(obj, attribute)] += 1
+    for obj in session.deleted:
+        for model, kind, attribute in REFERENCES:
+            if isinstance(obj, model) and getattr(obj, attribute):
+                changes[kind, getattr(obj, attribute)] -= 1
+    for obj in session.dirty:
+        for model, kind, attribute in REFERENCES:
+            if isinstance(obj, model):
+                history = inspect(obj).attrs[attribute].history
+                for digest in filter(None, history.added):
+                    changes[kind, digest] += 1
+                for digest in filter(None, history.deleted):
+                    changes[kind, digest] -= 1
+    return changes
+
+
+@event.listens_for(Session, 'after_flush')
+def _count_references(session, flush_context):
+    """Apply the blob reference changes of a flush to Blobs.refCount"""
+    changes = _reference_changes(session)
+    if not changes:
+        return
+    conn = session.connection()
+    table = Blob.__table__
+    for (kind, digest), delta in changes.items():
+        if delta == 0:
+            continue
+        key = (table.c.kind == kind) & (table.c.contentHash == digest)
+        counted = conn.execute(update(table).where(key).values(refCount=table.c.refCount + delta)).rowcount
+        if not counted and delta > 0:
+            conn.execute(insert(table).values(kind=kind, contentHash=digest, refCount=delta,
+                                              updatedAt=datetime.now()))
+        elif delta < 0:
+            session.info.setdefault('released_blobs', set()).add((kind, digest))
+
+
+@event.listens_for(Session, 'after_commit')
+def _remove_released(session):
+    """Remove the blobs whose last reference was just deleted"""
+    released = session.info.pop('released_blobs', None)
+    if released:
+        cutoff = datetime.now() - timedelta(seconds=current_app.config['BLOB_ORPHAN_TTL'])
+        images = [blob for blob in released if blob[0] == 'image']
+        documents = [blob for blob in released if blob[0] != 'image']
+        with session.get_bind().connect() as conn:
+            # Images may be picked again by an open property form until the grace period ends
+            remove_unreferenced(conn, images, older_than=cutoff)
+            remove_unreferenced(conn, documents)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_released(session):
+    session.info.pop('released_blobs', None)
+
+
+@blobs_cli.command('purge')
+def purge_command():
+    """Remove unreferenced blobs last uploaded more than BLOB_ORPHAN_TTL ago"""
+    cutoff = datetime.now() - timedelta(seconds=current_app.config['BLOB_ORPHAN_TTL'])
+    table = Blob.__table__
+    with db.engine.connect() as conn:
+        orphans = conn.execute(
+            select(table.c.kind, table.c.contentHash).where(table.c.refCount <= 0, table.c.updatedAt < cutoff)
+        ).all()
+        conn.rollback()
+        removed = remove_unreferenced(conn, orphans, older_than=cutoff)
+    print(f"Removed {removed} unreferenced blobs")
@@ -0,0 +1,164 @@
+"""
+Cache backends for the DreamHome Real Estate Portal.
+Small key/value stores with per-entry TTLs and generation counters, shared
+by the search result cache and the account status cache.
+
+Backends:
+- 'memory': per-process LRU with TTL
+- 'redis': shared by every worker
+- 'null': stores nothing (caching disabled)
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from redis import Redis, RedisError
+
+
+class MemoryBackend:
+    """In-process LRU cache whose entries expire after a TTL"""
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def generation(self, name):
+        return self._generations.get(name, 0)
+
+    def bump(self, names):
+        with self._lock:
+            for name in names:
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """
+    Redis cache shared between worker processes. Values are stored as JSON.
+    Redis errors are logged and treated as cache misses so a Redis outage
+    only costs speed.
+    """
+
+    def __init__(self, redis_url=None, prefix='dreamhome:'):
+        self.redis = Redis.from_url(redis_url) if redis_url else Redis()
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            raw = self.redis.get(self.prefix + key)
+        except RedisError as e:
+            current_app.logger.warning(f"Cache read failed: {e}")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        try:
+            self.redis.setex(self.prefix + key, ttl, json.dumps(value))
+        except RedisError as e:
+            current_app.logger.warning(f"Cache write failed: {e}")
+
+    def delete(self, key):
+        try:
+            self.redis.delete(self.prefix + key)
+        except RedisError as e:
+            current_app.logger.error(f"Cache delete failed: {e}")
+
+    def generation(self, name):
+        try:
+            return int(self.redis.get(f'{self.prefix}gen:{name}') or 0)
+        except RedisError as e:
+            current_app.logger.warning(f"Cache read failed: {e}")
+            return 0
+
+    def bump(self, names):
+        try:
+            pipeline = self.redis.pipeline()
+            for name in names:
+                pipeline.incr(f'{self.prefix}gen:{name}')
+            pipeline.execute()
+        except RedisError as e:
+            current_app.logger.error(f"Cache invalidation failed: {e}")
+
+    def clear(self):
+        try:
+            keys = list(self.redis.scan_iter(match=self.prefix + '*'))
+            if keys:
+                self.redis.delete(*keys)
+        except RedisError as e:
+            current_app.logger.error(f"Cache clear failed: {e}")
+
+
+class NullBackend:
+    """Backend that stores nothing, for disabling the cache"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def generation(self, name):
+        return 0
+
+    def bump(self, names):
+        pass
+
+    def clear(self):
+        pass
+
+
+def create_backend(name, max_entries=2048, redis_url=None, prefix='dreamhome:'):
+    """
+    Create a cache backend by name.
+
+    Args:
+        name (str): 'memory', 'redis' or 'null'
+        max_entries (int): Capacity of the memory backend
+        redis_url (str): Redis connection URL for the redis backend
+        prefix (str): Key prefix for the redis backend
+
+    Returns:
+        Backend instance
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if name == 'memory':
+        return MemoryBackend(max_entries)
+    if name == 'redis':
+        return RedisBackend(redis_url, prefix=prefix)
+    if name == 'null':
+        return NullBackend()
+    raise ValueError(f"Unknown cache backend '{name}'")
@@ -0,0 +1,303 @@
+"""
+Chunked, resumable uploads for the DreamHome Real Estate Portal.
+Large property images and documents can be sent in pieces rather than as
+one multipart request, which Werkzeug parses in full before the route
+runs and which has to start over after a dropped connection:
+
+1. POST /api/uploads                  start: purpose, filename, size and the
+                                      purpose's own fields
+2. PATCH /api/uploads/<id>            append one chunk: the raw request body,
+                                      with Upload-Offset and Upload-Checksum
+                                      (SHA-256 hex of the chunk) headers
+3. GET /api/uploads/<id>              the stored offset, to resume from
+4. POST /api/uploads/<id>/finalize    hand the file to the purpose's usual
+                                      record creation (see register_purpose)
+
+Chunks are streamed from the request body to a .part file in the staging
+folder block by block; a chunk that fails its checksum or is cut off is
+truncated away again. A chunk holds an exclusive lock on the .part file
+while it checks the offset and writes, so two requests for the same offset
+cannot both append; finalizing takes the same lock, so an upload is handed
+over once however many finalize requests arrive. Each upload's state is a small JSON file next to its
+data, so any process (or node, with shared storage) can continue it.
+Uploads left unfinished for CHUNKED_UPLOAD_TTL are removed, as are .part
+files whose state is gone.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from flask import current_app
+try:
+    import fcntl
+except ImportError:  # Windows development servers run one process; chunks are not locked there
+    fcntl = None
+from utils import allowed_file
+
+# Bytes read from the request stream per write
+STREAM_BLOCK_SIZE = 64 * 1024
+
+UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+# Purpose name -> (authorize, finalize, max_size), see register_purpose()
+_purposes = {}
+
+
+class InvalidUpload(ValueError):
+    """Raised when a chunked upload request cannot be accepted."""
+
+
+class OffsetMismatch(InvalidUpload):
+    """Raised when a chunk does not start where the stored data ends."""
+
+    def __init__(self, offset):
+        super().__init__(f'The upload continues at offset {offset}')
+        self.offset = offset
+
+
+class ChecksumMismatch(InvalidUpload):
+    """Raised when received data does not match its checksum."""
+
+
+class UploadGone(InvalidUpload):
+    """Raised when an upload was finished or discarded by another request."""
+
+
+def register_purpose(name, authorize, finalize, max_size=None):
+    """
+    Register a kind of chunked upload.
+
+    Args:
+        name (str): Purpose name clients send when starting an upload
+        authorize (callable): authorize(fields) checks the start request's
+            fields before any data is accepted; aborts or raises InvalidUpload
+        finalize (callable): finalize(upload, path) creates the records once
+            every byte has arrived and returns (response body, status); it
+            takes over the file at path
+        max_size (int): Largest upload in bytes (default CHUNKED_UPLOAD_MAX_SIZE)
+    """
+    _purposes[name] = (authorize, finalize, max_size)
+
+
+def _paths(upload_id):
+    folder = os.path.abspath(os.path.join(current_app.config['UPLOAD_STAGING_FOLDER'], 'chunked'))
+    return os.path.join(folder, f'{upload_id}.json'), os.path.join(folder, f'{upload_id}.part')
+
+
+def start_upload(user_id, fields):
+    """
+    Start a chunked upload.
+
+    Args:
+        user_id (int): Uploading user
+        fields (dict): purpose, filename, size (bytes), optional sha256 of
+            the whole file, plus the fields the purpose needs
+
+    Returns:
+        dict: The upload's state
+
+    Raises:
+        InvalidUpload: If the purpose, file type or size is not accepted
+    """
+    purpose = fields.get('purpose')
+    if purpose not in _purposes:
+        raise InvalidUpload('Unknown upload purpose')
+    authorize, _, max_size = _purposes[purpose]
+
+    filename = fields.get('filename')
+    if not isinstance(filename, str) or not allowed_file(filename):
+        raise InvalidUpload('Invalid file type')
+    size = fields.get('size')
+    max_size = max_size or current_app.config['CHUNKED_UPLOAD_MAX_SIZE']
+    if not isinstance(size, int) or size <= 0 or size > max_size:
+        raise InvalidUpload(f'File size must be between 1 and {max_size} bytes')
+    authorize(fields)
+
+    purge_expired()
+    upload = {
+        'id': uuid.uuid4().hex,
+        'purpose': purpose,
+        'user_id': user_id,
+        'filename': filename,
+        'size': size,
+        'sha256': fields.get('sha256'),
+        'fields': {key: value for key, value in fields.items()
+                   if key not in ('purpose', 'filename', 'size', 'sha256')},
+    }
+    meta_path, part_path = _paths(upload['id'])
+    os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+    open(part_path, 'wb').close()
+    with open(meta_path, 'w') as f:
+        json.dump(upload, f)
+    return upload
+
+
+def load_upload(upload_id, user_id):
+    """
+    Load an unfinished upload of a user.
+
+    Args:
+        upload_id (str): Upload id
+        user_id (int): Current user
+
+    Returns:
+        dict: The upload's state, or None if unknown, finished or another user's
+    """
+    if not UPLOAD_ID.match(upload_id):
+        return None
+    meta_path, _ = _paths(upload_id)
+    try:
+        with open(meta_path) as f:
+            upload = json.load(f)
+    except FileNotFoundError:
+        return None
+    return upload if upload['user_id'] == user_id else None
+
+
+def upload_offset(upload):
+    """
+    Get the number of bytes stored so far, where the next chunk starts.
+
+    Args:
+        upload (dict): Upload state
+
+    Returns:
+        int: Stored byte count
+    """
+    return os.path.getsize(_paths(upload['id'])[1])
+
+
+def append_chunk(upload, offset, stream, checksum):
+    """
+    Stream one chunk to the end of an upload's data.
+
+    Args:
+        upload (dict): Upload state
+        offset (int): Offset the chunk starts at, from the Upload-Offset header
+        stream: Binary stream of the request body
+        checksum (str): SHA-256 hex digest of the chunk
+
+    Returns:
+        int: The new offset
+
+    Raises:
+        OffsetMismatch: If offset is not the stored byte count
+        ChecksumMismatch: If the chunk does not match checksum
+        InvalidUpload: If the chunk runs past the declared size
+    """
+    if not checksum:
+        raise InvalidUpload('Upload-Checksum header is required')
+
+    meta_path, part_path = _paths(upload['id'])
+    digest = hashlib.sha256()
+    with open(part_path, 'r+b') as f:
+        # Held until the file is closed, so the offset cannot change between the check and the write
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        current = os.fstat(f.fileno()).st_size
+        if offset != current:
+            raise OffsetMismatch(current)
+        f.seek(offset)
+        try:
+            while True:
+                block = stream.read(STREAM_BLOCK_SIZE)
+                if not block:
+                    break
+                if f.tell() + len(block) > upload['size']:
+                    raise InvalidUpload('The chunk runs past the declared file size')
+                digest.update(block)
+                f.write(block)
+            if digest.hexdigest() != checksum.strip().lower():
+                raise ChecksumMismatch('The chunk does not match its checksum')
+        except BaseException:
+            # Also covers clients disconnecting mid-chunk: keep only whole, verified chunks
+            f.truncate(offset)
+            raise
+        new_offset = f.tell()
+    os.utime(meta_path)  # Active uploads do not expire
+    return new_offset
+
+
+def finish_upload(upload):
+    """
+    Complete an upload and hand its file to the purpose's finalize callback.
+
+    Args:
+        upload (dict): Upload state
+
+    Returns:
+        tuple: (response body, status) from the purpose
+
+    Raises:
+        InvalidUpload: If bytes are missing
+        ChecksumMismatch: If the file does not match the sha256 given at start
+        UploadGone: If another request finished or discarded the upload first
+    """
+    meta_path, part_path = _paths(upload['id'])
+    try:
+        f = open(part_path, 'rb')
+    except FileNotFoundError:
+        raise UploadGone('The upload no longer exists')
+    with f:
+        # The lock chunks take: concurrent finalize requests run these checks one at a time
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        if not os.path.exists(meta_path):
+            raise UploadGone('The upload no longer exists')
+        if os.fstat(f.fileno()).st_size != upload['size']:
+            raise InvalidUpload('The upload is incomplete')
+        if upload.get('sha256'):
+            digest = hashlib.sha256()
+            for block in iter(lambda: f.read(STREAM_BLOCK_SIZE), b''):
+                digest.update(block)
+            if digest.hexdigest() != upload['sha256'].lower():
+                discard_upload(upload)
+                raise ChecksumMismatch('The file does not match its checksum')
+
+        # Removing the state first means an upload can only be finalized once
+        os.remove(meta_path)
+    _, finalize, _ = _purposes[upload['purpose']]
+    try:
+        return finalize(upload, part_path)
+    except BaseException:
+        # Nothing can resume the upload without its state, so its data goes too
+        discard_upload(upload)
+        raise
+
+
+def discard_upload(upload):
+    """
+    Delete an upload's state and data.
+
+    Args:
+        upload (dict): Upload state
+    """
+    for path in _paths(upload['id']):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def purge_expired():
+    """
+    Delete uploads that received no data for CHUNKED_UPLOAD_TTL seconds,
+    and .part files left without their state (e.g. by a crash while
+    finalizing).
+    """
+    meta_path, _ = _paths('')
+    folder = os.path.dirname(meta_path)
+    if not os.path.isdir(folder):
+        return
+    cutoff = time.time() - current_app.config['CHUNKED_UPLOAD_TTL']
+    for name in os.listdir(folder):
+        upload_id, extension = os.path.splitext(name)
+        if extension not in ('.json', '.part'):
+            continue
+        try:
+            if os.path.getmtime(os.path.join(folder, name)) < cutoff:
+                discard_upload({'id': upload_id})
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,178 @@
+"""
+HTTP conditional GET support for the DreamHome Real Estate Portal.
+Read endpoints send ETag and Last-Modified validators built from a cheap
+property change version, and answer a matching If-None-Match or
+If-Modified-Since with 304 Not Modified without running their listing
+query or rendering a template.
+
+Change versions:
+- A single property: its updatedAt, which is set whenever the property,
+  its images or its amenities change (see models.py), plus the owner
+  version: the owner details the page shows, read by primary key, so a
+  profile or role change made on any worker changes the validators.
+- Listings: MAX(updatedAt) of the Property table, read from its index,
+  and a counter of deleted properties (ChangeCounters), bumped in the
+  transaction of every delete, whichever route or bulk statement makes
+  it. Any edit raises the maximum and any delete raises the counter, so
+  every listing validator changes with them, on every worker. Both are
+  single-row reads, however many properties there are.
+
+Pages show the signed-in user in the navigation bar, so ETags include the
+viewer and responses carry Vary: Cookie. Responses with pending flash
+messages are always sent in full, without validators.
+"""
+import hashlib
+from functools import wraps
+from flask import g, request, session, make_response
+from flask_login import current_user
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.orm import Session
+from werkzeug.http import is_resource_modified
+from models import db, ChangeCounter, Property, User
+from reference_data import reference_data
+
+# ChangeCounters row counting deleted properties
+PROPERTY_DELETES = 'property_deletes'
+
+
+def listing_version():
+    """
+    Get the change version of the whole Property table.
+
+    Returns:
+        tuple: (number of deletes so far or None, latest updatedAt or None)
+    """
+    deletes = select(ChangeCounter.value).where(ChangeCounter.name == PROPERTY_DELETES).scalar_subquery()
+    return db.session.execute(select(deletes, func.max(Property.updatedAt))).one()
+
+
+def request_listing_version():
+    """
+    Get listing_version(), read at most once per request.
+
+    Listing ETags and per-process search cache keys both use this, so a
+    cached page is only ever tagged with the version it was cached under.
+
+    Returns:
+        tuple: See listing_version()
+    """
+    if 'listing_version' not in g:
+        g.listing_version = tuple(listing_version())
+    return g.listing_version
+
+
+def owner_version(user_id):
+    """
+    Get the change version of the owner details shown with a listing.
+
+    Args:
+        user_id (int): ID of the owner
+
+    Returns:
+        str: Short hash of the owner's username, mobile and role
+    """
+    row = db.session.execute(
+        select(User.username, User.mobile, User.roleId).where(User.userId == user_id)
+    ).first()
+    return hashlib.sha1(repr(tuple(row) if row else None).encode('utf-8')).hexdigest()[:12]
+
+
+def _count_property_delete(conn):
+    table = ChangeCounter.__table__
+    bumped = conn.execute(
+        update(table).where(table.c.name == PROPERTY_DELETES).values(value=table.c.value + 1)
+    ).rowcount
+    if not bumped:
+        conn.execute(insert(table).values(name=PROPERTY_DELETES, value=1))
+
+
+@event.listens_for(Session, 'after_flush')
+def _count_deleted(session, flush_context):
+    """Bump the delete counter when a flush deletes properties"""
+    if any(isinstance(obj, Property) for obj in session.deleted):
+        _count_property_delete(session.connection())
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _count_bulk_deleted(orm_execute_state):
+    """Bump the delete counter for a bulk DELETE of properties (e.g. Query.delete())"""
+    mapper = orm_execute_state.bind_mapper
+    if orm_execute_state.is_delete and mapper is not None and mapper.class_ is Property:
+        _count_property_delete(orm_execute_state.session.connection())
+
+
+def viewer_key():
+    """
+    Identify what the current viewer sees in the page chrome.
+
+    Returns:
+        str: 'anonymous', or the user id, role and username
+    """
+    if not current_user.is_authenticated:
+        return 'anonymous'
+    return f'{current_user.userId}:{current_user.roleId}:{current_user.username}'
+
+
+def make_etag(*parts):
+    """
+    Build an ETag from the values a response depends on.
+
+    The viewer and the reference data version are always included.
+
+    Args:
+        *parts: Values identifying the response content, e.g. a change version
+
+    Returns:
+        str: Opaque entity tag (unquoted)
+    """
+    key = repr((viewer_key(), reference_data.version) + parts)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def conditional_response(etag, last_modified, render):
+    """
+    Answer a GET with 304 if the client's copy is current, else render it.
+
+    Args:
+        etag (str): Entity tag of the current content (see make_etag)
+        last_modified (datetime): When the content last changed, or None
+        render (callable): Produces the full response
+
+    Returns:
+        Response: 304 Not Modified, or the rendered response with validators
+    """
+    if session.get('_flashes'):
+        return make_response(render())
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = make_response('', 304)
+    else:
+        response = make_response(render())
+        if response.status_code != 200:
+            return response
+
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.vary.add('Cookie')
+    # Always revalidate; only shared caches may keep anonymous pages
+    response.cache_control.no_cache = True
+    if current_user.is_authenticated:
+        response.cache_control.private = True
+    return response
+
+
+def conditional_listing(view):
+    """
+    Decorator adding validators to a listing endpoint.
+
+    The ETag covers the endpoint, its query string and the listing change
+    version, so a repeat request for the same page or search costs one
+    small query while no property has changed.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        deletes, last_modified = request_listing_version()
+        etag = make_etag(request.endpoint, request.query_string, deletes, last_modified)
+        return conditional_response(etag, last_modified, lambda: view(*args, **kwargs))
+    return wrapper
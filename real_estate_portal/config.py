@@ -32,6 +32,32 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     DOCUMENT_UPLOAD_FOLDER = os.path.join('static', 'documents')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx'}
+    # Uploads wait here for their background job (shared storage with the redis job queue)
+    UPLOAD_STAGING_FOLDER = os.path.join('uploads', 'staging')
+    # Chunked uploads (/api/uploads): suggested chunk size, largest file, and how
+    # long an upload may sit without new data before it is discarded
+    CHUNKED_UPLOAD_CHUNK_SIZE = 1024 * 1024
+    CHUNKED_UPLOAD_MAX_SIZE = 64 * 1024 * 1024
+    CHUNKED_UPLOAD_TTL = 24 * 3600  # seconds
+    # Content-addressed storage of uploaded images and documents (see blob_store.py)
+    BLOB_ORPHAN_TTL = 24 * 3600  # seconds an image upload no row uses is kept
+    # Where the blobs live (see storage.py): 'local' (the folders below, on one node
+    # or a shared volume) or 's3' (an S3-compatible bucket such as AWS S3 or MinIO;
+    # boto3 reads credentials from AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY or an instance role)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+    IMAGE_BLOB_FOLDER = os.path.join('static', 'images', 'blobs')
+    IMAGE_BLOB_URL = '/static/images/blobs'
+    # Kept outside the static folder: documents are private and only sent by the document routes
+    DOCUMENT_BLOB_FOLDER = os.path.join('uploads', 'documents')
+    # Internal nginx location serving DOCUMENT_BLOB_FOLDER; documents are then sent
+    # by nginx (X-Accel-Redirect) after the access check instead of by the app
+    DOCUMENT_ACCEL_REDIRECT = os.environ.get('DOCUMENT_ACCEL_REDIRECT')
+    STORAGE_S3_BUCKET = os.environ.get('STORAGE_S3_BUCKET')
+    STORAGE_S3_ENDPOINT_URL = os.environ.get('STORAGE_S3_ENDPOINT_URL')  # e.g. http://minio:9000
+    STORAGE_S3_REGION = os.environ.get('STORAGE_S3_REGION')
+    # Public base URL of the bucket's images/ prefix (CDN); defaults to the bucket URL
+    STORAGE_S3_IMAGE_URL = os.environ.get('STORAGE_S3_IMAGE_URL')
+    STORAGE_PRESIGN_TTL = 300  # seconds a document link is valid
     
     # Password policy
     PASSWORD_MIN_LENGTH = 8
@@ -44,6 +70,80 @@ class Config:
     RATELIMIT_DEFAULT = "100/hour"
     RATELIMIT_STORAGE_URL = "memory://"
     
+    # Keyword search: 'auto' picks MySQL FULLTEXT / SQLite FTS5 by database,
+    # 'memory' forces the in-process inverted index
+    TEXT_SEARCH_BACKEND = os.environ.get('TEXT_SEARCH_BACKEND', 'auto')
+    TEXT_SEARCH_MAX_CANDIDATES = 1000  # best in-process index matches kept and ranked per keyword
+    
+    # Listing pagination: hard page size cap and how long result counts are cached
+    SEARCH_MAX_PER_PAGE = 50
+    SEARCH_COUNT_CACHE_TTL = 60  # seconds
+    
+    # Search result cache: 'memory' (per process), 'redis' (shared) or 'null' (off)
+    SEARCH_CACHE_BACKEND = os.environ.get('SEARCH_CACHE_BACKEND', 'memory')
+    SEARCH_CACHE_TTL = 60  # seconds
+    SEARCH_CACHE_REDIS_URL = os.environ.get('REDIS_URL')
+    
+    # Map API: individual markers from this zoom level up, clusters below it;
+    # caps on the number of markers and clusters in one response
+    MAP_CLUSTER_MAX_ZOOM = 14
+    MAP_MAX_MARKERS = 500
+    MAP_MAX_CLUSTERS = 400
+    
+    # Radius search (near=lat,lng&radius_km=): default and largest radius, and
+    # how many of the nearest matches are ranked
+    GEO_SEARCH_DEFAULT_RADIUS_KM = 5
+    GEO_SEARCH_MAX_RADIUS_KM = 100
+    GEO_SEARCH_MAX_RESULTS = 1000
+    
+    # In-memory listing index (NumPy columns per worker) answering filter, sort and
+    # page steps of searches without SQL; rebuilt in full this often
+    LISTING_INDEX_ENABLED = os.environ.get('LISTING_INDEX_ENABLED', '').lower() in ('1', 'true')
+    LISTING_INDEX_REBUILD_INTERVAL = 300  # seconds
+    
+    # Property types, locations, amenities and roles are cached in memory for this long
+    REFERENCE_DATA_TTL = 3600  # seconds
+    
+    # Ban/active status of signed-in users: cached briefly, dropped on admin changes
+    ACCOUNT_STATUS_CACHE_BACKEND = os.environ.get('ACCOUNT_STATUS_CACHE_BACKEND', 'memory')
+    ACCOUNT_STATUS_TTL = 30  # seconds
+    ACCOUNT_STATUS_REDIS_URL = os.environ.get('REDIS_URL')
+    
+    # Signed-in user principals used by Flask-Login's user_loader. Role and ban
+    # changes are only dropped from the worker that made them, so a per-process
+    # cache keeps principals for USER_CACHE_MEMORY_TTL; Redis is used when set up
+    USER_CACHE_BACKEND = os.environ.get('USER_CACHE_BACKEND', 'redis' if os.environ.get('REDIS_URL') else 'memory')
+    USER_CACHE_TTL = 300  # seconds
+    USER_CACHE_MEMORY_TTL = 5  # seconds
+    USER_CACHE_REDIS_URL = os.environ.get('REDIS_URL')
+    
+    # Per-property image lists shown on the detail page, keyed on Property.updatedAt
+    IMAGE_MANIFEST_BACKEND = os.environ.get('IMAGE_MANIFEST_BACKEND', 'memory')
+    IMAGE_MANIFEST_TTL = 3600  # seconds
+    IMAGE_MANIFEST_REDIS_URL = os.environ.get('REDIS_URL')
+    
+    # Rendered property detail bodies, keyed on Property.updatedAt
+    FRAGMENT_CACHE_BACKEND = os.environ.get('FRAGMENT_CACHE_BACKEND', 'memory')
+    FRAGMENT_CACHE_TTL = 600  # seconds
+    FRAGMENT_CACHE_REDIS_URL = os.environ.get('REDIS_URL')
+    
+    # Background jobs for upload processing: 'process' (worker processes per app
+    # process), 'redis' (queue run by `flask jobs worker`) or 'inline' (in the request)
+    JOB_QUEUE_BACKEND = os.environ.get('JOB_QUEUE_BACKEND', 'process')
+    JOB_QUEUE_WORKERS = int(os.environ.get('JOB_QUEUE_WORKERS', 2))
+    JOB_QUEUE_REDIS_URL = os.environ.get('REDIS_URL')
+    # Job status polled by clients; shared through Redis when it is set up, so any
+    # process can answer a poll ('redis' is required by the 'redis' queue backend)
+    JOB_STATUS_BACKEND = os.environ.get('JOB_STATUS_BACKEND', 'redis' if os.environ.get('REDIS_URL') else 'memory')
+    JOB_STATUS_TTL = 3600  # seconds
+    JOB_STATUS_REDIS_URL = os.environ.get('REDIS_URL')
+    
+    # Log image diagnostics (stored URLs, missing files) for each property detail view
+    PROPERTY_DETAIL_DEBUG = os.environ.get('PROPERTY_DETAIL_DEBUG', '').lower() in ('1', 'true')
+    
+    # Send X-Query-Count headers so N+1 regressions show up during development
+    QUERY_COUNT_HEADER = os.environ.get('FLASK_ENV') == 'development'
+    
     # API security
     API_TOKEN_EXPIRATION = 3600  # 1 hour
     
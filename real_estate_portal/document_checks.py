@@ -0,0 +1,97 @@
+"""
+Document content checks for the DreamHome Real Estate Portal.
+Uploaded verification documents are accepted by file extension first; the
+background check (see jobs.py) then confirms from the file's leading bytes
+that the content matches that type, and for images that Pillow can decode
+it. Only the header and, for images, the decoder's verification pass are
+read, never the whole file into memory.
+"""
+from storage import create_storage
+
+# Extension -> (MIME type, leading byte signatures)
+SIGNATURES = {
+    'pdf': ('application/pdf', (b'%PDF-',)),
+    'jpg': ('image/jpeg', (b'\xff\xd8\xff',)),
+    'jpeg': ('image/jpeg', (b'\xff\xd8\xff',)),
+    'png': ('image/png', (b'\x89PNG\r\n\x1a\n',)),
+    'gif': ('image/gif', (b'GIF87a', b'GIF89a')),
+    'doc': ('application/msword', (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',)),
+    'docx': ('application/vnd.openxmlformats-officedocument.wordprocessingml.document', (b'PK\x03\x04',)),
+}
+
+# Largest image accepted as a document, in pixels per side
+MAX_IMAGE_SIDE = 10000
+
+
+class InvalidDocument(ValueError):
+    """Raised when a document's content does not match its type."""
+
+
+def inspect_document(path, extension):
+    """
+    Check that an uploaded document's content matches its extension.
+
+    Args:
+        path (str): Path the document was saved to
+        extension (str): Lower-case file extension of the upload
+
+    Returns:
+        dict: {'mime_type': detected MIME type}
+
+    Raises:
+        InvalidDocument: If the content does not match the extension or an
+            image cannot be decoded
+    """
+    mime_type, signatures = SIGNATURES.get(extension, (None, ()))
+    with open(path, 'rb') as f:
+        header = f.read(16)
+    if not header.startswith(signatures):
+        raise InvalidDocument(f'The file content is not a valid {extension.upper()} document')
+
+    if mime_type.startswith('image/'):
+        # Imported on first use to keep Pillow out of the cold start (see startup_benchmark.py)
+        from PIL import Image
+        try:
+            with Image.open(path) as image:
+                if max(image.size) > MAX_IMAGE_SIDE:
+                    raise InvalidDocument('Image dimensions too large')
+                image.verify()
+        except InvalidDocument:
+            raise
+        except Exception as e:
+            raise InvalidDocument('The image could not be read') from e
+    return {'mime_type': mime_type}
+
+
+def check_document(path, extension):
+    """
+    Background job work of a document upload (see routes/documents.py).
+
+    Args:
+        path (str): Path the document was saved to
+        extension (str): Lower-case file extension of the upload
+
+    Returns:
+        dict: {'mime_type'} for a valid document, else {'error': reason}
+    """
+    try:
+        return inspect_document(path, extension)
+    except InvalidDocument as e:
+        return {'error': str(e)}
+
+
+def check_stored_document(storage_spec, key, extension):
+    """
+    Background job work of a document upload (see routes/documents.py):
+    check_document() on a file in the document storage.
+
+    Args:
+        storage_spec (dict): Spec of the document storage (see storage.py)
+        key (str): Key of the stored document
+        extension (str): Lower-case file extension of the upload
+
+    Returns:
+        dict: See check_document()
+    """
+    with create_storage(storage_spec).local_copy(key) as path:
+        return check_document(path, extension)
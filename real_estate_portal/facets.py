@@ -0,0 +1,135 @@
+"""
+Search facet counts for the DreamHome Real Estate Portal.
+Counts the listings matching the current search criteria per city,
+property type, furnishing, facing, water supply, power backup and amenity,
+so the search filters can show "Mumbai (1,240)".
+
+All facets are counted in one pass:
+- With the in-memory listing index enabled (see listing_index.py), from
+  its column arrays and bitmaps, without SQL.
+- Otherwise with a single statement: one GROUP BY over every scalar facet
+  column, whose combinations are summed per facet in Python, and one
+  GROUP BY amenityId, joined with UNION ALL.
+
+Results are cached per criteria hash in the search cache, so they are
+dropped with the search results when properties change.
+"""
+from collections import Counter
+from flask import current_app
+from sqlalchemy import func, literal, null, select, union_all
+from models import db, Property, PropertyAmenity
+from reference_data import reference_data
+from search_cache import search_cache
+from search_engine import build_filters
+from pagination import rank_nearby
+
+# Facet name -> Property column; 'city' is derived from locationId
+SCALAR_FACETS = (
+    ('location', Property.locationId),
+    ('type', Property.typeId),
+    ('furnishing', Property.furnishingType),
+    ('facing', Property.facing),
+    ('water_supply', Property.waterSupply),
+    ('power_backup', Property.powerBackup),
+)
+
+
+def _sql_counts(criteria):
+    """
+    Count the matches of criteria per facet value with one statement.
+
+    Returns:
+        dict: total plus {facet name: {value: count}} for every scalar facet
+              and 'amenities'
+    """
+    if criteria.near:
+        # The exact circle is only known after ranking (see geo_search.py)
+        filters = [Property.propertyId.in_([property_id for property_id, _ in rank_nearby(criteria)])]
+    else:
+        filters = build_filters(criteria)
+    columns = [column for _, column in SCALAR_FACETS]
+
+    combinations = select(
+        literal('property').label('kind'), *columns, null().label('amenityId'), func.count().label('count')
+    ).where(*filters).group_by(*columns)
+    amenities = select(
+        literal('amenity'), *(null() for _ in columns), PropertyAmenity.amenityId, func.count()
+    ).where(
+        PropertyAmenity.propertyId.in_(select(Property.propertyId).where(*filters))
+    ).group_by(PropertyAmenity.amenityId)
+
+    counts = {name: Counter() for name, _ in SCALAR_FACETS}
+    counts['amenities'] = Counter()
+    total = 0
+    for row in db.session.execute(union_all(combinations, amenities)):
+        if row.kind == 'amenity':
+            counts['amenities'][row.amenityId] += row.count
+            continue
+        total += row.count
+        for name, column in SCALAR_FACETS:
+            value = getattr(row, column.key)
+            if value is not None:
+                counts[name][value] += row.count
+    counts['total'] = total
+    return counts
+
+
+def _labelled(counts, label=None):
+    """Turn {value: count} into a list of dicts, most common first"""
+    items = [
+        {'value': value, 'label': label(value) if label else value, 'count': count}
+        for value, count in counts.items() if count
+    ]
+    items.sort(key=lambda item: (-item['count'], str(item['label'])))
+    return items
+
+
+def _amenity_name(amenity_id):
+    amenity = reference_data.amenity(amenity_id)
+    return amenity.name if amenity else None
+
+
+def _format(counts):
+    """Build the JSON response body from raw facet counts"""
+    cities = Counter()
+    for location_id, count in counts['location'].items():
+        location = reference_data.location(location_id)
+        if location:
+            cities[location.city] += count
+
+    return {
+        'total': counts['total'],
+        'facets': {
+            'city': _labelled(cities),
+            'type': _labelled(counts['type'], reference_data.property_type_name),
+            'furnishing': _labelled(counts['furnishing']),
+            'facing': _labelled(counts['facing']),
+            'water_supply': _labelled(counts['water_supply']),
+            'power_backup': _labelled(counts['power_backup']),
+            'amenities': _labelled(counts['amenities'], _amenity_name),
+        },
+    }
+
+
+def facet_counts(criteria):
+    """
+    Get the facet counts of the listings matching criteria.
+
+    Counts are conjunctive: they describe the current result set, so a
+    facet that is already filtered on only shows the selected value.
+
+    Args:
+        criteria (SearchCriteria): Search criteria
+
+    Returns:
+        dict: {'total': int, 'facets': {name: [{'value', 'label', 'count'}]}}
+    """
+    def compute():
+        index = current_app.extensions.get('listing_index')
+        if index is not None and index.supports(criteria):
+            return _format(index.facet_counts(criteria))
+        return _format(_sql_counts(criteria))
+
+    # Counts do not depend on the sort order; labels depend on the reference data
+    return search_cache.get_or_set('facets', criteria.with_changes(sort='newest'), compute,
+                                   reference_data.version)
@@ -15,7 +15,8 @@ Uses Flask-WTF for form handling and validation.
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, BooleanField, SubmitField, TextAreaField, DecimalField, IntegerField, SelectField, SelectMultipleField, FloatField
 from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError, Optional
-from models import User, PropertyType, IndianLocation, Amenity
+from models import User
+from reference_data import reference_data
 
 class LoginForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired()])
@@ -126,9 +127,9 @@ class PropertyForm(FlaskForm):
 
     def __init__(self, *args, **kwargs):
         super(PropertyForm, self).__init__(*args, **kwargs)
-        self.property_type.choices = [(t.typeId, t.typeName) for t in PropertyType.query.all()]
-        self.location.choices = [(l.locationId, f"{l.city}, {l.state}") for l in IndianLocation.query.all()]
-        self.amenities.choices = [(a.amenityId, a.name) for a in Amenity.query.all()]
+        self.property_type.choices = [(t.typeId, t.typeName) for t in reference_data.property_types()]
+        self.location.choices = [(l.locationId, f"{l.city}, {l.state}") for l in reference_data.locations()]
+        self.amenities.choices = [(a.amenityId, a.name) for a in reference_data.amenities()]
 
 class PropertySearchForm(FlaskForm):
     location = StringField('Location')
@@ -145,4 +146,4 @@ class PropertySearchForm(FlaskForm):
 
     def __init__(self, *args, **kwargs):
         super(PropertySearchForm, self).__init__(*args, **kwargs)
-        self.property_type.choices = [(0, 'Any')] + [(t.typeId, t.typeName) for t in PropertyType.query.all()]
\ No newline at end of file
+        self.property_type.choices = [(0, 'Any')] + [(t.typeId, t.typeName) for t in reference_data.property_types()]
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Rendered fragment cache for the DreamHome Real Estate Portal.
+Caches the HTML of page sections that are the same for every viewer, such
+as the body of a property detail page, so popular pages are not rendered
+by Jinja on every view. User-specific parts (favorite state, owner and
+admin controls) are rendered per request around the cached fragment.
+
+Fragments are keyed on the property id plus its version, the owner
+version and the reference data version. Each is read from the database
+on every view, so a change made by any worker, through any write path,
+moves every worker to new keys, and fragments under an old version are
+never served again:
+- The property version is Property.updatedAt, which is set on every change
+  to the property, its images or its amenities, bulk statements included
+  (see models.py).
+- The owner version is a hash of the owner details fragments show (see
+  conditional.owner_version).
+- reference_data.version is a hash of the types, locations and amenities.
+
+Backends (FRAGMENT_CACHE_BACKEND): 'memory', 'redis' or 'null',
+see cache_backends.py.
+"""
+from cache_backends import NullBackend, create_backend
+from reference_data import reference_data
+
+
+class FragmentCache:
+    """
+    Flask extension caching rendered HTML fragments per property.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.backend = NullBackend()
+        self.ttl = 600
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('FRAGMENT_CACHE_BACKEND', 'memory')
+        app.config.setdefault('FRAGMENT_CACHE_TTL', 600)
+        app.config.setdefault('FRAGMENT_CACHE_MAX_ENTRIES', 1000)
+        app.config.setdefault('FRAGMENT_CACHE_REDIS_URL', None)
+
+        self.backend = create_backend(
+            app.config['FRAGMENT_CACHE_BACKEND'],
+            max_entries=app.config['FRAGMENT_CACHE_MAX_ENTRIES'],
+            redis_url=app.config['FRAGMENT_CACHE_REDIS_URL'],
+            prefix='dreamhome:fragment:'
+        )
+        self.ttl = app.config['FRAGMENT_CACHE_TTL']
+
+    def get_or_render(self, name, property_id, version, owner_version, render):
+        """
+        Get a property's cached fragment, rendering and storing it on a miss.
+
+        The key is taken before rendering, so a fragment that raced with a
+        property change is stored under the old version and never served.
+
+        Args:
+            name (str): Fragment name, e.g. 'detail'
+            property_id (int): ID of the property the fragment shows
+            version (datetime): The property's updatedAt as loaded for this request
+            owner_version (str): The owner's version, see conditional.owner_version()
+            render (callable): Renders the fragment HTML
+
+        Returns:
+            str: Fragment HTML
+        """
+        key = ':'.join([
+            name, str(property_id), version.isoformat() if version else '', owner_version,
+            reference_data.version,
+        ])
+        html = self.backend.get(key)
+        if html is None:
+            html = render()
+            self.backend.set(key, html, self.ttl)
+        return html
+
+    def clear(self):
+        """Drop every cached fragment"""
+        self.backend.clear()
+
+
+fragment_cache = FragmentCache()
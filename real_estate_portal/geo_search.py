@@ -0,0 +1,119 @@
+"""
+Radius search for the DreamHome Real Estate Portal.
+Finds the properties within a distance of a point
+(near=lat,lng&radius_km=) in two steps:
+
+1. Prefilter in SQL: the geohash cells covering the circle select
+   candidates through the (isActive, geohash) index, and a latitude/
+   longitude bounding box trims the corners of those cells. Both are part
+   of build_filters(), so every other filter narrows the same query.
+2. Refine in Python: exact haversine distances of the candidates are
+   computed in one vectorized NumPy pass, rows outside the radius are
+   dropped and the rest are sorted nearest first.
+
+The ranked ids are cached with the other search results (see
+pagination.paginate_by_distance).
+"""
+import math
+from flask import current_app
+from sqlalchemy import or_
+from models import Property
+from geohash import KM_PER_DEGREE, covering_cells
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def search_radius(criteria):
+    """
+    Get the radius of a proximity search, applying the default and limit.
+
+    Args:
+        criteria (SearchCriteria): Criteria with near set
+
+    Returns:
+        float: Radius in kilometres
+    """
+    config = current_app.config
+    radius = criteria.radius_km
+    if radius is None or radius <= 0:
+        radius = config['GEO_SEARCH_DEFAULT_RADIUS_KM']
+    return min(radius, config['GEO_SEARCH_MAX_RADIUS_KM'])
+
+
+def near_filters(criteria):
+    """
+    Build the SQL prefilter selecting the candidates of a proximity search.
+
+    Candidates are a superset of the matches; rank_by_distance() drops the
+    ones outside the circle.
+
+    Args:
+        criteria (SearchCriteria): Criteria with near set
+
+    Returns:
+        list: SQLAlchemy boolean expressions
+    """
+    latitude, longitude = criteria.near
+    radius = search_radius(criteria)
+
+    cells = covering_cells(latitude, longitude, radius)
+    filters = [or_(*(Property.geohash.like(cell + '%') for cell in cells))]
+
+    lat_delta = radius / KM_PER_DEGREE
+    filters.append(Property.latitude.between(latitude - lat_delta, latitude + lat_delta))
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat > 0:
+        lng_delta = radius / (KM_PER_DEGREE * cos_lat)
+        # Boxes crossing the antimeridian are left to the geohash cells
+        if -180 <= longitude - lng_delta and longitude + lng_delta <= 180:
+            filters.append(Property.longitude.between(longitude - lng_delta, longitude + lng_delta))
+    return filters
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """
+    Compute great-circle distances from one point to many.
+
+    Args:
+        latitude (float): Latitude of the origin
+        longitude (float): Longitude of the origin
+        latitudes (ndarray): Latitudes of the other points
+        longitudes (ndarray): Longitudes of the other points
+
+    Returns:
+        ndarray: Distances in kilometres
+    """
+    # Imported on first use to keep NumPy out of the cold start (see startup_benchmark.py)
+    import numpy as np
+
+    lat1, lng1 = math.radians(latitude), math.radians(longitude)
+    lat2, lng2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def rank_by_distance(rows, criteria):
+    """
+    Keep the candidates inside the search radius, nearest first.
+
+    Args:
+        rows (list): (propertyId, latitude, longitude) candidate rows
+        criteria (SearchCriteria): Criteria with near set
+
+    Returns:
+        list: [propertyId, distance_km] pairs, at most GEO_SEARCH_MAX_RESULTS;
+              equal distances are ordered by propertyId
+    """
+    import numpy as np
+
+    if not rows:
+        return []
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    points = np.array([(row[1], row[2]) for row in rows], dtype=np.float64)
+
+    distances = haversine_km(*criteria.near, points[:, 0], points[:, 1])
+    inside = distances <= search_radius(criteria)
+    ids, distances = ids[inside], distances[inside]
+
+    order = np.lexsort((ids, distances))[:current_app.config['GEO_SEARCH_MAX_RESULTS']]
+    return [[int(ids[i]), float(distances[i])] for i in order]
@@ -0,0 +1,102 @@
+"""
+Geohash encoding for the DreamHome Real Estate Portal.
+A geohash interleaves longitude and latitude bits into a base-32 string, so
+nearby points share a prefix and every prefix names a rectangular cell.
+Property.geohash is kept in sync with latitude/longitude on every write
+(see models.py), and radius searches select candidates by cell prefix
+through an index instead of reading the whole table (see geo_search.py).
+"""
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Precision stored on Property.geohash; a 9 character cell is about 5 x 5 m
+PRECISION = 9
+
+# Kilometres per degree of latitude (and of longitude at the equator)
+KM_PER_DEGREE = 111.2
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    """
+    Encode a point as a geohash.
+
+    Args:
+        latitude (float): Latitude in degrees
+        longitude (float): Longitude in degrees
+        precision (int): Number of characters
+
+    Returns:
+        str: Geohash of the cell containing the point
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # Bits alternate, starting with longitude
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """
+    Get the size of a geohash cell.
+
+    Args:
+        precision (int): Number of characters
+
+    Returns:
+        tuple: (latitude degrees, longitude degrees)
+    """
+    bits = 5 * precision
+    lng_bits = (bits + 1) // 2
+    return 180.0 / 2 ** (bits - lng_bits), 360.0 / 2 ** lng_bits
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Get the geohash cells that together cover a circle.
+
+    The finest precision whose cells are at least radius_km wide and high
+    is used, so the cell of the centre and its eight neighbours always
+    contain the whole circle.
+
+    Args:
+        latitude (float): Latitude of the centre
+        longitude (float): Longitude of the centre
+        radius_km (float): Radius of the circle
+
+    Returns:
+        list: Sorted, distinct geohash prefixes
+    """
+    lng_km_per_degree = KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6)
+    precision = 1
+    for candidate in range(PRECISION, 0, -1):
+        lat_degrees, lng_degrees = cell_size(candidate)
+        if lat_degrees * KM_PER_DEGREE >= radius_km and lng_degrees * lng_km_per_degree >= radius_km:
+            precision = candidate
+            break
+
+    lat_degrees, lng_degrees = cell_size(precision)
+    cells = set()
+    for d_lat in (-1, 0, 1):
+        cell_lat = min(max(latitude + d_lat * lat_degrees, -90.0), 90.0)
+        for d_lng in (-1, 0, 1):
+            cell_lng = (longitude + d_lng * lng_degrees + 180.0) % 360.0 - 180.0
+            cells.add(encode(cell_lat, cell_lng, precision))
+    return sorted(cells)
@@ -0,0 +1,112 @@
+"""
+Property image manifests for the DreamHome Real Estate Portal.
+The property detail page shows a property's images from a small cached
+manifest (image id, URL and primary flag) instead of querying and checking
+the image files on every view.
+
+Image files are checked once, when they are saved; a PropertyImages row is
+only written for a file that exists. Reading a manifest therefore never
+touches the filesystem. Manifests are keyed on the property's updatedAt,
+which is set whenever its images change (see models.py), so after an
+upload or delete every worker reads a new manifest, whichever made the
+change.
+
+Backends (IMAGE_MANIFEST_BACKEND): 'memory', 'redis' or 'null',
+see cache_backends.py.
+"""
+import os
+from sqlalchemy import select
+from models import db, PropertyImages
+from cache_backends import NullBackend, create_backend
+
+
+def image_file_exists(file_path):
+    """
+    Check that a saved image file is present and not empty.
+
+    Args:
+        file_path (str): Filesystem path the image was written to
+
+    Returns:
+        bool: True if the file exists and has content
+    """
+    try:
+        return os.path.getsize(file_path) > 0
+    except OSError:
+        return False
+
+
+def image_file_path(root_path, image_url):
+    """
+    Map a stored image URL to its filesystem path.
+
+    Args:
+        root_path (str): Application root path
+        image_url (str): URL as stored in PropertyImages.imageURL
+
+    Returns:
+        str: Path of the image file
+    """
+    if image_url.startswith('/static/'):
+        return os.path.join(root_path, image_url.lstrip('/'))
+    return os.path.join(root_path, 'static', image_url)
+
+
+class ImageManifest:
+    """
+    Flask extension caching the image list of each property.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.backend = NullBackend()
+        self.ttl = 3600
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('IMAGE_MANIFEST_BACKEND', 'memory')
+        app.config.setdefault('IMAGE_MANIFEST_TTL', 3600)
+        app.config.setdefault('IMAGE_MANIFEST_MAX_ENTRIES', 5000)
+        app.config.setdefault('IMAGE_MANIFEST_REDIS_URL', None)
+
+        self.backend = create_backend(
+            app.config['IMAGE_MANIFEST_BACKEND'],
+            max_entries=app.config['IMAGE_MANIFEST_MAX_ENTRIES'],
+            redis_url=app.config['IMAGE_MANIFEST_REDIS_URL'],
+            prefix='dreamhome:images:'
+        )
+        self.ttl = app.config['IMAGE_MANIFEST_TTL']
+
+    @staticmethod
+    def _key(property_id, version):
+        return f"manifest:{property_id}:{version.isoformat() if version else ''}"
+
+    def images(self, property_id, version):
+        """
+        Get the images of a property, querying only on a cache miss.
+
+        Args:
+            property_id (int): ID of the property
+            version (datetime): The property's updatedAt as loaded for this request
+
+        Returns:
+            list: Dicts with imageId, imageURL and isPrimary, in upload order
+        """
+        key = self._key(property_id, version)
+        manifest = self.backend.get(key)
+        if manifest is None:
+            rows = db.session.execute(
+                select(PropertyImages.imageId, PropertyImages.imageURL, PropertyImages.isPrimary)
+                .where(PropertyImages.propertyId == property_id)
+                .order_by(PropertyImages.imageId)
+            )
+            manifest = [
+                {'imageId': row.imageId, 'imageURL': row.imageURL, 'isPrimary': bool(row.isPrimary)}
+                for row in rows
+            ]
+            self.backend.set(key, manifest, self.ttl)
+        return manifest
+
+
+image_manifest = ImageManifest()
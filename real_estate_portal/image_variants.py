@@ -0,0 +1,247 @@
+"""
+Image variants for the DreamHome Real Estate Portal.
+Uploaded property photos are never served as uploaded. Each upload is
+decoded once with Pillow, turned upright from its EXIF orientation and
+re-encoded in three sizes (longest side; smaller images are not enlarged),
+each as WebP and JPEG:
+
+    thumb   320 px    map popups, dashboard and search thumbnails
+    card    800 px    listing cards and the compare page
+    full    1920 px   the property detail gallery
+
+Re-encoding drops EXIF and all other metadata, including GPS positions.
+Files are named <stem>-<variant>.<webp|jpg>; new uploads are stored as
+content-addressed blobs (see blob_store.py).
+PropertyImages.imageURL points at the full JPEG, so code that only knows
+imageURL keeps working, and variant_url() derives the other URLs from it.
+The dimensions and byte sizes of every file are recorded on
+PropertyImages.
+
+Images uploaded before variants existed keep their original URL, which
+variant_url() returns unchanged, until they are converted.
+
+Usage:
+    flask generate-image-variants    # convert images without variants
+"""
+import os
+import posixpath
+from flask import current_app
+from models import db, PropertyImages
+from image_manifest import image_file_exists, image_file_path
+from signals import property_images_changed
+
+# Variant name -> longest side in pixels, largest first
+VARIANTS = (('full', 1920), ('card', 800), ('thumb', 320))
+
+# Format -> (Pillow format, file extension, save options)
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# imageURL suffix of images that have variants
+FULL_SUFFIX = '-full.jpg'
+
+
+class InvalidImage(ValueError):
+    """Raised when an upload cannot be decoded as an image."""
+
+
+def variant_filename(stem, variant, image_format='jpeg'):
+    """
+    Get the file name of one variant of an image.
+
+    Args:
+        stem (str): Name shared by all variants of the image
+        variant (str): 'thumb', 'card' or 'full'
+        image_format (str): 'webp' or 'jpeg'
+
+    Returns:
+        str: File name, e.g. '3f2a...-card.webp'
+    """
+    return f'{stem}-{variant}.{FORMATS[image_format][1]}'
+
+
+def has_variants(image_url):
+    """
+    Check whether a stored image URL belongs to an image with variants.
+
+    Args:
+        image_url (str): PropertyImages.imageURL
+
+    Returns:
+        bool: True if the variant files exist for the image
+    """
+    return bool(image_url) and image_url.endswith(FULL_SUFFIX)
+
+
+def variant_url(image_url, variant='full', image_format='jpeg'):
+    """
+    Get the URL of one variant of a stored image.
+
+    Args:
+        image_url (str): PropertyImages.imageURL (the full JPEG)
+        variant (str): 'thumb', 'card' or 'full'
+        image_format (str): 'webp' or 'jpeg'
+
+    Returns:
+        str: URL of the variant; images without variants (and None) are
+             returned unchanged
+    """
+    if not has_variants(image_url):
+        return image_url
+    return image_url[:-len(FULL_SUFFIX)] + '-' + variant + '.' + FORMATS[image_format][1]
+
+
+def _flatten(image):
+    """Convert an image to RGB, putting transparent areas on white"""
+    from PIL import Image
+
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def process_image(source, folder, stem):
+    """
+    Write the thumb, card and full variants of an uploaded image.
+
+    Args:
+        source: Path or binary file object of the upload
+        folder (str): Directory to write the variants to (created if missing)
+        stem (str): Name shared by the variant files
+
+    Returns:
+        dict: PropertyImages column values (width, height, variants),
+              see describe_variants()
+
+    Raises:
+        InvalidImage: If the upload is not a decodable image
+    """
+    # Imported on first use to keep Pillow out of the cold start (see startup_benchmark.py)
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    os.makedirs(folder, exist_ok=True)
+    try:
+        with Image.open(source) as original:
+            largest = VARIANTS[0][1]
+            # Let the JPEG decoder scale down by powers of two while decoding
+            original.draft('RGB', (largest, largest))
+            image = _flatten(ImageOps.exif_transpose(original))
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise InvalidImage('The file is not a supported image') from e
+
+    # Each variant is scaled from the previous, larger one
+    for variant, size in VARIANTS:
+        image.thumbnail((size, size), Image.LANCZOS)
+        for image_format, (pillow_format, _, options) in FORMATS.items():
+            image.save(os.path.join(folder, variant_filename(stem, variant, image_format)),
+                       pillow_format, **options)
+    return describe_variants(folder, stem)
+
+
+def describe_variants(folder, stem):
+    """
+    Read the dimensions and byte sizes of an image's variant files.
+
+    Only the file headers are read.
+
+    Args:
+        folder (str): Directory holding the variants
+        stem (str): Name shared by the variant files
+
+    Returns:
+        dict: {'width', 'height'} of the full variant and 'variants':
+              {variant: {'width', 'height', 'webp': bytes, 'jpeg': bytes}}
+    """
+    from PIL import Image
+
+    variants = {}
+    for variant, _ in VARIANTS:
+        path = os.path.join(folder, variant_filename(stem, variant))
+        with Image.open(path) as image:
+            width, height = image.size
+        variants[variant] = {'width': width, 'height': height}
+        for image_format in FORMATS:
+            variants[variant][image_format] = os.path.getsize(
+                os.path.join(folder, variant_filename(stem, variant, image_format)))
+    return {'width': variants['full']['width'], 'height': variants['full']['height'], 'variants': variants}
+
+
+def stored_size(variants):
+    """
+    Get the bytes taken by all variant files of an image.
+
+    Args:
+        variants (dict): PropertyImages.variants, see describe_variants()
+
+    Returns:
+        int: Total size in bytes
+    """
+    return sum(sizes[image_format] for sizes in variants.values() for image_format in FORMATS)
+
+
+def delete_image_files(root_path, image_url):
+    """
+    Remove the files of a stored image: all its variants, or the original
+    file of an image without variants. Missing files are ignored.
+
+    Not for blob images (PropertyImages.contentHash set), whose files may
+    be shared; blob_store.py removes those once unreferenced.
+
+    Args:
+        root_path (str): Application root path
+        image_url (str): PropertyImages.imageURL
+    """
+    if has_variants(image_url):
+        urls = [variant_url(image_url, variant, image_format)
+                for variant, _ in VARIANTS for image_format in FORMATS]
+    else:
+        urls = [image_url]
+    for url in urls:
+        try:
+            os.remove(image_file_path(root_path, url))
+        except FileNotFoundError:
+            pass
+
+
+def generate_missing_variants():
+    """
+    Convert the images stored before variants existed.
+
+    The variants are written next to the original file, which is left in
+    place. Images whose file is missing or cannot be decoded are skipped.
+
+    Returns:
+        tuple: (converted, skipped) image counts
+    """
+    converted = skipped = 0
+    changed_properties = set()
+    images = PropertyImages.query.filter(~PropertyImages.imageURL.like('%' + FULL_SUFFIX)) \
+        .order_by(PropertyImages.imageId).all()
+    for image in images:
+        path = image_file_path(current_app.root_path, image.imageURL)
+        if not image_file_exists(path):
+            current_app.logger.warning(f"Skipped image {image.imageId}: {image.imageURL} is missing")
+            skipped += 1
+            continue
+        stem = os.path.splitext(os.path.basename(path))[0]
+        try:
+            details = process_image(path, os.path.dirname(path), stem)
+        except InvalidImage as e:
+            current_app.logger.warning(f"Skipped image {image.imageId} ({image.imageURL}): {e}")
+            skipped += 1
+            continue
+        image.imageURL = posixpath.join(posixpath.dirname(image.imageURL), variant_filename(stem, 'full'))
+        image.width, image.height, image.variants = details['width'], details['height'], details['variants']
+        changed_properties.add(image.propertyId)
+        converted += 1
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    for property_id in changed_properties:
+        property_images_changed.send(app, property_id=property_id)
+    return converted, skipped
@@ -0,0 +1,233 @@
+"""
+Background jobs for the DreamHome Real Estate Portal.
+CPU-heavy post-processing of uploads (image variants, document checks)
+runs outside the request thread. A route submits a job and answers at once
+with its id; the client polls GET /api/jobs/<id> until the job is done.
+
+A job type is registered with @job_queue.task(name, work) and has two parts:
+- the work: a plain function of JSON-serializable arguments that needs no
+  app context (e.g. Pillow resizing), run by a worker
+- the finish callback it decorates, run with an app context once the work
+  is done, which records the result (database rows, signals) and returns
+  the JSON result the client sees. Raising JobFailed marks the job failed.
+
+Backends (JOB_QUEUE_BACKEND):
+- 'process': a pool of JOB_QUEUE_WORKERS processes per app process;
+  finish callbacks run in the process that submitted the job
+- 'redis': jobs are pushed to a Redis list and run by `flask jobs worker`
+  on any node; the upload staging folder must then be shared storage
+- 'inline': run during the request (development and tests)
+
+Job status is kept in a cache backend (JOB_STATUS_BACKEND, see
+cache_backends.py). It defaults to 'redis' whenever Redis is configured,
+so that any process serving requests can answer a poll. The 'redis' queue
+backend requires it, as its jobs run in worker processes; the app refuses
+to start with a per-process status store there.
+
+Usage:
+    flask jobs worker    # run queued jobs (redis backend)
+"""
+import json
+import uuid
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from redis import Redis
+from cache_backends import NullBackend, create_backend
+
+# Job states reported to clients
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+# Redis list the 'redis' backend queues jobs on
+QUEUE_KEY = 'dreamhome:jobs:queue'
+
+jobs_cli = AppGroup('jobs', help='Background job commands.')
+
+
+class JobFailed(Exception):
+    """Raised by a finish callback to fail a job with a client-facing message."""
+
+
+class JobQueue:
+    """
+    Flask extension running registered job types in the background.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.tasks = {}
+        self.status = NullBackend()
+        self.ttl = 3600
+        self._executor = None
+        self._redis = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('JOB_QUEUE_BACKEND', 'process')
+        app.config.setdefault('JOB_QUEUE_WORKERS', 2)
+        app.config.setdefault('JOB_QUEUE_REDIS_URL', None)
+        app.config.setdefault('JOB_STATUS_REDIS_URL', None)
+        app.config.setdefault('JOB_STATUS_BACKEND', 'redis' if app.config['JOB_QUEUE_BACKEND'] == 'redis'
+                              or app.config['JOB_STATUS_REDIS_URL'] else 'memory')
+        app.config.setdefault('JOB_STATUS_TTL', 3600)
+        app.config.setdefault('JOB_STATUS_MAX_ENTRIES', 10000)
+
+        backend = app.config['JOB_QUEUE_BACKEND']
+        if backend not in ('process', 'redis', 'inline'):
+            raise ValueError(f"Unknown job queue backend '{backend}'")
+        # Queued jobs finish in `flask jobs worker`, whose status the web processes must see
+        if backend == 'redis' and app.config['JOB_STATUS_BACKEND'] != 'redis':
+            raise ValueError("The 'redis' job queue backend needs JOB_STATUS_BACKEND = 'redis'")
+        self.app = app
+        self.status = create_backend(
+            app.config['JOB_STATUS_BACKEND'],
+            max_entries=app.config['JOB_STATUS_MAX_ENTRIES'],
+            redis_url=app.config['JOB_STATUS_REDIS_URL'],
+            prefix='dreamhome:jobs:'
+        )
+        self.ttl = app.config['JOB_STATUS_TTL']
+        app.extensions['job_queue'] = self
+        app.cli.add_command(jobs_cli)
+
+    def task(self, name, work):
+        """
+        Register a job type; decorates its finish callback.
+
+        The finish callback is called as finish(work_result, **context).
+
+        Args:
+            name (str): Job type name used when submitting
+            work (callable): Module-level function doing the heavy part
+
+        Returns:
+            callable: Decorator returning the finish callback unchanged
+        """
+        def decorator(finish):
+            self.tasks[name] = (work, finish)
+            return finish
+        return decorator
+
+    def submit(self, name, *args, context=None, owner_id=None, job_id=None):
+        """
+        Queue a job.
+
+        Args:
+            name (str): Registered job type
+            *args: JSON-serializable arguments of the work function
+            context (dict): JSON-serializable keyword arguments of the finish callback
+            owner_id (int): User allowed to poll the job
+            job_id (str): Id to use instead of a random one
+
+        Returns:
+            str: Job id
+        """
+        if name not in self.tasks:
+            raise KeyError(f"Unknown job type '{name}'")
+        job = {'id': job_id or uuid.uuid4().hex, 'name': name, 'args': list(args),
+               'context': context or {}, 'owner_id': owner_id}
+        self._set_status(job, QUEUED)
+
+        backend = current_app.config['JOB_QUEUE_BACKEND']
+        if backend == 'inline':
+            self.run(job)
+        elif backend == 'redis':
+            self._queue().rpush(QUEUE_KEY, json.dumps(job))
+        else:
+            work, _ = self.tasks[name]
+            future = self._pool().submit(work, *args)
+            future.add_done_callback(lambda done: self._finish_in_app(job, done))
+        return job['id']
+
+    def get(self, job_id):
+        """
+        Get the status of a job.
+
+        Returns:
+            dict: id, name, status, result, error and owner_id; None for
+                  unknown or expired jobs
+        """
+        return self.status.get(f'job:{job_id}')
+
+    def run(self, job):
+        """
+        Run a job's work and finish callback in this process.
+
+        Args:
+            job (dict): Job as queued by submit()
+        """
+        work, _ = self.tasks[job['name']]
+        self._set_status(job, RUNNING)
+        try:
+            result = work(*job['args'])
+        except Exception as e:
+            self._fail(job, e)
+            return
+        self._finish(job, result)
+
+    def _finish_in_app(self, job, future):
+        """Future callback of the process pool: finish the job with an app context"""
+        with self.app.app_context():
+            error = future.exception()
+            if error is not None:
+                self._fail(job, error)
+            else:
+                self._finish(job, future.result())
+
+    def _finish(self, job, result):
+        _, finish = self.tasks[job['name']]
+        try:
+            outcome = finish(result, **job['context'])
+        except Exception as e:
+            self._fail(job, e)
+            return
+        self._set_status(job, DONE, result=outcome)
+
+    def _fail(self, job, error):
+        if not isinstance(error, (JobFailed, ValueError)):
+            current_app.logger.error(f"Job {job['name']} {job['id']} failed: {error!r}")
+            error = 'Processing failed'
+        self._set_status(job, FAILED, error=str(error))
+
+    def _set_status(self, job, status, result=None, error=None):
+        self.status.set(f"job:{job['id']}", {
+            'id': job['id'], 'name': job['name'], 'status': status,
+            'result': result, 'error': error, 'owner_id': job['owner_id'],
+        }, self.ttl)
+
+    def _pool(self):
+        # Created on first use; spawned (not forked) workers share no sockets or locks with the app
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            from multiprocessing import get_context
+            self._executor = ProcessPoolExecutor(
+                max_workers=current_app.config['JOB_QUEUE_WORKERS'], mp_context=get_context('spawn')
+            )
+        return self._executor
+
+    def _queue(self):
+        if self._redis is None:
+            url = current_app.config['JOB_QUEUE_REDIS_URL']
+            self._redis = Redis.from_url(url) if url else Redis()
+        return self._redis
+
+
+job_queue = JobQueue()
+
+
+@jobs_cli.command('worker')
+@click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+def worker_command(burst):
+    """Run jobs queued by the redis job queue backend"""
+    queue = job_queue._queue()
+    while True:
+        item = queue.blpop(QUEUE_KEY, timeout=5)
+        if item is None:
+            if burst:
+                break
+            continue
+        job = json.loads(item[1])
+        current_app.logger.info(f"Running job {job['name']} {job['id']}")
+        # A fresh app context per job, so each gets its own database session
+        with current_app.app_context():
+            job_queue.run(job)
@@ -0,0 +1,509 @@
+"""
+In-memory listing index for the DreamHome Real Estate Portal.
+An optional, per-process read replica of the active listings, stored as
+NumPy column arrays, that answers the filter, sort and page steps of a
+search without SQL. Only the properties on the visible page are then
+loaded from the database, by primary key (see pagination.py).
+
+Layout, one slot per property:
+- Numeric columns: price, carpetArea, floorNumber (NaN when unknown),
+  typeId, locationId and createdAt (microseconds since the epoch).
+- Enum columns (category, listing type, ownership, age, furnishing,
+  facing, water supply, power backup): a small integer code per slot plus
+  a bitmap (boolean array) per value, so an equality filter is one AND.
+- Amenities: a 64-bit mask per slot, one bit per amenity.
+- Sort orders: one precomputed permutation per sort option, so a page is
+  read by masking the permutation instead of sorting the matches.
+
+Changes arrive through the property_changed signal. The receiver only
+records the property id; the next search reloads those rows in one query
+and updates their slots in place. Deleted or deactivated properties leave
+a dead slot that is reused if they come back. Each worker process keeps
+its own replica and only sees changes made by other processes when it is
+rebuilt, every LISTING_INDEX_REBUILD_INTERVAL seconds. Only the first
+build runs in a request; later rebuilds run in a background thread into
+fresh arrays, and searches keep using the old ones until they are swapped
+in.
+
+Searches the index cannot answer (keyword, locality or proximity filters,
+relevance or distance sorts, inactive listings) go to SQL as before.
+
+Enable with LISTING_INDEX_ENABLED; the module is only imported then.
+"""
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+from models import db, Property, PropertyAmenity
+from reference_data import reference_data
+from signals import property_changed
+
+# SearchCriteria field -> Property enum column
+ENUM_FILTERS = (
+    ('category', 'propertyCategory'),
+    ('listing_type', 'listingType'),
+    ('ownership', 'ownershipType'),
+    ('property_age', 'propertyAge'),
+    ('furnishing', 'furnishingType'),
+    ('facing', 'facing'),
+    ('water_supply', 'waterSupply'),
+    ('power_backup', 'powerBackup'),
+)
+
+# Facet name -> enum column counted by facet_counts()
+FACET_ENUMS = (
+    ('furnishing', 'furnishingType'),
+    ('facing', 'facing'),
+    ('water_supply', 'waterSupply'),
+    ('power_backup', 'powerBackup'),
+)
+
+# Sort option -> (sort column, descending); ties are broken by propertyId
+INDEX_SORTS = {
+    'newest': ('createdAt', True),
+    'price_low': ('price', False),
+    'price_high': ('price', True),
+    'area': ('carpetArea', True),
+}
+
+# Amenity ids beyond this many distinct values cannot be given a mask bit
+MAX_AMENITY_BITS = 64
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Row handed to pagination.encode_cursor(); it reads the sort column by name
+IndexRow = namedtuple('IndexRow', 'propertyId createdAt price carpetArea')
+
+IndexResult = namedtuple('IndexResult', 'property_ids total rows')
+
+_COLUMNS = (
+    Property.propertyId, Property.price, Property.carpetArea, Property.floorNumber,
+    Property.typeId, Property.locationId, Property.createdAt, Property.reraRegistered,
+) + tuple(getattr(Property, column) for _, column in ENUM_FILTERS)
+
+
+# Attributes holding the indexed data, swapped in whole after a rebuild
+_STATE = (
+    '_size', '_slots', '_alive', '_ids', '_numeric', '_rera', '_amenity_masks', '_amenity_bits',
+    '_vocab', '_codes', '_bitmaps', '_orders', '_built_at',
+)
+
+# createdAt of rows without one; sorts after everything when newest first
+_NO_TIME = np.iinfo(np.int64).min
+
+
+def _micros(value):
+    """Convert a naive datetime to microseconds since the epoch"""
+    if value is None:
+        return _NO_TIME
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _numeric_values(row):
+    """Values of the numeric columns of a property row"""
+    return {
+        'price': float(row.price),
+        'carpetArea': row.carpetArea,
+        'floorNumber': np.nan if row.floorNumber is None else row.floorNumber,
+        'typeId': row.typeId,
+        'locationId': row.locationId,
+        'createdAt': _micros(row.createdAt),
+    }
+
+
+class ListingIndex:
+    """
+    Flask extension keeping the active listings in NumPy column arrays.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.rebuild_interval = 300
+        self._lock = threading.RLock()
+        self._pending = set()
+        # Ids applied to the old arrays while a rebuild runs; replayed on the new ones
+        self._replay = set()
+        self._rebuilding = False
+        self._built_at = None
+        self._reset(0)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('LISTING_INDEX_REBUILD_INTERVAL', 300)
+        self.rebuild_interval = app.config['LISTING_INDEX_REBUILD_INTERVAL']
+        app.extensions['listing_index'] = self
+        property_changed.connect(self._on_property_changed, weak=False)
+
+    def _reset(self, capacity):
+        self._size = 0
+        self._slots = {}
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._numeric = {
+            'price': np.zeros(capacity, dtype=np.float64),
+            'carpetArea': np.zeros(capacity, dtype=np.float64),
+            'floorNumber': np.full(capacity, np.nan),
+            'typeId': np.zeros(capacity, dtype=np.int64),
+            'locationId': np.zeros(capacity, dtype=np.int64),
+            'createdAt': np.zeros(capacity, dtype=np.int64),
+        }
+        self._rera = np.zeros(capacity, dtype=bool)
+        self._amenity_masks = np.zeros(capacity, dtype=np.uint64)
+        self._amenity_bits = {}
+        # Code 0 stands for NULL in every enum column
+        self._vocab = {column: {None: 0} for _, column in ENUM_FILTERS}
+        self._codes = {column: np.zeros(capacity, dtype=np.int16) for _, column in ENUM_FILTERS}
+        self._bitmaps = {column: [np.zeros(capacity, dtype=bool)] for _, column in ENUM_FILTERS}
+        self._orders = {}
+
+    def _grow(self, needed):
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+
+        def grown(array, fill=0):
+            result = np.full(capacity, fill, dtype=array.dtype)
+            result[:len(array)] = array
+            return result
+
+        self._alive = grown(self._alive)
+        self._ids = grown(self._ids)
+        self._numeric = {name: grown(array, np.nan if name == 'floorNumber' else 0)
+                         for name, array in self._numeric.items()}
+        self._rera = grown(self._rera)
+        self._amenity_masks = grown(self._amenity_masks)
+        self._codes = {column: grown(codes) for column, codes in self._codes.items()}
+        self._bitmaps = {column: [grown(bitmap) for bitmap in bitmaps]
+                         for column, bitmaps in self._bitmaps.items()}
+
+    def _amenity_bit(self, amenity_id):
+        bit = self._amenity_bits.get(amenity_id)
+        if bit is None:
+            bit = self._amenity_bits[amenity_id] = len(self._amenity_bits)
+        return bit
+
+    def _amenity_mask(self, amenity_ids):
+        mask = 0
+        for amenity_id in amenity_ids:
+            bit = self._amenity_bit(amenity_id)
+            if bit < MAX_AMENITY_BITS:
+                mask |= 1 << bit
+        return mask
+
+    def _store(self, row, amenity_ids):
+        """Write one property into its slot, allocating a slot if needed"""
+        slot = self._slots.get(row.propertyId)
+        if slot is None:
+            slot = self._size
+            self._grow(slot + 1)
+            self._slots[row.propertyId] = slot
+            self._size += 1
+
+        self._alive[slot] = True
+        self._ids[slot] = row.propertyId
+        for name, value in _numeric_values(row).items():
+            self._numeric[name][slot] = value
+        self._rera[slot] = bool(row.reraRegistered)
+        self._amenity_masks[slot] = self._amenity_mask(amenity_ids)
+
+        for _, column in ENUM_FILTERS:
+            vocab, bitmaps = self._vocab[column], self._bitmaps[column]
+            code = vocab.get(getattr(row, column))
+            if code is None:
+                code = vocab[getattr(row, column)] = len(vocab)
+                bitmaps.append(np.zeros(len(self._ids), dtype=bool))
+            bitmaps[self._codes[column][slot]][slot] = False
+            bitmaps[code][slot] = True
+            self._codes[column][slot] = code
+
+    def _load(self, *conditions):
+        """Read active property rows, by propertyId, and their (propertyId, amenityId) pairs"""
+        rows = db.session.execute(
+            select(*_COLUMNS).where(Property.isActive == True, *conditions).order_by(Property.propertyId)
+        ).all()
+        amenity_rows = db.session.execute(
+            select(PropertyAmenity.propertyId, PropertyAmenity.amenityId)
+            .join(Property, Property.propertyId == PropertyAmenity.propertyId)
+            .where(Property.isActive == True, *conditions)
+        ).all()
+        return rows, amenity_rows
+
+    def build(self):
+        """
+        Rebuild the index from the Property table.
+
+        The rows are loaded into a fresh index, outside the lock, which is
+        then swapped in, so searches use the old arrays until it is ready.
+        """
+        rows, amenity_rows = self._load()
+        fresh = ListingIndex()
+        fresh._fill(rows, amenity_rows)
+        with self._lock:
+            for name in _STATE:
+                setattr(self, name, getattr(fresh, name))
+            self._pending |= self._replay
+            self._replay = set()
+
+    def _fill(self, rows, amenity_rows):
+        """
+        Fill an empty index from loaded rows.
+
+        Columns are filled whole rather than slot by slot, so a rebuild
+        costs little more than reading the rows.
+        """
+        n = len(rows)
+        self._reset(n)
+        self._size = n
+        self._alive[:] = True
+        self._ids[:] = [row.propertyId for row in rows]
+        self._slots = {property_id: slot for slot, property_id in enumerate(self._ids.tolist())}
+
+        values = [_numeric_values(row) for row in rows]
+        for name, array in self._numeric.items():
+            array[:] = [value[name] for value in values]
+        self._rera[:] = [bool(row.reraRegistered) for row in rows]
+
+        for _, column in ENUM_FILTERS:
+            vocab, codes = self._vocab[column], self._codes[column]
+            codes[:] = [vocab.setdefault(getattr(row, column), len(vocab)) for row in rows]
+            self._bitmaps[column] = [codes == code for code in range(len(vocab))]
+
+        if amenity_rows:
+            bits = np.array([self._amenity_bit(amenity_id) for _, amenity_id in amenity_rows],
+                            dtype=np.uint64)
+            slots = np.searchsorted(self._ids, [property_id for property_id, _ in amenity_rows])
+            usable = bits < MAX_AMENITY_BITS
+            np.bitwise_or.at(self._amenity_masks, slots[usable],
+                             np.left_shift(np.uint64(1), bits[usable]))
+
+        self._built_at = time.monotonic()
+
+    def _apply_pending(self):
+        with self._lock:
+            property_ids, self._pending = self._pending, set()
+            if self._rebuilding:
+                self._replay |= property_ids
+        if not property_ids:
+            return
+        rows, amenity_rows = self._load(Property.propertyId.in_(property_ids))
+        amenities = {}
+        for property_id, amenity_id in amenity_rows:
+            amenities.setdefault(property_id, []).append(amenity_id)
+        with self._lock:
+            for row in rows:
+                self._store(row, amenities.get(row.propertyId, ()))
+            for property_id in property_ids - {row.propertyId for row in rows}:
+                slot = self._slots.get(property_id)
+                if slot is not None:
+                    self._alive[slot] = False
+            self._orders = {}
+
+    def _ensure_fresh(self):
+        with self._lock:
+            built = self._built_at is not None
+            if built and not self._rebuilding and time.monotonic() - self._built_at > self.rebuild_interval:
+                self._rebuilding = True
+                app = current_app._get_current_object()
+                threading.Thread(target=self._rebuild_in_background, args=(app,), daemon=True).start()
+        if not built:
+            # Nothing to search yet: the first build runs in the request
+            self.build()
+        self._apply_pending()
+
+    def _rebuild_in_background(self, app):
+        try:
+            with app.app_context():
+                self.build()
+        except Exception as e:
+            app.logger.error(f"Error rebuilding the listing index: {str(e)}")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    def supports(self, criteria):
+        """
+        Check whether the index can answer a search.
+
+        Args:
+            criteria (SearchCriteria): Search criteria
+
+        Returns:
+            bool: False if the search needs SQL
+        """
+        if criteria.keyword or criteria.locality or criteria.near:
+            return False
+        if not criteria.active_only or criteria.sort not in INDEX_SORTS:
+            return False
+        if criteria.amenities and len(self._amenity_bits) > MAX_AMENITY_BITS:
+            return False
+        return True
+
+    def _order(self, sort):
+        order = self._orders.get(sort)
+        if order is None:
+            column, descending = INDEX_SORTS[sort]
+            values, ids = self._numeric[column][:self._size], self._ids[:self._size]
+            order = np.lexsort((-ids, -values) if descending else (ids, values))
+            self._orders[sort] = order
+        return order
+
+    def _location_ids(self, criteria):
+        locations = reference_data.locations()
+        selected = None
+        for pattern, fields in ((criteria.location, ('city', 'state')), (criteria.city, ('city',))):
+            if not pattern:
+                continue
+            pattern = pattern.lower()
+            ids = {loc.locationId for loc in locations
+                   if any(pattern in (getattr(loc, field) or '').lower() for field in fields)}
+            selected = ids if selected is None else selected & ids
+        return selected
+
+    def _mask(self, criteria):
+        c, n, numeric = criteria, self._size, self._numeric
+        mask = self._alive[:n].copy()
+
+        for value, column, compare in (
+            (c.min_price, 'price', np.greater_equal), (c.max_price, 'price', np.less_equal),
+            (c.min_area, 'carpetArea', np.greater_equal), (c.max_area, 'carpetArea', np.less_equal),
+            (c.min_floor, 'floorNumber', np.greater_equal), (c.max_floor, 'floorNumber', np.less_equal),
+        ):
+            if value is not None:
+                mask &= compare(numeric[column][:n], value)
+
+        if c.type_id is not None:
+            mask &= numeric['typeId'][:n] == c.type_id
+
+        for field, column in ENUM_FILTERS:
+            value = getattr(c, field)
+            if value:
+                code = self._vocab[column].get(value)
+                if code is None:
+                    return np.zeros(n, dtype=bool)
+                mask &= self._bitmaps[column][code][:n]
+
+        if c.amenities:
+            if any(amenity_id not in self._amenity_bits for amenity_id in c.amenities):
+                return np.zeros(n, dtype=bool)
+            required = np.uint64(self._amenity_mask(c.amenities))
+            mask &= (self._amenity_masks[:n] & required) == required
+
+        if c.rera_registered:
+            mask &= self._rera[:n]
+
+        location_ids = self._location_ids(c)
+        if location_ids is not None:
+            mask &= np.isin(numeric['locationId'][:n], list(location_ids))
+        return mask
+
+    def _seek(self, sort, value, property_id):
+        """Mask of the slots that come after a keyset position"""
+        column, descending = INDEX_SORTS[sort]
+        n = self._size
+        value = _micros(value) if column == 'createdAt' else float(value)
+        values, ids = self._numeric[column][:n], self._ids[:n]
+        if descending:
+            return (values < value) | ((values == value) & (ids < property_id))
+        return (values > value) | ((values == value) & (ids > property_id))
+
+    def _row(self, slot):
+        numeric = self._numeric
+        created = int(numeric['createdAt'][slot])
+        return IndexRow(
+            propertyId=int(self._ids[slot]),
+            createdAt=_EPOCH + created * _MICROSECOND if created != _NO_TIME else None,
+            price=Decimal(f"{numeric['price'][slot]:.2f}"),
+            carpetArea=int(numeric['carpetArea'][slot]),
+        )
+
+    def search(self, criteria, offset=0, limit=None, after=None):
+        """
+        Filter, sort and page the active listings in memory.
+
+        Args:
+            criteria (SearchCriteria): Criteria accepted by supports()
+            offset (int): Matches to skip
+            limit (int): Maximum number of ids to return, or None for all
+            after (tuple): (sort value, propertyId) keyset position to
+                continue after, as decoded from a cursor
+
+        Returns:
+            IndexResult: property_ids of the page in order, total number
+                of matches (ignoring offset and after) and IndexRow
+                cursor rows for the page
+        """
+        self._ensure_fresh()
+        with self._lock:
+            mask = self._mask(criteria)
+            total = int(np.count_nonzero(mask))
+            if after is not None:
+                mask &= self._seek(criteria.sort, *after)
+            order = self._order(criteria.sort)
+            slots = order[mask[order]]
+            slots = slots[offset:] if limit is None else slots[offset:offset + limit]
+            return IndexResult(
+                property_ids=[int(property_id) for property_id in self._ids[slots]],
+                total=total,
+                rows=[self._row(slot) for slot in slots],
+            )
+
+    def count(self, criteria):
+        """
+        Count the active listings matching a search.
+
+        Args:
+            criteria (SearchCriteria): Criteria accepted by supports()
+
+        Returns:
+            int: Number of matches
+        """
+        self._ensure_fresh()
+        with self._lock:
+            return int(np.count_nonzero(self._mask(criteria)))
+
+    def facet_counts(self, criteria):
+        """
+        Count the active listings matching a search per facet value.
+
+        Args:
+            criteria (SearchCriteria): Criteria accepted by supports()
+
+        Returns:
+            dict: total plus {facet name: {value: count}} for 'location',
+                  'type', each enum facet and 'amenities' (see facets.py)
+        """
+        self._ensure_fresh()
+        with self._lock:
+            mask = self._mask(criteria)
+            counts = {'total': int(np.count_nonzero(mask))}
+
+            for name, column in (('location', 'locationId'), ('type', 'typeId')):
+                values, value_counts = np.unique(self._numeric[column][:self._size][mask], return_counts=True)
+                counts[name] = dict(zip(values.tolist(), value_counts.tolist()))
+
+            for name, column in FACET_ENUMS:
+                code_counts = np.bincount(self._codes[column][:self._size][mask],
+                                          minlength=len(self._vocab[column]))
+                counts[name] = {value: int(code_counts[code])
+                                for value, code in self._vocab[column].items() if value is not None}
+
+            masks = self._amenity_masks[:self._size][mask]
+            counts['amenities'] = {
+                amenity_id: int(np.count_nonzero(masks & np.uint64(1 << bit)))
+                for amenity_id, bit in self._amenity_bits.items() if bit < MAX_AMENITY_BITS
+            }
+            return counts
+
+    def _on_property_changed(self, sender, property_id, **kwargs):
+        with self._lock:
+            self._pending.add(property_id)
+
+
+listing_index = ListingIndex()
@@ -0,0 +1,239 @@
+"""
+Shared listing query layer for the DreamHome Real Estate Portal.
+Builds property queries that load their related rows (type, location,
+images and amenities) in a fixed number of batched SELECTs, and serializes
+the loaded properties for the JSON APIs.
+
+A page of listings costs the same number of round trips whatever its size:
+one for the properties (with type and location joined in), one for their
+images and one for their amenities. The JSON serializers read type,
+location and amenity names from the reference data registry, so API
+queries can skip those joins with references=False.
+
+HTML listing cards read PropertySummary rows instead (see
+listing_summaries.py): one single-table query per page.
+"""
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import select
+from models import db, Property, PropertyAmenity, PropertySummary, Favorites
+from reference_data import reference_data
+from image_variants import variant_url
+
+
+def listing_load_options(references=True):
+    """
+    Loader options that eagerly fetch everything a listing card needs.
+
+    Many-to-one relations are joined into the main SELECT; collections are
+    loaded with one IN-batched SELECT each.
+
+    Args:
+        references (bool): Also load the type, location and amenity rows
+            that templates reach through relationships. Not needed by the
+            JSON serializers, which use the reference data registry.
+
+    Returns:
+        tuple: SQLAlchemy loader options for Query.options()
+    """
+    if not references:
+        return (
+            selectinload(Property.images),
+            selectinload(Property.amenities),
+        )
+    return (
+        joinedload(Property.property_type),
+        joinedload(Property.location),
+        selectinload(Property.images),
+        selectinload(Property.amenities).joinedload(PropertyAmenity.amenity),
+    )
+
+
+def detail_load_options():
+    """
+    Loader options for the property detail page.
+
+    Type, location and owner are joined into the main SELECT and amenities
+    are loaded with one more. Images are not loaded; the detail page reads
+    them from the image manifest (see image_manifest.py).
+
+    Returns:
+        tuple: SQLAlchemy loader options for Query.options()
+    """
+    return (
+        joinedload(Property.property_type),
+        joinedload(Property.location),
+        joinedload(Property.owner),
+        selectinload(Property.amenities).joinedload(PropertyAmenity.amenity),
+    )
+
+
+def with_listing_relations(query, references=True):
+    """
+    Apply the listing loader options to a Property query.
+
+    Args:
+        query: Property query to extend
+        references (bool): See listing_load_options()
+
+    Returns:
+        Query: The same query with eager loading configured
+    """
+    return query.options(*listing_load_options(references))
+
+
+def listing_query(*criteria, references=True):
+    """
+    Start a Property query with listing relations eagerly loaded.
+
+    Args:
+        *criteria: Optional filter expressions
+        references (bool): See listing_load_options()
+
+    Returns:
+        Query: Property query ready for further filtering or pagination
+    """
+    query = with_listing_relations(Property.query, references)
+    if criteria:
+        query = query.filter(*criteria)
+    return query
+
+
+def load_listings(property_ids, references=True):
+    """
+    Load properties by id with listing relations, keeping the given order.
+
+    Args:
+        property_ids (list): Property ids, e.g. a cached search result page
+        references (bool): See listing_load_options()
+
+    Returns:
+        list: Properties that still exist, in the order of property_ids
+    """
+    if not property_ids:
+        return []
+    query = listing_query(Property.propertyId.in_(property_ids), references=references)
+    by_id = {p.propertyId: p for p in query}
+    return [by_id[property_id] for property_id in property_ids if property_id in by_id]
+
+
+def load_summaries(property_ids):
+    """
+    Load listing card summaries by property id, keeping the given order.
+
+    Args:
+        property_ids (list): Property ids, e.g. a cached search result page
+
+    Returns:
+        list: PropertySummary rows that exist, in the order of property_ids
+    """
+    if not property_ids:
+        return []
+    by_id = {s.propertyId: s for s in PropertySummary.query.filter(PropertySummary.propertyId.in_(property_ids))}
+    return [by_id[property_id] for property_id in property_ids if property_id in by_id]
+
+
+def summary_query(*criteria):
+    """
+    Start a PropertySummary query for listing cards.
+
+    Args:
+        *criteria: Optional filter expressions on PropertySummary
+
+    Returns:
+        Query: Summary query, newest listings first
+    """
+    return PropertySummary.query.filter(*criteria) \
+        .order_by(PropertySummary.createdAt.desc(), PropertySummary.propertyId.desc())
+
+
+def favorite_summaries(user_id):
+    """
+    Load a user's favorite properties as listing card summaries.
+
+    Args:
+        user_id (int): ID of the user
+
+    Returns:
+        list: (addedAt, PropertySummary) rows, most recently added first
+    """
+    return db.session.execute(
+        select(Favorites.addedAt, PropertySummary)
+        .join(PropertySummary, PropertySummary.propertyId == Favorites.propertyId)
+        .where(Favorites.userId == user_id)
+        .order_by(Favorites.addedAt.desc())
+    ).all()
+
+
+def _amenity_name(amenity_id):
+    amenity = reference_data.amenity(amenity_id)
+    return amenity.name if amenity else None
+
+
+def serialize_listing(p):
+    """
+    Serialize a property for the search API.
+
+    Args:
+        p (Property): Property loaded through the listing query layer
+
+    Returns:
+        dict: JSON-serializable listing
+    """
+    location = reference_data.location(p.locationId)
+    return {
+        'id': p.propertyId,
+        'type': reference_data.property_type_name(p.typeId),
+        'category': p.propertyCategory,
+        'price': float(p.price),
+        'carpet_area': p.carpetArea,
+        'city': location.city if location else None,
+        'state': location.state if location else None,
+        'address': p.address,
+        'listing_type': p.listingType,
+        'furnishing': p.furnishingType,
+        'age': p.propertyAge,
+        'ownership': p.ownershipType,
+        'rera_registered': p.reraRegistered,
+        'maintenance_charge': float(p.maintenanceCharge) if p.maintenanceCharge else None,
+        'total_floors': p.totalFloors,
+        'floor_number': p.floorNumber,
+        'water_supply': p.waterSupply,
+        'facing': p.facing,
+        'overlooking': p.overlooking,
+        'power_backup': p.powerBackup,
+        'description': p.description,
+        'amenities': [{'id': pa.amenityId, 'name': _amenity_name(pa.amenityId)} for pa in p.amenities],
+        'created_at': p.createdAt.isoformat(),
+        'images': [img.imageURL for img in p.images],
+        'image_url': variant_url(p.images[0].imageURL, 'card') if p.images else None
+    }
+
+
+def serialize_map_marker(p, url, image_url=None):
+    """
+    Serialize a property as a map marker.
+
+    Args:
+        p: Property, or a row with the same column names
+        url (str): Link to the property's detail page
+        image_url (str): First image of the property, if any; served as its thumbnail
+
+    Returns:
+        dict: JSON-serializable marker
+    """
+    type_name = reference_data.property_type_name(p.typeId)
+    location = reference_data.location(p.locationId)
+    return {
+        'id': p.propertyId,
+        'lat': p.latitude,
+        'lng': p.longitude,
+        'title': f"{type_name} in {location.city if location else ''}",
+        'price': float(p.price),
+        'address': p.address,
+        'area': p.carpetArea,
+        'type': type_name,
+        'category': p.propertyCategory,
+        'listing_type': p.listingType,
+        'image': variant_url(image_url, 'thumb'),
+        'url': url
+    }
@@ -0,0 +1,201 @@
+"""
+Listing summaries for the DreamHome Real Estate Portal.
+Maintains PropertySummary, a read model with one row per property holding
+everything a listing card shows: the card columns of Property plus the
+property type name, city, state, primary image URL and amenity ids.
+Listing cards on the home page, the listings page, dashboards and
+favorites read it with a single-table, indexed query.
+
+Summaries are written in the same transaction as the change they reflect:
+an after_flush listener recomputes the rows of every property that was
+added, edited or deleted, or whose images or amenities changed, in that
+flush. Bulk UPDATE and DELETE statements on those tables (e.g.
+Query.delete()) refresh the properties they match the same way. This
+covers add/edit/delete, image uploads and deletes, amenity edits and admin
+changes alike, whichever route made them.
+
+Type and location names are refreshed in place when reference_data_changed
+is sent, for the types and locations whose names changed. Amenity names are read from the reference data registry at
+render time, so renaming an amenity needs no rewrite.
+
+Usage:
+    flask rebuild-listing-summaries    # recompute every row
+"""
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.orm import Session
+from models import (db, Property, PropertyType, IndianLocation, PropertyImages,
+                    PropertyAmenity, PropertySummary)
+from signals import reference_data_changed
+
+# Properties recomputed per statement batch during a rebuild
+REBUILD_BATCH_SIZE = 1000
+
+# Tables whose rows feed the summaries, all keyed by propertyId
+SOURCES = (Property, PropertyImages, PropertyAmenity)
+
+# Columns copied unchanged from Property
+CARD_COLUMNS = (
+    'ownerId', 'isActive', 'createdAt', 'price', 'carpetArea', 'listingType',
+    'propertyCategory', 'furnishingType', 'propertyAge', 'facing', 'waterSupply',
+    'maintenanceCharge', 'reraRegistered', 'typeId', 'locationId',
+)
+
+
+def image_src(image_url):
+    """
+    Turn a stored image URL into a path the browser can load.
+
+    Args:
+        image_url (str): PropertyImages.imageURL, e.g. '/static/images/...'
+            or a legacy 'images/...' path relative to static
+
+    Returns:
+        str: URL path, or None without an image
+    """
+    if not image_url:
+        return None
+    if image_url.startswith(('/', 'http://', 'https://')):
+        return image_url
+    return '/static/' + image_url
+
+
+def summary_rows(conn, property_ids):
+    """
+    Compute the summary rows of some properties.
+
+    Args:
+        conn: SQLAlchemy connection
+        property_ids (list): Ids of the properties
+
+    Returns:
+        list: Dicts of PropertySummary column values, one per existing property
+    """
+    table = Property.__table__
+    rows = conn.execute(
+        select(table.c.propertyId, *(table.c[name] for name in CARD_COLUMNS),
+               PropertyType.typeName, IndianLocation.city, IndianLocation.state)
+        .select_from(table)
+        .outerjoin(PropertyType, PropertyType.typeId == table.c.typeId)
+        .outerjoin(IndianLocation, IndianLocation.locationId == table.c.locationId)
+        .where(table.c.propertyId.in_(property_ids))
+    ).mappings().all()
+
+    # The primary image, else the first one uploaded
+    images = {}
+    for property_id, image_url in conn.execute(
+        select(PropertyImages.propertyId, PropertyImages.imageURL)
+        .where(PropertyImages.propertyId.in_(property_ids))
+        .order_by(PropertyImages.propertyId, PropertyImages.isPrimary.desc(), PropertyImages.imageId)
+    ):
+        images.setdefault(property_id, image_url)
+
+    amenities = {}
+    for property_id, amenity_id in conn.execute(
+        select(PropertyAmenity.propertyId, PropertyAmenity.amenityId)
+        .where(PropertyAmenity.propertyId.in_(property_ids))
+        .order_by(PropertyAmenity.propertyId, PropertyAmenity.amenityId)
+    ):
+        amenities.setdefault(property_id, []).append(str(amenity_id))
+
+    return [
+        dict(row,
+             imageURL=image_src(images.get(row['propertyId'])),
+             amenityIds=','.join(amenities.get(row['propertyId'], ())))
+        for row in rows
+    ]
+
+
+def refresh_summaries(conn, property_ids):
+    """
+    Recompute the summary rows of some properties.
+
+    Rows of properties that no longer exist are removed.
+
+    Args:
+        conn: SQLAlchemy connection inside the writing transaction
+        property_ids (iterable): Ids of the changed properties
+    """
+    property_ids = list(property_ids)
+    rows = summary_rows(conn, property_ids)
+    summaries = PropertySummary.__table__
+    conn.execute(delete(summaries).where(summaries.c.propertyId.in_(property_ids)))
+    if rows:
+        conn.execute(insert(summaries), rows)
+
+
+def rebuild_summaries(conn):
+    """
+    Recompute every summary row from the source tables.
+
+    Args:
+        conn: SQLAlchemy connection inside a transaction
+
+    Returns:
+        int: Number of properties summarized
+    """
+    conn.execute(delete(PropertySummary.__table__))
+    property_ids = conn.execute(select(Property.propertyId).order_by(Property.propertyId)).scalars().all()
+    for start in range(0, len(property_ids), REBUILD_BATCH_SIZE):
+        refresh_summaries(conn, property_ids[start:start + REBUILD_BATCH_SIZE])
+    return len(property_ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_flushed(session, flush_context):
+    """Rewrite the summaries of the properties changed by a flush"""
+    property_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, SOURCES) and obj.propertyId is not None:
+            property_ids.add(obj.propertyId)
+    if property_ids:
+        refresh_summaries(session.connection(), property_ids)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _refresh_bulk_changed(orm_execute_state):
+    """Rewrite the summaries of the properties matched by a bulk UPDATE or DELETE"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in SOURCES:
+        return None
+
+    # The matched rows are gone after a DELETE, so find them first
+    affected = select(mapper.class_.propertyId).distinct()
+    if orm_execute_state.statement.whereclause is not None:
+        affected = affected.where(orm_execute_state.statement.whereclause)
+    session = orm_execute_state.session
+    property_ids = session.execute(affected).scalars().all()
+
+    result = orm_execute_state.invoke_statement()
+    if property_ids:
+        refresh_summaries(session.connection(), property_ids)
+    return result
+
+
+@reference_data_changed.connect
+def _rename_references(sender, **kwargs):
+    """
+    Copy edited property type and location names into the summaries.
+
+    The names the summaries hold are compared with the reference tables, and
+    only the rows of types and locations whose names differ are rewritten.
+    This runs in the sender's session; the sender commits.
+    """
+    summaries = PropertySummary.__table__
+    session = db.session
+
+    type_names = dict(session.execute(select(PropertyType.typeId, PropertyType.typeName)).all())
+    held = session.execute(select(summaries.c.typeId, summaries.c.typeName).distinct()).all()
+    for type_id in {type_id for type_id, name in held if type_names.get(type_id) != name}:
+        session.execute(update(summaries).where(summaries.c.typeId == type_id)
+                        .values(typeName=type_names.get(type_id)))
+
+    places = {location_id: (city, state) for location_id, city, state in session.execute(
+        select(IndianLocation.locationId, IndianLocation.city, IndianLocation.state))}
+    held = session.execute(select(summaries.c.locationId, summaries.c.city, summaries.c.state).distinct()).all()
+    for location_id in {location_id for location_id, city, state in held
+                        if places.get(location_id, (None, None)) != (city, state)}:
+        city, state = places.get(location_id, (None, None))
+        session.execute(update(summaries).where(summaries.c.locationId == location_id)
+                        .values(city=city, state=state))
@@ -0,0 +1,214 @@
+"""
+Viewport map search for the DreamHome Real Estate Portal.
+Answers map requests for one bounding box and zoom level, reading only the
+properties inside the viewport through the (isActive, latitude, longitude)
+index.
+
+- Below MAP_CLUSTER_MAX_ZOOM, properties are grouped into grid cells in
+  SQL (GROUP BY cell) and returned as clusters with a count, centroid and
+  price range.
+- From MAP_CLUSTER_MAX_ZOOM up, individual markers are returned, unless
+  the viewport holds more than MAP_MAX_MARKERS properties, in which case
+  it is clustered as well.
+
+Either way a response holds at most MAP_MAX_MARKERS markers or
+MAP_MAX_CLUSTERS clusters.
+"""
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy import Integer, cast, func, select
+from models import db, Property, PropertyImages
+from search_engine import build_filters
+
+# Grid cells per 256px map tile side, i.e. one cell is about 64px on screen
+CELLS_PER_TILE = 4
+
+MAX_ZOOM = 22
+
+Viewport = namedtuple('Viewport', ['west', 'south', 'east', 'north', 'zoom'])
+
+
+class InvalidViewport(ValueError):
+    """Raised when a bounding box or zoom level is missing or out of range"""
+
+
+def parse_viewport(args):
+    """
+    Parse the viewport of a map request.
+
+    Args:
+        args: Request args with bbox=west,south,east,north (as produced by
+            Leaflet's getBounds().toBBoxString()) and zoom
+
+    Returns:
+        Viewport: Parsed viewport
+
+    Raises:
+        InvalidViewport: If bbox or zoom is malformed
+    """
+    try:
+        west, south, east, north = (float(value) for value in args.get('bbox', '').split(','))
+        zoom = int(args.get('zoom', ''))
+    except ValueError:
+        raise InvalidViewport('bbox=west,south,east,north and zoom are required')
+
+    if not (-90 <= south <= north <= 90):
+        raise InvalidViewport('Latitudes must satisfy -90 <= south <= north <= 90')
+    # Leaflet reports longitudes past +/-180 when the map wraps; clamp them
+    west, east = max(west, -180.0), min(east, 180.0)
+    if west > east:
+        raise InvalidViewport('west must not be greater than east')
+    if not 0 <= zoom <= MAX_ZOOM:
+        raise InvalidViewport(f'zoom must be between 0 and {MAX_ZOOM}')
+    return Viewport(west, south, east, north, zoom)
+
+
+def viewport_filters(viewport, criteria):
+    """
+    Build the filters selecting the properties inside a viewport.
+
+    Args:
+        viewport (Viewport): Map viewport
+        criteria (SearchCriteria): Additional search filters
+
+    Returns:
+        list: SQLAlchemy boolean expressions
+    """
+    return build_filters(criteria) + [
+        Property.latitude.between(viewport.south, viewport.north),
+        Property.longitude.between(viewport.west, viewport.east),
+    ]
+
+
+def cell_size(zoom):
+    """
+    Get the grid cell size used for clustering at a zoom level.
+
+    Args:
+        zoom (int): Map zoom level
+
+    Returns:
+        float: Cell side in degrees
+    """
+    return 360.0 / (2 ** zoom) / CELLS_PER_TILE
+
+
+def _cell_index(column, offset, size):
+    # Offsetting makes every value non-negative, so truncation is floor()
+    value = (column + offset) / size
+    if db.engine.dialect.name == 'sqlite':
+        return cast(value, Integer)
+    return func.floor(value)
+
+
+def cluster_properties(viewport, criteria, limit):
+    """
+    Group the properties inside a viewport into grid cells.
+
+    Args:
+        viewport (Viewport): Map viewport
+        criteria (SearchCriteria): Additional search filters
+        limit (int): Maximum number of clusters; the largest are kept
+
+    Returns:
+        tuple: (list of cluster dicts, True if clusters were left out)
+    """
+    size = cell_size(viewport.zoom)
+    cell_lat = _cell_index(Property.latitude, 90, size).label('cell_lat')
+    cell_lng = _cell_index(Property.longitude, 180, size).label('cell_lng')
+    count = func.count().label('count')
+
+    rows = db.session.execute(
+        select(
+            cell_lat, cell_lng, count,
+            func.avg(Property.latitude).label('lat'),
+            func.avg(Property.longitude).label('lng'),
+            func.min(Property.price).label('min_price'),
+            func.max(Property.price).label('max_price'),
+            func.min(Property.propertyId).label('property_id'),
+        )
+        .where(*viewport_filters(viewport, criteria))
+        .group_by(cell_lat, cell_lng)
+        .order_by(count.desc())
+        .limit(limit + 1)
+    ).all()
+
+    clusters = [{
+        'lat': float(row.lat),
+        'lng': float(row.lng),
+        'count': row.count,
+        'min_price': float(row.min_price),
+        'max_price': float(row.max_price),
+        # A single-property cluster can link straight to its listing
+        'id': row.property_id if row.count == 1 else None,
+    } for row in rows[:limit]]
+    return clusters, len(rows) > limit
+
+
+def marker_rows(viewport, criteria, limit):
+    """
+    Load the marker columns of the properties inside a viewport.
+
+    The first image of each property is read with a correlated subquery,
+    so no relationships are loaded.
+
+    Args:
+        viewport (Viewport): Map viewport
+        criteria (SearchCriteria): Additional search filters
+        limit (int): Maximum number of rows
+
+    Returns:
+        list: Rows with the columns serialize_map_marker() reads plus image_url
+    """
+    first_image = (
+        select(PropertyImages.imageURL)
+        .where(PropertyImages.propertyId == Property.propertyId)
+        .order_by(PropertyImages.imageId)
+        .limit(1)
+        .scalar_subquery()
+    )
+    return db.session.execute(
+        select(
+            Property.propertyId, Property.latitude, Property.longitude, Property.price,
+            Property.address, Property.carpetArea, Property.typeId, Property.locationId,
+            Property.propertyCategory, Property.listingType, first_image.label('image_url'),
+        )
+        .where(*viewport_filters(viewport, criteria))
+        .order_by(Property.propertyId)
+        .limit(limit)
+    ).all()
+
+
+def map_contents(viewport, criteria, serialize_marker):
+    """
+    Get the map contents of a viewport: clusters or individual markers.
+
+    Args:
+        viewport (Viewport): Map viewport
+        criteria (SearchCriteria): Additional search filters
+        serialize_marker (callable): Turns a marker row into a dict
+
+    Returns:
+        dict: {'mode': 'clusters' or 'markers', 'zoom', 'clusters' or
+              'markers', 'truncated'}
+    """
+    max_markers = current_app.config['MAP_MAX_MARKERS']
+    max_clusters = current_app.config['MAP_MAX_CLUSTERS']
+
+    if viewport.zoom >= current_app.config['MAP_CLUSTER_MAX_ZOOM']:
+        rows = marker_rows(viewport, criteria, max_markers + 1)
+        if len(rows) <= max_markers:
+            return {
+                'mode': 'markers',
+                'zoom': viewport.zoom,
+                'markers': [serialize_marker(row) for row in rows],
+                'truncated': False,
+            }
+
+    clusters, truncated = cluster_properties(viewport, criteria, max_clusters)
+    return {
+        'mode': 'clusters',
+        'zoom': viewport.zoom,
+        'clusters': clusters,
+        'truncated': truncated,
+    }
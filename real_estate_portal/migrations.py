@@ -0,0 +1,360 @@
+"""
+Schema migrations for the DreamHome Real Estate Portal.
+Applies schema changes that db.create_all() cannot make to an existing
+database, such as new columns and indexes on populated tables. Migrations
+run in order, once each, and are recorded in the SchemaMigrations table.
+Every migration checks what already exists, so a database created from the
+current models can be upgraded safely.
+
+The application itself never touches the schema at import or startup;
+run these commands once per deploy instead.
+
+Usage:
+    flask db init           # create tables, apply migrations, seed reference data
+    flask db upgrade        # apply pending migrations
+    flask db status         # list applied and pending migrations
+    flask db check-plans    # EXPLAIN the hot listing queries
+"""
+import sys
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import bindparam, inspect, select, text
+from geohash import encode as encode_geohash
+from models import (db, Blob, ChangeCounter, Property, PropertyAmenity, PropertyImages, PropertySummary, User,
+                    UserDocument, UserRole, Amenity, Roles, SchemaMigration)
+from listing_summaries import rebuild_summaries
+from signals import reference_data_changed
+from text_search import create_text_index
+
+MIGRATIONS = []
+
+# Columns added to Users after the first release
+USER_SECURITY_COLUMNS = (
+    'loginAttempts', 'lastLoginAttempt', 'lastPasswordChange',
+    'passwordResetToken', 'passwordResetExpires', 'lastLogin',
+    'lastLoginIP', 'twoFactorEnabled', 'twoFactorSecret',
+)
+
+# Composite indexes backing the listing filters and sorts (see Property.__table_args__)
+LISTING_INDEXES = (
+    'ix_property_active_created',
+    'ix_property_active_price',
+    'ix_property_active_area',
+    'ix_property_active_listing_category',
+    'ix_property_active_furnishing',
+    'ix_property_location_active_price',
+)
+
+# Bounding box index for the map API (see map_clusters.py)
+MAP_INDEXES = ('ix_property_active_lat_lng',)
+
+# Geohash cell index for radius searches (see geo_search.py)
+GEO_INDEXES = ('ix_property_active_geohash',)
+
+# Amenity lookup index for amenity filters (see search_engine.py)
+AMENITY_INDEXES = ('ix_property_amenity_amenity',)
+
+# Image variant metadata (see image_variants.py)
+IMAGE_VARIANT_COLUMNS = ('width', 'height', 'variants')
+
+# Content hashes naming the blob of an image or document (see blob_store.py)
+BLOB_REFERENCE_COLUMNS = ((PropertyImages, 'contentHash'), (UserDocument, 'content_hash'))
+
+# Rows per UPDATE batch when backfilling derived columns
+BACKFILL_BATCH_SIZE = 1000
+
+# Change version index backing the HTTP validators (see conditional.py)
+CHANGE_VERSION_INDEXES = ('ix_property_updated',)
+
+db_cli = AppGroup('db', help='Database schema management commands.')
+
+
+def migration(migration_id):
+    """
+    Register a migration function.
+
+    Args:
+        migration_id (str): Unique, sortable migration name
+
+    Returns:
+        function: Decorator taking a function of one connection argument
+    """
+    def decorator(func):
+        MIGRATIONS.append((migration_id, func))
+        return func
+    return decorator
+
+
+def create_missing_indexes(conn, table, names):
+    """
+    Create the named indexes of a table that the database does not have yet.
+
+    Args:
+        conn: SQLAlchemy connection inside a transaction
+        table (Table): Table whose declared indexes to create
+        names (iterable): Index names to consider
+
+    Returns:
+        list: Names of the indexes that were created
+    """
+    existing = {index['name'] for index in inspect(conn).get_indexes(table.name)}
+    created = []
+    for index in sorted(table.indexes, key=lambda ix: ix.name):
+        if index.name in names and index.name not in existing:
+            index.create(conn)
+            created.append(index.name)
+    return created
+
+
+def add_missing_columns(conn, table, names):
+    """
+    Add the named columns of a table that the database does not have yet.
+
+    The existing columns are read with a single introspection query.
+
+    Args:
+        conn: SQLAlchemy connection inside a transaction
+        table (Table): Table whose declared columns to add
+        names (iterable): Column names to consider
+
+    Returns:
+        list: Names of the columns that were added
+    """
+    existing = {column['name'] for column in inspect(conn).get_columns(table.name)}
+    preparer = conn.dialect.identifier_preparer
+    added = []
+    for name in names:
+        if name in existing:
+            continue
+        column = table.columns[name]
+        column_type = column.type.compile(dialect=conn.dialect)
+        conn.execute(text(
+            f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {column_type}'
+        ))
+        added.append(name)
+    return added
+
+
+@migration('0000_user_security_columns')
+def _user_security_columns(conn):
+    added = add_missing_columns(conn, User.__table__, USER_SECURITY_COLUMNS)
+    if added:
+        current_app.logger.info(f"Added security columns to the Users table: {', '.join(added)}")
+
+
+@migration('0001_property_text_index')
+def _property_text_index(conn):
+    create_text_index(conn)
+
+
+@migration('0002_property_listing_indexes')
+def _property_listing_indexes(conn):
+    create_missing_indexes(conn, Property.__table__, LISTING_INDEXES)
+
+
+@migration('0003_property_updated_at')
+def _property_updated_at(conn):
+    if add_missing_columns(conn, Property.__table__, ('updatedAt',)):
+        # Existing listings count as last changed when they were created
+        table = Property.__table__
+        conn.execute(table.update().where(table.c.updatedAt.is_(None)).values(updatedAt=table.c.createdAt))
+    create_missing_indexes(conn, Property.__table__, CHANGE_VERSION_INDEXES)
+
+
+@migration('0004_property_map_index')
+def _property_map_index(conn):
+    create_missing_indexes(conn, Property.__table__, MAP_INDEXES)
+
+
+@migration('0005_property_geohash')
+def _property_geohash(conn):
+    add_missing_columns(conn, Property.__table__, ('geohash',))
+    table = Property.__table__
+    rows = conn.execute(
+        select(table.c.propertyId, table.c.latitude, table.c.longitude)
+        .where(table.c.geohash.is_(None), table.c.latitude.isnot(None), table.c.longitude.isnot(None))
+    ).all()
+    statement = table.update().where(table.c.propertyId == bindparam('property_id')) \
+        .values(geohash=bindparam('cell'))
+    for start in range(0, len(rows), BACKFILL_BATCH_SIZE):
+        conn.execute(statement, [
+            {'property_id': row.propertyId, 'cell': encode_geohash(row.latitude, row.longitude)}
+            for row in rows[start:start + BACKFILL_BATCH_SIZE]
+        ])
+    create_missing_indexes(conn, table, GEO_INDEXES)
+
+
+@migration('0006_property_amenity_index')
+def _property_amenity_index(conn):
+    create_missing_indexes(conn, PropertyAmenity.__table__, AMENITY_INDEXES)
+
+
+@migration('0007_property_summary')
+def _property_summary(conn):
+    PropertySummary.__table__.create(conn, checkfirst=True)
+    count = rebuild_summaries(conn)
+    current_app.logger.info(f"Built listing summaries for {count} properties")
+
+
+@migration('0008_property_image_variants')
+def _property_image_variants(conn):
+    add_missing_columns(conn, PropertyImages.__table__, IMAGE_VARIANT_COLUMNS)
+
+
+@migration('0009_blob_store')
+def _blob_store(conn):
+    Blob.__table__.create(conn, checkfirst=True)
+    for model, column in BLOB_REFERENCE_COLUMNS:
+        add_missing_columns(conn, model.__table__, (column,))
+
+
+@migration('0010_change_counters')
+def _change_counters(conn):
+    ChangeCounter.__table__.create(conn, checkfirst=True)
+
+
+def applied_migrations():
+    """
+    Get the ids of the migrations already applied to the database.
+
+    Returns:
+        set: Applied migration ids
+    """
+    SchemaMigration.__table__.create(db.engine, checkfirst=True)
+    with db.engine.connect() as conn:
+        return set(conn.execute(select(SchemaMigration.migrationId)).scalars())
+
+
+def upgrade():
+    """
+    Apply every pending migration, each in its own transaction.
+
+    Returns:
+        list: Ids of the migrations that were applied
+    """
+    done = applied_migrations()
+    applied = []
+    for migration_id, func in MIGRATIONS:
+        if migration_id in done:
+            continue
+        with db.engine.begin() as conn:
+            func(conn)
+            conn.execute(SchemaMigration.__table__.insert().values(migrationId=migration_id))
+        applied.append(migration_id)
+    return applied
+
+
+# Rows the application expects to exist
+DEFAULT_AMENITIES = (
+    {'amenityId': 1, 'name': 'Swimming Pool', 'description': 'Swimming pool facility'},
+    {'amenityId': 2, 'name': 'Gym', 'description': 'Modern fitness center'},
+    {'amenityId': 3, 'name': 'Garden', 'description': 'Landscaped garden area'},
+    {'amenityId': 4, 'name': 'Parking', 'description': 'Reserved parking space'},
+    {'amenityId': 5, 'name': 'Security', 'description': '24/7 security service'},
+    {'amenityId': 6, 'name': 'Playground', 'description': 'Children\'s playground'},
+)
+
+DEFAULT_ROLES = (
+    {'roleId': Roles.ADMIN, 'roleName': 'Admin'},
+    {'roleId': Roles.AGENT, 'roleName': 'Agent'},
+    {'roleId': Roles.BUYER, 'roleName': 'Buyer'},
+    {'roleId': Roles.SELLER, 'roleName': 'Seller'},
+)
+
+
+def _seed_missing(model, key, rows):
+    """Insert the rows whose primary key is not in the table yet, with one lookup"""
+    column = getattr(model, key)
+    existing = set(db.session.execute(
+        select(column).where(column.in_([row[key] for row in rows]))
+    ).scalars())
+    missing = [row for row in rows if row[key] not in existing]
+    for row in missing:
+        db.session.add(model(**row))
+    return len(missing)
+
+
+def seed_reference_data():
+    """
+    Create the default amenities, roles and admin account if missing.
+
+    Returns:
+        int: Number of rows added
+    """
+    added = _seed_missing(Amenity, 'amenityId', DEFAULT_AMENITIES)
+    added += _seed_missing(UserRole, 'roleId', DEFAULT_ROLES)
+
+    if not db.session.execute(select(User.userId).filter_by(email='admin@realestate.com')).first():
+        admin = User(
+            username='admin',
+            email='admin@realestate.com',
+            mobile='9999999999',
+            roleId=Roles.ADMIN
+        )
+        admin.set_password('admin123')
+        db.session.add(admin)
+        added += 1
+
+    db.session.commit()
+    if added:
+        reference_data_changed.send(current_app._get_current_object())
+        db.session.commit()
+    return added
+
+
+def init_database():
+    """
+    Bring a database, new or existing, up to the current schema and seed it.
+
+    Returns:
+        list: Ids of the migrations that were applied
+    """
+    db.create_all()
+    applied = upgrade()
+    seed_reference_data()
+    return applied
+
+
+@db_cli.command('init')
+def init_command():
+    """Create tables, apply migrations and seed reference data"""
+    for migration_id in init_database():
+        print(f"Applied {migration_id}")
+    print("Database initialized")
+
+
+@db_cli.command('upgrade')
+def upgrade_command():
+    """Apply pending schema migrations"""
+    applied = upgrade()
+    for migration_id in applied:
+        print(f"Applied {migration_id}")
+    if not applied:
+        print("Database is up to date")
+
+
+@db_cli.command('status')
+def status_command():
+    """List applied and pending schema migrations"""
+    done = applied_migrations()
+    for migration_id, _ in MIGRATIONS:
+        print(f"[{'x' if migration_id in done else ' '}] {migration_id}")
+
+
+@db_cli.command('check-plans')
+@click.option('--verbose', is_flag=True, help='Print the full plan of every query.')
+def check_plans_command(verbose):
+    """EXPLAIN the hot listing queries and fail on full table scans"""
+    from query_plans import check_query_plans
+
+    failures = 0
+    for result in check_query_plans():
+        status = 'FULL SCAN' if result.full_scan else 'ok'
+        print(f"{status:9} {result.name}")
+        if verbose or result.full_scan:
+            for line in result.plan:
+                print(f"          {line}")
+        failures += result.full_scan
+    if failures:
+        sys.exit(1)
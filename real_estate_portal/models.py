@@ -17,6 +17,10 @@ from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from datetime import datetime
+from sqlalchemy import event, select, update
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Session
+from geohash import PRECISION as GEOHASH_PRECISION, encode as encode_geohash
 
 # Initialize SQLAlchemy instance
 db = SQLAlchemy()
@@ -91,6 +95,10 @@ class IndianLocation(db.Model):
 
 class PropertyAmenity(db.Model):
     __tablename__ = 'PropertyAmenities'
+    __table_args__ = (
+        # Amenity filters: properties having given amenities (see search_engine.py)
+        db.Index('ix_property_amenity_amenity', 'amenityId', 'propertyId'),
+    )
     propertyId = db.Column(db.Integer, db.ForeignKey('Property.propertyId'), primary_key=True)
     amenityId = db.Column(db.Integer, db.ForeignKey('Amenities.amenityId'), primary_key=True)
     
@@ -105,6 +113,25 @@ class Amenity(db.Model):
 
 class Property(db.Model):
     __tablename__ = 'Property'
+    __table_args__ = (
+        # Keyword search index; SQLite uses the FTS5 table from text_search.py instead
+        db.Index('ft_property_text', 'address', 'description', 'overlooking',
+                 mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+        # Listing indexes: every public listing filters on isActive, then sorts or
+        # narrows by one of these columns (applied to existing databases by migrations.py)
+        db.Index('ix_property_active_created', 'isActive', 'createdAt'),
+        db.Index('ix_property_active_price', 'isActive', 'price'),
+        db.Index('ix_property_active_area', 'isActive', 'carpetArea'),
+        db.Index('ix_property_active_listing_category', 'isActive', 'listingType', 'propertyCategory'),
+        db.Index('ix_property_active_furnishing', 'isActive', 'furnishingType'),
+        db.Index('ix_property_location_active_price', 'locationId', 'isActive', 'price'),
+        # Map viewport queries: active properties inside a latitude/longitude box
+        db.Index('ix_property_active_lat_lng', 'isActive', 'latitude', 'longitude'),
+        # Radius search candidates: active properties by geohash cell prefix (see geo_search.py)
+        db.Index('ix_property_active_geohash', 'isActive', 'geohash'),
+        # Change version for HTTP validators: MAX(updatedAt) (see conditional.py)
+        db.Index('ix_property_updated', 'updatedAt'),
+    )
     propertyId = db.Column(db.Integer, primary_key=True, autoincrement=True)
     address = db.Column(db.Text, nullable=False)
     ownerId = db.Column(db.Integer, db.ForeignKey('Users.userId'), nullable=False)
@@ -122,6 +149,8 @@ class Property(db.Model):
     propertyCategory = db.Column(db.Enum('Residential', 'Commercial', 'Agricultural'), default='Residential')
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
+    # Derived from latitude/longitude on every insert and update (see _set_geohash)
+    geohash = db.Column(db.String(GEOHASH_PRECISION), nullable=True)
     maintenanceCharge = db.Column(db.Numeric(10, 2), nullable=True)
     totalFloors = db.Column(db.Integer, nullable=True)
     floorNumber = db.Column(db.Integer, nullable=True)
@@ -131,6 +160,10 @@ class Property(db.Model):
     powerBackup = db.Column(db.Enum('None', 'Partial', 'Full'), default='None')
     description = db.Column(db.Text, nullable=True)
     isFeatured = db.Column(db.Boolean, default=False)
+    # Set on every change to the property, its images or its amenities; microsecond
+    # precision so that two edits in the same second still differ
+    updatedAt = db.Column(db.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql'),
+                          default=datetime.utcnow, onupdate=datetime.utcnow)
     
     owner = db.relationship('User', backref='properties')
     property_type = db.relationship('PropertyType', backref='properties')
@@ -143,18 +176,24 @@ class Property(db.Model):
                            cascade='all, delete-orphan',
                            order_by='PropertyImages.imageId')
     
-    # Add relationship to amenities
-    amenities = db.relationship('PropertyAmenity', backref='property', lazy='dynamic')
+    # Add relationship to amenities (list-based so it can be eager loaded)
+    amenities = db.relationship('PropertyAmenity', backref='property', lazy='select')
     
     def to_dict(self):
-        amenities_list = [{'name': pa.amenity.name, 'description': pa.amenity.description} 
-                         for pa in self.amenities]
+        # Names come from the in-memory reference data rather than joined rows
+        from reference_data import reference_data
+        amenities_list = []
+        for pa in self.amenities:
+            amenity = reference_data.amenity(pa.amenityId)
+            amenities_list.append({'name': amenity.name if amenity else None,
+                                   'description': amenity.description if amenity else None})
+        location = reference_data.location(self.locationId)
         return {
             'id': self.propertyId,
-            'type': self.property_type.typeName,
+            'type': reference_data.property_type_name(self.typeId),
             'price': float(self.price),
-            'city': self.location.city,
-            'state': self.location.state,
+            'city': location.city if location else None,
+            'state': location.state if location else None,
             'area': self.carpetArea,
             'furnishing': self.furnishingType,
             'age': self.propertyAge,
@@ -173,16 +212,72 @@ class PropertyImages(db.Model):
     propertyId = db.Column(db.Integer, db.ForeignKey('Property.propertyId'), nullable=False)
     imageURL = db.Column(db.String(255), nullable=False)
     isPrimary = db.Column(db.Boolean, default=False)
+    # Size of the full variant, and per variant its size and WebP/JPEG byte
+    # sizes (see image_variants.py); NULL for images stored before variants
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    variants = db.Column(db.JSON)
+    # SHA-256 of the uploaded file, naming its blob (see blob_store.py); NULL
+    # for images stored before the blob store
+    contentHash = db.Column(db.String(64))
     
     # Use back_populates for the relationship
     property_rel = db.relationship('Property', back_populates='images')
 
+
+@event.listens_for(Property, 'before_insert')
+@event.listens_for(Property, 'before_update')
+def _set_geohash(mapper, connection, target):
+    """Keep Property.geohash in step with the property's coordinates"""
+    if target.latitude is None or target.longitude is None:
+        target.geohash = None
+    else:
+        target.geohash = encode_geohash(target.latitude, target.longitude)
+
+
+def _touch(connection, property_ids):
+    connection.execute(
+        update(Property.__table__)
+        .where(Property.__table__.c.propertyId.in_(property_ids))
+        .values(updatedAt=datetime.utcnow())
+    )
+
+
+@event.listens_for(Session, 'after_flush')
+def _touch_properties(session, flush_context):
+    """Bump Property.updatedAt when a property's images or amenities change"""
+    property_ids = {
+        obj.propertyId
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, (PropertyImages, PropertyAmenity)) and obj.propertyId is not None
+    }
+    if property_ids:
+        _touch(session.connection(), property_ids)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _touch_bulk_changed(orm_execute_state):
+    """Bump Property.updatedAt for images or amenities matched by a bulk UPDATE or DELETE"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in (PropertyImages, PropertyAmenity):
+        return
+    # Found before the statement runs, as a DELETE leaves nothing to match
+    affected = select(mapper.class_.propertyId).distinct()
+    if orm_execute_state.statement.whereclause is not None:
+        affected = affected.where(orm_execute_state.statement.whereclause)
+    session = orm_execute_state.session
+    property_ids = session.execute(affected).scalars().all()
+    if property_ids:
+        _touch(session.connection(), property_ids)
+
 class UserDocument(db.Model):
     __tablename__ = 'UserDocuments'
     doc_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('Users.userId'))
     doc_type = db.Column(db.String(50))  # 'identity', 'address', 'income', 'property', 'legal', 'financial'
-    file_path = db.Column(db.String(255))
+    file_path = db.Column(db.String(255))  # Key in the document storage when content_hash is set
     original_filename = db.Column(db.String(255))
     file_size = db.Column(db.Integer)  # Size in bytes
     mime_type = db.Column(db.String(100))
@@ -192,10 +287,102 @@ class UserDocument(db.Model):
     verified_by = db.Column(db.Integer, db.ForeignKey('Users.userId'), nullable=True)
     verification_date = db.Column(db.DateTime, nullable=True)
     rejection_reason = db.Column(db.String(500), nullable=True)
+    # SHA-256 of the file, naming its blob (see blob_store.py); NULL for older uploads
+    content_hash = db.Column(db.String(64), nullable=True)
     
     # Define relationships
     user = db.relationship('User', foreign_keys=[user_id], backref='documents')
     verified_by_user = db.relationship('User', foreign_keys=[verified_by], backref='verified_documents')
 
 
+class Favorites(db.Model):
+    __tablename__ = 'Favorites'
+    userId = db.Column(db.Integer, db.ForeignKey('Users.userId'), primary_key=True)
+    propertyId = db.Column(db.Integer, db.ForeignKey('Property.propertyId'), primary_key=True)
+    addedAt = db.Column(db.DateTime, server_default=db.func.now())
+    
+    user = db.relationship('User', backref='favorites')
+    property = db.relationship('Property', backref='favorited_by')
+
+
+class PropertySummary(db.Model):
+    """
+    Denormalized listing card: one row per property with its type name,
+    city, state, primary image and amenity ids already joined in. Kept in
+    step with Property, PropertyImages and PropertyAmenities within the same
+    transaction (see listing_summaries.py). No foreign key, so the row can
+    be removed after its property in the same flush.
+    """
+    __tablename__ = 'PropertySummary'
+    __table_args__ = (
+        db.Index('ix_summary_active_created', 'isActive', 'createdAt'),
+        db.Index('ix_summary_owner', 'ownerId'),
+    )
+    propertyId = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    ownerId = db.Column(db.Integer, nullable=False)
+    isActive = db.Column(db.Boolean)
+    createdAt = db.Column(db.DateTime)
+    price = db.Column(db.Numeric(12, 2), nullable=False)
+    carpetArea = db.Column(db.Integer, nullable=False)
+    listingType = db.Column(db.String(20))
+    propertyCategory = db.Column(db.String(20))
+    furnishingType = db.Column(db.String(20))
+    propertyAge = db.Column(db.String(20))
+    facing = db.Column(db.String(20))
+    waterSupply = db.Column(db.String(20))
+    maintenanceCharge = db.Column(db.Numeric(10, 2))
+    reraRegistered = db.Column(db.Boolean)
+    typeId = db.Column(db.Integer)
+    typeName = db.Column(db.String(30))
+    locationId = db.Column(db.Integer)
+    city = db.Column(db.String(30))
+    state = db.Column(db.String(30))
+    # Primary image (else the first uploaded), as a URL path
+    imageURL = db.Column(db.String(255))
+    # Comma-separated; names come from the reference data registry
+    amenityIds = db.Column(db.String(255))
+
+    @property
+    def amenity_names(self):
+        """Names of the property's amenities, without a query"""
+        from reference_data import reference_data
+        names = []
+        for amenity_id in filter(None, (self.amenityIds or '').split(',')):
+            amenity = reference_data.amenity(int(amenity_id))
+            if amenity:
+                names.append(amenity.name)
+        return names
+
+
+class Blob(db.Model):
+    """
+    A stored file named by the SHA-256 of its content, and how many
+    PropertyImages or UserDocuments rows use it. Kept up to date by session
+    listeners (see blob_store.py); a blob's files are removed once nothing
+    references it.
+    """
+    __tablename__ = 'Blobs'
+    kind = db.Column(db.String(20), primary_key=True)  # 'image' or 'document'
+    contentHash = db.Column(db.String(64), primary_key=True)
+    refCount = db.Column(db.Integer, nullable=False, default=0)
+    size = db.Column(db.BigInteger)  # Bytes stored, all variants of an image together
+    updatedAt = db.Column(db.DateTime, default=datetime.now)
+
+
+class ChangeCounter(db.Model):
+    """
+    A counter of changes that leave no row to compare, such as deleted
+    properties, bumped in the transaction making them (see conditional.py).
+    """
+    __tablename__ = 'ChangeCounters'
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class SchemaMigration(db.Model):
+    __tablename__ = 'SchemaMigrations'
+    migrationId = db.Column(db.String(100), primary_key=True)
+    appliedAt = db.Column(db.DateTime, server_default=db.func.now())
+
+
 # Add other models similarly...
\ No newline at end of file
@@ -0,0 +1,351 @@
+"""
+Pagination helpers for property listings in the DreamHome Real Estate Portal.
+Provides keyset (cursor) pagination for the search APIs, a hard cap on
+page size, and a cached approximate total count so listing pages do not run
+a fresh COUNT(*) on every request. The property ids of each page come from
+the search result cache when possible.
+
+Keyset pagination seeks past the last row of the previous page using the
+active sort column plus propertyId as a tiebreaker, so page 1,000 costs the
+same as page 1. Cursors are opaque, signed tokens tied to the criteria that
+produced them.
+
+When the in-memory listing index is enabled (see listing_index.py), the
+searches it supports are filtered, sorted and paged there, and only the
+visible page is loaded from the database.
+
+Proximity searches (criteria.near) are ordered by a distance computed
+outside SQL, so they are paged by offset over the cached, ranked id list
+(see paginate_by_distance and geo_search.py).
+"""
+from datetime import datetime
+from decimal import Decimal
+from flask import current_app
+from flask_sqlalchemy.pagination import Pagination
+from itsdangerous import URLSafeSerializer, BadSignature
+from sqlalchemy import and_, or_, func, select
+from models import db, Property
+from search_engine import build_filters, build_search_query, sort_columns
+from listing_queries import load_listings, load_summaries
+from search_cache import search_cache
+from geo_search import rank_by_distance
+
+# Sort option -> (column, descending)
+KEYSET_SORTS = {
+    'newest': (Property.createdAt, True),
+    'price_low': (Property.price, False),
+    'price_high': (Property.price, True),
+    'area': (Property.carpetArea, True),
+}
+
+_DECODERS = {
+    'createdAt': datetime.fromisoformat,
+    'price': Decimal,
+    'carpetArea': int,
+}
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token is malformed, tampered with or stale"""
+
+
+def clamp_per_page(value, default=9):
+    """
+    Bound a client-supplied page size.
+
+    Args:
+        value: Requested page size (may be None or invalid)
+        default (int): Size used when none was requested
+
+    Returns:
+        int: Page size between 1 and SEARCH_MAX_PER_PAGE
+    """
+    maximum = current_app.config.get('SEARCH_MAX_PER_PAGE', 50)
+    try:
+        value = int(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        value = default
+    return max(1, min(value, maximum))
+
+
+def supports_keyset(sort):
+    """Check whether a sort option can be paginated by keyset"""
+    return sort in KEYSET_SORTS
+
+
+def _listing_index(criteria):
+    """Get the in-memory listing index if it is enabled and can answer criteria"""
+    index = current_app.extensions.get('listing_index')
+    if index is not None and index.supports(criteria):
+        return index
+    return None
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='property-search-cursor')
+
+
+def encode_cursor(criteria, property):
+    """
+    Build the cursor pointing just past a property.
+
+    Args:
+        criteria (SearchCriteria): Criteria of the current search
+        property: Last Property (or row with its sort column) of the current page
+
+    Returns:
+        str: Opaque cursor token
+    """
+    column, _ = KEYSET_SORTS[criteria.sort]
+    value = getattr(property, column.key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    return _serializer().dumps([criteria.cache_key(), value, property.propertyId])
+
+
+def decode_cursor(criteria, token):
+    """
+    Unpack a cursor token.
+
+    Args:
+        criteria (SearchCriteria): Criteria of the current search
+        token (str): Cursor from a previous response
+
+    Returns:
+        tuple: (sort column value, propertyId) of the last row seen
+
+    Raises:
+        InvalidCursor: If the token is invalid or belongs to other criteria
+    """
+    try:
+        criteria_key, value, property_id = _serializer().loads(token)
+    except (BadSignature, TypeError, ValueError):
+        raise InvalidCursor('Invalid cursor')
+    if criteria_key != criteria.cache_key():
+        raise InvalidCursor('Cursor does not match the search criteria')
+
+    column, _ = KEYSET_SORTS[criteria.sort]
+    try:
+        value = _DECODERS[column.key](value) if value is not None else None
+        property_id = int(property_id)
+    except (TypeError, ValueError, ArithmeticError):
+        raise InvalidCursor('Invalid cursor')
+    return value, property_id
+
+
+def keyset_filter(sort, value, property_id):
+    """
+    Filter selecting the rows that come after a cursor position.
+
+    Args:
+        sort (str): Keyset-capable sort option
+        value: Sort column value of the last row seen
+        property_id (int): propertyId of the last row seen
+
+    Returns:
+        BinaryExpression: Seek predicate for the WHERE clause
+    """
+    column, descending = KEYSET_SORTS[sort]
+    if isinstance(value, datetime) and db.engine.dialect.name == 'sqlite':
+        # SQLite keeps CURRENT_TIMESTAMP defaults without fractional seconds but
+        # binds datetimes with them; normalize both sides so equal times compare equal
+        column = func.strftime('%Y-%m-%d %H:%M:%f', column)
+        value = func.strftime('%Y-%m-%d %H:%M:%f', value)
+    if descending:
+        return or_(column < value, and_(column == value, Property.propertyId < property_id))
+    return or_(column > value, and_(column == value, Property.propertyId > property_id))
+
+
+class KeysetPage:
+    """One page of keyset-paginated results"""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def keyset_paginate(criteria, cursor=None, per_page=9, references=True):
+    """
+    Fetch one page of search results by keyset.
+
+    Args:
+        criteria (SearchCriteria): Search criteria
+        cursor (str): Cursor from the previous page, or None for the first
+        per_page (int): Page size (already clamped)
+        references (bool): Load type/location/amenity rows for templates
+            (see listing_queries.listing_load_options)
+
+    Returns:
+        KeysetPage: Items and the cursor for the following page
+
+    Raises:
+        InvalidCursor: If the cursor cannot be used with these criteria
+    """
+    if not supports_keyset(criteria.sort):
+        raise InvalidCursor(f"Sort '{criteria.sort}' does not support cursor pagination")
+    position = decode_cursor(criteria, cursor) if cursor else None
+
+    index = _listing_index(criteria)
+    if index is not None:
+        result = index.search(criteria, limit=per_page + 1, after=position)
+        next_cursor = encode_cursor(criteria, result.rows[per_page - 1]) if len(result.rows) > per_page else None
+        return KeysetPage(load_listings(result.property_ids[:per_page], references), next_cursor)
+
+    def fetch_page():
+        column, _ = KEYSET_SORTS[criteria.sort]
+        query = build_search_query(criteria, eager=False) \
+            .with_entities(Property.propertyId, column) \
+            .order_by(None).order_by(*sort_columns(criteria.sort))
+        if position:
+            query = query.filter(keyset_filter(criteria.sort, *position))
+
+        # Fetch one extra row to learn whether another page exists
+        rows = query.limit(per_page + 1).all()
+        next_cursor = encode_cursor(criteria, rows[per_page - 1]) if len(rows) > per_page else None
+        return {'ids': [row.propertyId for row in rows[:per_page]], 'next_cursor': next_cursor}
+
+    page = search_cache.get_or_set('keyset', criteria, fetch_page, cursor or '', per_page)
+    return KeysetPage(load_listings(page['ids'], references), page['next_cursor'])
+
+
+def approximate_count(criteria):
+    """
+    Get the number of properties matching criteria, cached for a short time.
+
+    Args:
+        criteria (SearchCriteria): Search criteria
+
+    Returns:
+        int: Matching row count, possibly up to SEARCH_COUNT_CACHE_TTL seconds old
+    """
+    index = _listing_index(criteria)
+    if index is not None:
+        return index.count(criteria)
+
+    def count():
+        return db.session.execute(
+            select(func.count(Property.propertyId)).where(*build_filters(criteria))
+        ).scalar()
+
+    # The count does not depend on the sort order
+    return search_cache.get_or_set('count', criteria.with_changes(sort='newest'), count,
+                                   ttl=current_app.config.get('SEARCH_COUNT_CACHE_TTL'))
+
+
+class CachedPagination(Pagination):
+    """
+    Offset pagination over search results whose page ids and total come from
+    the search result cache.
+    """
+
+    def _load(self, property_ids):
+        if self._query_args['summaries']:
+            return load_summaries(property_ids)
+        return load_listings(property_ids, self._query_args['references'])
+
+    def _query_items(self):
+        criteria = self._query_args['criteria']
+
+        index = _listing_index(criteria)
+        if index is not None:
+            result = index.search(criteria, offset=self._query_offset, limit=self.per_page)
+            self._index_total = result.total
+            return self._load(result.property_ids)
+
+        def fetch_page():
+            query = build_search_query(criteria, eager=False).with_entities(Property.propertyId)
+            return [property_id for property_id, in query.offset(self._query_offset).limit(self.per_page)]
+
+        property_ids = search_cache.get_or_set('page', criteria, fetch_page, self.page, self.per_page)
+        return self._load(property_ids)
+
+    def _query_count(self):
+        if hasattr(self, '_index_total'):
+            return self._index_total
+        return approximate_count(self._query_args['criteria'])
+
+
+def paginate_with_cached_count(criteria, page, per_page, references=True, summaries=False):
+    """
+    Offset-paginate search results without re-running the search or COUNT(*)
+    on every request.
+
+    Args:
+        criteria (SearchCriteria): Search criteria
+        page (int): 1-based page number
+        per_page (int): Page size (already clamped)
+        references (bool): Load type/location/amenity rows for templates
+        summaries (bool): Load PropertySummary rows for listing cards instead
+
+    Returns:
+        Pagination: Flask-SQLAlchemy pagination whose total is the cached count
+    """
+    return CachedPagination(page=page, per_page=per_page, max_per_page=None,
+                            error_out=False, criteria=criteria, references=references,
+                            summaries=summaries)
+
+
+def rank_nearby(criteria):
+    """
+    Get the matches of a proximity search, nearest first, cached per criteria.
+
+    Args:
+        criteria (SearchCriteria): Search criteria with near set
+
+    Returns:
+        list: [propertyId, distance_km] pairs (see geo_search.rank_by_distance)
+    """
+    def rank():
+        rows = db.session.execute(
+            select(Property.propertyId, Property.latitude, Property.longitude)
+            .where(*build_filters(criteria))
+        ).all()
+        return rank_by_distance(rows, criteria)
+
+    # The ranking does not depend on the sort option
+    return search_cache.get_or_set('near', criteria.with_changes(sort='distance'), rank)
+
+
+class DistancePagination(Pagination):
+    """
+    Offset pagination over the results of a proximity search, nearest first.
+
+    distances maps the id of each property on the page to its distance in
+    kilometres.
+    """
+
+    def _query_items(self):
+        self._ranked = rank_nearby(self._query_args['criteria'])
+        page = self._ranked[self._query_offset:self._query_offset + self.per_page]
+        self.distances = {property_id: distance for property_id, distance in page}
+        return load_listings([property_id for property_id, _ in page], self._query_args['references'])
+
+    def _query_count(self):
+        return len(self._ranked)
+
+
+def paginate_by_distance(criteria, page, per_page, references=True):
+    """
+    Offset-paginate the results of a proximity search, nearest first.
+
+    The candidates are read and ranked once per criteria; every page after
+    that is sliced from the cached ranking.
+
+    Args:
+        criteria (SearchCriteria): Search criteria with near set
+        page (int): 1-based page number
+        per_page (int): Page size (already clamped)
+        references (bool): Load type/location/amenity rows for templates
+
+    Returns:
+        DistancePagination: Pagination whose total is the number of matches
+            ranked (at most GEO_SEARCH_MAX_RESULTS)
+    """
+    return DistancePagination(page=page, per_page=per_page, max_per_page=None,
+                              error_out=False, criteria=criteria, references=references)
@@ -0,0 +1,75 @@
+"""
+Per-request SQL query counting for the DreamHome Real Estate Portal.
+Counts every statement sent to the database during a request so listing
+endpoints can be checked for N+1 regressions.
+"""
+from contextlib import contextmanager
+from flask import g, has_app_context, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter:
+    """
+    Flask extension that counts SQL statements issued per request.
+    When QUERY_COUNT_HEADER is enabled the count is returned to the client
+    in an X-Query-Count response header.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('QUERY_COUNT_HEADER', False)
+
+        if not event.contains(Engine, 'before_cursor_execute', _count_statement):
+            event.listen(Engine, 'before_cursor_execute', _count_statement)
+
+        app.after_request(self._add_header)
+
+    def _add_header(self, response):
+        """Expose the request's query count when enabled in config"""
+        if current_app.config['QUERY_COUNT_HEADER']:
+            response.headers['X-Query-Count'] = str(get_query_count())
+        return response
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    """SQLAlchemy hook: increment the counter of the active app context"""
+    if has_app_context():
+        g._query_count = g.get('_query_count', 0) + 1
+
+
+def get_query_count():
+    """
+    Get the number of SQL statements executed in the current request.
+
+    Returns:
+        int: Statements executed so far, 0 outside an app context
+    """
+    if not has_app_context():
+        return 0
+    return g.get('_query_count', 0)
+
+
+@contextmanager
+def count_queries():
+    """
+    Count the statements executed inside a block.
+
+    Usage:
+        with count_queries() as counter:
+            search_properties()
+        assert counter['count'] <= 5
+
+    Yields:
+        dict: Holder whose 'count' key is filled in when the block exits
+    """
+    counter = {'count': 0}
+    start = get_query_count()
+    try:
+        yield counter
+    finally:
+        counter['count'] = get_query_count() - start
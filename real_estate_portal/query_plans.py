@@ -0,0 +1,100 @@
+"""
+Query plan checks for the DreamHome Real Estate Portal.
+Runs EXPLAIN on the listing queries every visitor hits and reports any that
+read the whole Property table instead of using one of its indexes. Run it
+with `flask db check-plans` after changing filters, sorts or indexes; it
+exits non-zero when a hot query regresses to a full scan.
+
+MySQL may still pick a full scan for tables with only a handful of rows, so
+check against a database with representative data.
+"""
+from models import db
+from search_engine import SearchCriteria, build_search_query
+
+# (name, criteria) of the queries behind the listing and search pages
+HOT_QUERIES = (
+    ('newest listings', SearchCriteria(sort='newest')),
+    ('cheapest listings', SearchCriteria(sort='price_low')),
+    ('most expensive listings', SearchCriteria(sort='price_high')),
+    ('largest listings', SearchCriteria(sort='area')),
+    ('listing type and category', SearchCriteria(listing_type='Sell', category='Residential')),
+    ('furnishing', SearchCriteria(furnishing='Fully Furnished')),
+    ('city by price', SearchCriteria(city='Mumbai', sort='price_low')),
+    ('amenities', SearchCriteria(amenities=(1, 2, 4))),
+    ('within 5 km', SearchCriteria(near=(19.076, 72.8777), radius_km=5, sort='distance')),
+)
+
+TABLE = 'property'
+
+
+class PlanResult:
+    """EXPLAIN output of one hot query"""
+
+    def __init__(self, name, plan, full_scan):
+        self.name = name
+        self.plan = plan
+        self.full_scan = full_scan
+
+
+def _compile(criteria, per_page):
+    """Render the query for criteria as SQL with inlined parameters"""
+    statement = build_search_query(criteria, eager=False).limit(per_page).statement
+    return str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def _explain_mysql(conn, sql):
+    rows = conn.exec_driver_sql(f'EXPLAIN {sql}').mappings().all()
+    plan = [
+        f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']}"
+        for row in rows
+    ]
+    full_scan = any(
+        (row['table'] or '').lower() == TABLE and row['type'] == 'ALL'
+        for row in rows
+    )
+    return plan, full_scan
+
+
+def _explain_sqlite(conn, sql):
+    rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}').all()
+    plan = [row[-1] for row in rows]
+    full_scan = False
+    for detail in plan:
+        words = detail.split()
+        # "SCAN Property" (or "SCAN TABLE Property" on older SQLite) without "USING ... INDEX"
+        if words and words[0] == 'SCAN' and 'USING' not in words:
+            table = words[2] if len(words) > 2 and words[1] == 'TABLE' else words[1]
+            full_scan = full_scan or table.strip('"').lower() == TABLE
+    return plan, full_scan
+
+
+_EXPLAINERS = {
+    'mysql': _explain_mysql,
+    'sqlite': _explain_sqlite,
+}
+
+
+def check_query_plans(per_page=9):
+    """
+    EXPLAIN each hot listing query.
+
+    Args:
+        per_page (int): Page size used as the query LIMIT
+
+    Returns:
+        list: PlanResult for each entry of HOT_QUERIES
+
+    Raises:
+        RuntimeError: If the database dialect is not supported
+    """
+    dialect = db.engine.dialect.name
+    explain = _EXPLAINERS.get(dialect)
+    if explain is None:
+        raise RuntimeError(f"Query plan checks are not supported on {dialect}")
+
+    results = []
+    with db.engine.connect() as conn:
+        for name, criteria in HOT_QUERIES:
+            plan, full_scan = explain(conn, _compile(criteria, per_page))
+            results.append(PlanResult(name, plan, full_scan))
+    return results
@@ -0,0 +1,177 @@
+"""
+Reference data registry for the DreamHome Real Estate Portal.
+Keeps the small lookup tables (property types, locations, amenities and
+user roles) in memory so forms, filters and serializers do not query them
+on every request.
+
+The registry loads an immutable, versioned snapshot on first use and
+reloads it when it is older than REFERENCE_DATA_TTL, when an admin asks for
+a refresh, or when the reference_data_changed signal is sent. Lookups by id
+are dictionary reads; an unknown id triggers at most one early reload so
+newly added rows show up quickly.
+
+A snapshot's version is a hash of its rows, so every process holding the
+same data reports the same version, whenever it loaded it. It is safe to
+use in shared cache keys and ETags.
+
+Usage:
+    reference_data.property_types()          # [PropertyTypeRef, ...]
+    reference_data.property_type_name(4)     # 'Apartment'
+    reference_data.location(1001).city       # 'Mumbai'
+"""
+import hashlib
+import threading
+import time
+from collections import namedtuple
+from models import db, PropertyType, IndianLocation, Amenity, UserRole
+from signals import reference_data_changed
+
+# Plain, immutable rows with the same attribute names as the ORM models
+PropertyTypeRef = namedtuple('PropertyTypeRef', 'typeId typeName')
+LocationRef = namedtuple('LocationRef', 'locationId city state pincode reraZone')
+AmenityRef = namedtuple('AmenityRef', 'amenityId name description')
+RoleRef = namedtuple('RoleRef', 'roleId roleName')
+
+# Minimum seconds between reloads caused by lookups of unknown ids
+_MISS_RELOAD_INTERVAL = 5
+
+
+class ReferenceSnapshot:
+    """One consistent, read-only load of every reference table"""
+
+    def __init__(self, property_types, locations, amenities, roles):
+        self.version = hashlib.sha256(
+            repr((property_types, locations, amenities, roles)).encode()
+        ).hexdigest()[:16]
+        self.loaded_at = time.monotonic()
+        self.property_types = {t.typeId: t for t in property_types}
+        self.locations = {l.locationId: l for l in locations}
+        self.amenities = {a.amenityId: a for a in amenities}
+        self.roles = {r.roleId: r for r in roles}
+        self.cities = sorted({l.city for l in locations})
+
+
+class ReferenceDataRegistry:
+    """
+    Flask extension holding the current reference data snapshot.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.ttl = 3600
+        self._snapshot = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('REFERENCE_DATA_TTL', 3600)
+        self.ttl = app.config['REFERENCE_DATA_TTL']
+        reference_data_changed.connect(self._on_changed, weak=False)
+
+    def _load(self):
+        return ReferenceSnapshot(
+            [PropertyTypeRef(*row) for row in db.session.query(
+                PropertyType.typeId, PropertyType.typeName).order_by(PropertyType.typeId)],
+            [LocationRef(*row) for row in db.session.query(
+                IndianLocation.locationId, IndianLocation.city, IndianLocation.state,
+                IndianLocation.pincode, IndianLocation.reraZone).order_by(IndianLocation.locationId)],
+            [AmenityRef(*row) for row in db.session.query(
+                Amenity.amenityId, Amenity.name, Amenity.description).order_by(Amenity.amenityId)],
+            [RoleRef(*row) for row in db.session.query(
+                UserRole.roleId, UserRole.roleName).order_by(UserRole.roleId)],
+        )
+
+    def snapshot(self):
+        """
+        Get the current snapshot, loading it if missing or expired.
+
+        Returns:
+            ReferenceSnapshot: Current reference data
+        """
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - snapshot.loaded_at > self.ttl:
+            with self._lock:
+                if self._snapshot is snapshot:
+                    self._snapshot = self._load()
+                snapshot = self._snapshot
+        return snapshot
+
+    def refresh(self):
+        """
+        Reload every reference table now.
+
+        Returns:
+            str: Version of the new snapshot
+        """
+        with self._lock:
+            self._snapshot = self._load()
+            return self._snapshot.version
+
+    def invalidate(self):
+        """Drop the snapshot so the next lookup reloads it"""
+        self._snapshot = None
+
+    @property
+    def version(self):
+        """Version of the current snapshot; changes whenever its data does"""
+        return self.snapshot().version
+
+    def _lookup(self, table, key):
+        snapshot = self.snapshot()
+        item = getattr(snapshot, table).get(key)
+        if item is None and key is not None and \
+                time.monotonic() - snapshot.loaded_at > _MISS_RELOAD_INTERVAL:
+            # Possibly a row added since the snapshot was taken
+            with self._lock:
+                if self._snapshot is snapshot:
+                    self._snapshot = self._load()
+            item = getattr(self._snapshot, table).get(key)
+        return item
+
+    def property_types(self):
+        """All property types ordered by id"""
+        return list(self.snapshot().property_types.values())
+
+    def locations(self):
+        """All locations ordered by id"""
+        return list(self.snapshot().locations.values())
+
+    def amenities(self):
+        """All amenities ordered by id"""
+        return list(self.snapshot().amenities.values())
+
+    def roles(self):
+        """All user roles ordered by id"""
+        return list(self.snapshot().roles.values())
+
+    def cities(self):
+        """Distinct city names, sorted"""
+        return list(self.snapshot().cities)
+
+    def property_type(self, type_id):
+        """Get a PropertyTypeRef by id, or None"""
+        return self._lookup('property_types', type_id)
+
+    def property_type_name(self, type_id):
+        """Get a property type's name by id, or None"""
+        property_type = self.property_type(type_id)
+        return property_type.typeName if property_type else None
+
+    def location(self, location_id):
+        """Get a LocationRef by id, or None"""
+        return self._lookup('locations', location_id)
+
+    def amenity(self, amenity_id):
+        """Get an AmenityRef by id, or None"""
+        return self._lookup('amenities', amenity_id)
+
+    def role(self, role_id):
+        """Get a RoleRef by id, or None"""
+        return self._lookup('roles', role_id)
+
+    def _on_changed(self, sender, **kwargs):
+        self.invalidate()
+
+
+reference_data = ReferenceDataRegistry()
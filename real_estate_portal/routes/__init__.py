@@ -0,0 +1,33 @@
+"""
+Route blueprints for the DreamHome Real Estate Portal.
+Each module defines one Blueprint named after the module. Endpoints keep
+their view function names, prefixed with the blueprint name, e.g.
+url_for('properties.property_detail', property_id=1).
+
+The modules are imported by register_blueprints() rather than here, so
+importing the application module stays cheap (forms, rate limiting and the
+route dependencies are only loaded when an app is actually built).
+"""
+from importlib import import_module
+
+# Registration order matters where two routes share a URL: the first registered wins
+BLUEPRINTS = ('main', 'auth', 'properties', 'search', 'admin', 'documents', 'tools', 'uploads')
+
+
+def register_blueprints(app, names=BLUEPRINTS):
+    """
+    Import the route modules and register their blueprints on an app.
+
+    Args:
+        app (Flask): Application to register the blueprints on
+        names (iterable): Route module names, in registration order
+
+    Returns:
+        list: The registered blueprints
+    """
+    blueprints = []
+    for name in names:
+        blueprint = import_module(f'{__name__}.{name}').bp
+        app.register_blueprint(blueprint)
+        blueprints.append(blueprint)
+    return blueprints
@@ -0,0 +1,480 @@
+"""
+Admin routes for the DreamHome Real Estate Portal.
+User, property, document and reference data management for administrators.
+"""
+import os
+from datetime import datetime
+from flask import (Blueprint, render_template, request, redirect, url_for,
+                   flash, jsonify, abort, current_app)
+from flask_login import login_required, current_user
+from sqlalchemy import or_, text
+from models import (db, User, Property, PropertyImages, PropertyAmenity,
+                    UserDocument, Roles, Favorites)
+from logging_config import log_security_event
+from decorators import admin_required
+from search_engine import SearchCriteria, build_search_query
+from signals import property_changed, property_images_changed, reference_data_changed, user_changed
+from reference_data import reference_data
+from image_variants import delete_image_files
+
+bp = Blueprint('admin', __name__)
+
+
+@bp.route('/admin')
+@login_required
+def admin_dashboard():
+    if current_user.roleId != Roles.ADMIN:  # Only for admin
+        abort(403)
+    
+    users = User.query.all()
+    properties = Property.query.all()
+    return render_template('admin/dashboard.html', 
+                         users=users,
+                         properties=properties)
+
+
+@bp.route('/admin/users')
+@login_required
+def admin_users():
+    if current_user.roleId != Roles.ADMIN:
+        abort(403)
+    users = User.query.all()
+    return render_template('admin/users.html', users=users)
+
+
+@bp.route('/admin/properties')
+@login_required
+def admin_properties():
+    if current_user.roleId != Roles.ADMIN:
+        abort(403)
+    
+    page = request.args.get('page', 1, type=int)
+    search = request.args.get('search', '')
+    
+    criteria = SearchCriteria(
+        keyword=search.strip() or None,
+        active_only=False,
+        sort='relevance' if search.strip() else 'newest'
+    )
+    
+    properties = build_search_query(criteria).paginate(
+        page=page,
+        per_page=10,
+        error_out=False
+    )
+    
+    return render_template('admin/properties.html',
+                         properties=properties,
+                         search=search)
+
+
+@bp.route('/admin/edit_user/<int:user_id>', methods=['GET', 'POST'])
+@login_required
+def admin_edit_user(user_id):
+    if current_user.roleId != Roles.ADMIN:
+        abort(403)
+    user = User.query.get_or_404(user_id)
+    if request.method == 'POST':
+        user.username = request.form['username']
+        user.email = request.form['email']
+        user.mobile = request.form['mobile']
+        user.roleId = int(request.form['role'])
+        user.isActive = 'isActive' in request.form
+        db.session.commit()
+        user_changed.send(current_app._get_current_object(), user_id=user.userId)
+        flash('User updated successfully', 'success')
+        return redirect(url_for('admin.admin_users'))
+    roles = reference_data.roles()
+    return render_template('admin/edit_user.html', user=user, roles=roles)
+
+
+@bp.route('/admin/edit_property/<int:property_id>', methods=['GET', 'POST'])
+@login_required
+def admin_edit_property(property_id):
+    if current_user.roleId != Roles.ADMIN:
+        abort(403)
+        
+    property = Property.query.get_or_404(property_id)
+    
+    if request.method == 'POST':
+        try:
+            # Check if this is an activation/deactivation request
+            if 'isActive' in request.form:
+                is_active_value = request.form['isActive']
+                property.isActive = is_active_value.lower() == 'true'
+                db.session.commit()
+                property_changed.send(current_app._get_current_object(), property_id=property_id, property=property,
+                                      listing_types={property.listingType})
+                
+                status = "activated" if property.isActive else "deactivated"
+                flash(f'Property has been {status} successfully', 'success')
+                return redirect(url_for('admin.admin_properties'))
+            
+            # Otherwise, process the full form data
+            if 'price' in request.form:
+                property.price = float(request.form['price'])
+            
+            property.isActive = 'isActive' in request.form
+            property.reraRegistered = 'reraRegistered' in request.form
+            
+            db.session.commit()
+            property_changed.send(current_app._get_current_object(), property_id=property_id, property=property,
+                                  listing_types={property.listingType})
+            flash('Property updated successfully', 'success')
+            return redirect(url_for('admin.admin_properties'))
+            
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error updating property: {str(e)}', 'danger')
+    
+    # Get data for form dropdowns
+    locations = reference_data.locations()
+    property_types = reference_data.property_types()
+    amenities = reference_data.amenities()
+    
+    # Get current property amenities
+    property_amenities = [pa.amenityId for pa in property.amenities]
+    
+    return render_template('admin/edit_property.html',
+                         property=property,
+                         locations=locations,
+                         property_types=property_types,
+                         amenities=amenities,
+                         property_amenities=property_amenities)
+
+
+@bp.route('/admin/toggle-user-status/<int:user_id>', methods=['POST'])
+@login_required
+def admin_toggle_user_status(user_id):
+    if current_user.roleId != Roles.ADMIN:  # Only admin can toggle user status
+        abort(403)
+    
+    user = User.query.get_or_404(user_id)
+    if user.roleId == Roles.ADMIN:  # Cannot deactivate admin users
+        abort(400)
+    
+    user.isActive = not user.isActive
+    db.session.commit()
+    user_changed.send(current_app._get_current_object(), user_id=user.userId)
+    return jsonify({'success': True})
+
+
+@bp.route('/admin/reference-data/refresh', methods=['POST'])
+@login_required
+def admin_refresh_reference_data():
+    if current_user.roleId != Roles.ADMIN:  # Only admin can refresh cached reference data
+        abort(403)
+    
+    # Property types, locations, amenities and roles are cached in memory;
+    # receivers update derived rows (e.g. listing summaries) in this session
+    reference_data_changed.send(current_app._get_current_object())
+    db.session.commit()
+    return jsonify({'success': True, 'version': reference_data.version})
+
+
+@bp.route('/admin/toggle-property-status/<int:property_id>', methods=['POST'])
+@login_required
+def admin_toggle_property_status(property_id):
+    if current_user.roleId != Roles.ADMIN:  # Only admin can toggle property status
+        abort(403)
+    
+    property = Property.query.get_or_404(property_id)
+    property.isActive = not property.isActive
+    db.session.commit()
+    property_changed.send(current_app._get_current_object(), property_id=property_id, property=property,
+                          listing_types={property.listingType})
+    return jsonify({'success': True})
+
+
+@bp.route('/admin/property/delete-image/<int:image_id>', methods=['POST'])
+@login_required
+def admin_delete_property_image(image_id):
+    if current_user.roleId != Roles.ADMIN:
+        abort(403)
+    
+    image = PropertyImages.query.get_or_404(image_id)
+    try:
+        # Removes every variant of an older upload; blob images are removed once
+        # no other row refers to them (see blob_store.py)
+        if image.contentHash is None:
+            delete_image_files(current_app.root_path, image.imageURL)
+        
+        db.session.delete(image)
+        db.session.commit()
+        property_images_changed.send(current_app._get_current_object(), property_id=image.propertyId)
+        return jsonify({'success': True})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/admin/documents')
+@login_required
+@admin_required
+def admin_view_documents():
+    """
+    Admin route to view and manage user document verification.
+    Provides filtering by status, document type and user search with pagination.
+    """
+    status = request.args.get('status', 'all')
+    doc_type = request.args.get('doc_type', 'all')
+    user_search = request.args.get('user_search', '')
+    page = request.args.get('page', 1, type=int)
+    
+    # Base query
+    query = UserDocument.query.join(User, UserDocument.user_id == User.userId)
+    
+    # Apply filters
+    if status == 'pending':
+        query = query.filter(UserDocument.is_verified.is_(None) | 
+                            (UserDocument.is_verified == False) & 
+                            (UserDocument.rejection_reason.is_(None)))
+    elif status == 'verified':
+        query = query.filter(UserDocument.is_verified == True)
+    elif status == 'rejected':
+        query = query.filter(UserDocument.is_verified == False, 
+                           UserDocument.rejection_reason.isnot(None))
+    
+    # Filter by document type
+    if doc_type != 'all':
+        query = query.filter(UserDocument.doc_type == doc_type)
+    
+    # Search by user
+    if user_search:
+        query = query.filter(or_(
+            User.username.ilike(f'%{user_search}%'),
+            User.email.ilike(f'%{user_search}%')
+        ))
+    
+    # Order by upload date (newest first) and paginate
+    documents = query.order_by(UserDocument.upload_date.desc()).paginate(
+        page=page,
+        per_page=10,
+        error_out=False
+    )
+    
+    # Log the document view for security auditing
+    log_security_event(
+        event_type="admin_document_view",
+        user_id=current_user.userId,
+        details=f"Admin viewed document list with filters: status={status}, type={doc_type}, page={page}"
+    )
+    
+    return render_template('admin/documents.html', 
+                         documents=documents, 
+                         status=status,
+                         doc_type=doc_type,
+                         user_search=user_search)
+
+
+@bp.route('/admin/documents/<int:doc_id>/verify', methods=['POST'])
+@login_required
+def admin_verify_document(doc_id):
+    """
+    Mark a document as verified by an administrator.
+    Updates the verification status, date, and verifier information.
+    """
+    document = UserDocument.query.get_or_404(doc_id)
+    action = request.form.get('action', '')
+    
+    if action == 'verify':
+        # Mark as verified
+        document.is_verified = True
+        document.verified_by = current_user.userId
+        document.verification_date = datetime.utcnow()
+        document.rejection_reason = None
+        
+        db.session.commit()
+          # Log the verification action
+        log_security_event(
+            event_type="document_verified",
+            user_id=current_user.userId,
+            details=f"Document ID {doc_id} was verified for user {document.user_id}"
+        )
+        
+        flash('Document has been verified successfully.', 'success')
+        
+    elif action == 'reject':
+        # Mark as rejected
+        rejection_reason = request.form.get('rejection_reason', '')
+        
+        if not rejection_reason:
+            flash('A reason for rejection is required.', 'danger')
+            return redirect(url_for('admin.admin_view_documents'))
+        
+        document.is_verified = False
+        document.verified_by = current_user.userId
+        document.verification_date = datetime.utcnow()
+        document.rejection_reason = rejection_reason
+        
+        db.session.commit()
+          # Log the rejection action
+        log_security_event(
+            event_type="document_rejected",
+            user_id=current_user.userId,
+            details=f"Document ID {doc_id} was rejected for user {document.user_id}. Reason: {rejection_reason}"
+        )
+        
+        flash('Document has been rejected.', 'warning')
+        
+    return redirect(url_for('admin.admin_view_documents'))
+
+
+@bp.route('/admin/documents/<int:doc_id>/delete', methods=['POST'])
+@login_required
+def admin_delete_document(doc_id):
+    """
+    Delete a document from the system.
+    Removes both the database record and the physical file.
+    """
+    document = UserDocument.query.get_or_404(doc_id)
+    
+    try:
+        # Store file path for deletion after DB record is removed
+        file_path = document.file_path
+        content_hash = document.content_hash
+        user_id = document.user_id
+        
+        # Delete the database record
+        db.session.delete(document)
+        db.session.commit()
+        
+        # Try to delete the physical file; a blob's file goes with its last reference
+        if content_hash is None and file_path and os.path.exists(file_path):
+            os.remove(file_path)
+              # Log the deletion
+        log_security_event(
+            event_type="document_deleted",
+            user_id=current_user.userId,
+            details=f"Document ID {doc_id} was permanently deleted for user {user_id}"
+        )
+        
+        flash('Document has been permanently deleted.', 'info')
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error deleting document: {str(e)}")
+        flash('An error occurred while deleting the document.', 'danger')
+    
+    return redirect(url_for('admin.admin_view_documents'))
+
+
+@bp.route('/admin/documents/<int:doc_id>')
+@login_required
+@admin_required
+def admin_view_document(doc_id):
+    """
+    View a specific document for admin verification.
+    Displays document details and provides verification options.
+    """
+    document = UserDocument.query.get_or_404(doc_id)
+      # Log the access for security auditing
+    log_security_event(
+        event_type="document_access",
+        user_id=current_user.userId,
+        details=f"Admin accessed document ID {doc_id} for user {document.user_id}"
+    )
+    
+    return render_template('admin/view_document.html', document=document)
+
+
+@bp.route('/admin/ban-user/<int:user_id>', methods=['POST'])
+@login_required
+def admin_ban_user(user_id):
+    if current_user.roleId != Roles.ADMIN:  # Only admin can ban users
+        abort(403)
+    
+    user = User.query.get_or_404(user_id)
+    if user.roleId == Roles.ADMIN:  # Cannot ban admin users
+        flash('Cannot ban admin users', 'danger')
+        return redirect(url_for('admin.admin_users'))
+    
+    user.isBanned = not user.isBanned
+    user.isActive = not user.isBanned  # Deactivate account if banned
+    db.session.commit()
+    user_changed.send(current_app._get_current_object(), user_id=user.userId)
+    
+    action = 'banned' if user.isBanned else 'unbanned'
+    flash(f'User {user.username} has been {action}', 'success')
+    return redirect(url_for('admin.admin_users'))
+
+
+@bp.route('/admin/delete-property/<int:property_id>', methods=['POST'])
+@login_required
+def admin_delete_property(property_id):
+    if current_user.roleId != Roles.ADMIN:  # Only admin can delete properties
+        abort(403)
+    
+    property = Property.query.get_or_404(property_id)
+    
+    try:
+        # 1. Delete from Favorites first (no dependencies)
+        Favorites.query.filter_by(propertyId=property_id).delete()
+        
+        # 2. Delete Listing records (if table exists)
+       
+        try:
+            db.session.execute(text("DELETE FROM Listing WHERE propertyId = :pid"), {"pid": property_id})
+        except Exception as e:
+            pass
+        
+        # 3. Delete from PropertyAmenities (no dependencies)
+
+        PropertyAmenity.query.filter_by(propertyId=property_id).delete()
+        
+        # 4. Delete associated images and their files
+        image_deletion_errors = []
+        for image in property.images:
+            try:
+                if image.contentHash is None:
+                    delete_image_files(current_app.root_path, image.imageURL)
+                db.session.delete(image)
+            except Exception as e:
+                image_deletion_errors.append(str(e))
+        
+        # Handle other dependent tables - wrap each in try/except to handle if tables don't exist
+        for table_name in [
+            "PropertyDocuments", "Payment", "Transaction", 
+            "RentalAgreement", "PropertyTax", "Maintenance",
+            "LegalCase", "ResidentialProperty", "CommercialProperty"
+        ]:
+            try:
+                db.session.execute(
+                    text(f"DELETE FROM {table_name} WHERE propertyId = :pid"),
+                    {"pid": property_id}
+                )
+            except Exception:
+                pass
+        
+        # Finally delete the property itself
+        listing_type = property.listingType
+        db.session.delete(property)
+        
+        # Commit all changes
+        db.session.commit()
+        property_changed.send(current_app._get_current_object(), property_id=property_id, listing_types={listing_type})
+        
+        if image_deletion_errors:
+            flash(f'Property deleted with warnings: Some image files could not be deleted.', 'warning')
+        else:
+            flash('Property has been deleted successfully', 'success')
+        
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error deleting property: {str(e)}', 'danger')
+    
+    return redirect(url_for('admin.admin_properties'))
+
+
+@bp.route('/admin/properties/<int:property_id>/toggle-featured', methods=['POST'])
+@login_required
+def admin_toggle_featured(property_id):
+    if current_user.roleId != Roles.ADMIN:
+        abort(403)
+    
+    property = Property.query.get_or_404(property_id)
+    property.isFeatured = not property.isFeatured
+    db.session.commit()
+    
+    action = 'featured' if property.isFeatured else 'unfeatured'
+    flash(f'Property has been {action}', 'success')
+    return redirect(url_for('admin.admin_properties'))
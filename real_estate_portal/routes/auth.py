@@ -0,0 +1,270 @@
+"""
+Authentication and account routes for the DreamHome Real Estate Portal.
+Login, registration, logout, profile and account settings.
+"""
+from datetime import datetime
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask_login import login_user, logout_user, login_required, current_user
+from models import db, User, Property, Roles, Favorites, PropertySummary
+from listing_queries import summary_query, favorite_summaries
+from forms import LoginForm, RegistrationForm
+from rate_limiter import login_rate_limit
+from logging_config import log_security_event
+from signals import user_changed
+
+bp = Blueprint('auth', __name__)
+
+
+def url_has_allowed_host_and_scheme(url):
+    """
+    Checks if the URL is safe for redirects to prevent open redirect vulnerabilities.
+    
+    Args:
+        url (str): URL to check
+        
+    Returns:
+        bool: True if the URL is safe, False otherwise
+    """
+    if not url:
+        return False
+    
+    # Sanitize the URL input first
+    url = url.strip()
+    
+    # Check if it's a relative URL (starts with / but not //)
+    if url.startswith('/') and not url.startswith('//'):
+        # Make sure the URL doesn't have any sneaky protocol handlers
+        if ':' not in url:
+            return True
+        return False
+        
+    # Parse the URL to check scheme and netloc
+    from urllib.parse import urlparse
+    try:
+        parsed = urlparse(url)
+        
+        # Only allow http, https schemes
+        if parsed.scheme not in ('http', 'https'):
+            return False
+        
+        # Check if the host is in allowed hosts
+        allowed_hosts = {
+            'localhost', 
+            '127.0.0.1',
+            request.host,
+            current_app.config.get('SERVER_NAME', '')
+        }
+        
+        # Add any additional allowed domains from configuration
+        if current_app.config.get('ALLOWED_REDIRECT_DOMAINS'):
+            allowed_hosts.update(set(current_app.config.get('ALLOWED_REDIRECT_DOMAINS')))
+        
+        # Properly check subdomain patterns 
+        for allowed in allowed_hosts:
+            if allowed and allowed.startswith('.') and parsed.netloc.endswith(allowed[1:]):
+                return True
+            elif parsed.netloc == allowed:
+                return True
+                
+        return False
+    except Exception as e:
+        current_app.logger.error(f"URL validation error: {str(e)} for URL: {url}")
+        return False
+
+
+
+@bp.route('/login', methods=['GET', 'POST'])
+@login_rate_limit()
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.index'))
+    
+    form = LoginForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(username=form.username.data).first()
+        
+        # Update login attempt counter and timestamp
+        if user:
+            user.lastLoginAttempt = datetime.utcnow()
+            user.loginAttempts += 1
+            db.session.commit()
+        
+        if user and user.check_password(form.password.data):
+            if user.isBanned:
+                log_security_event('login_blocked', {'reason': 'banned_user'}, user.userId)
+                flash('Your account has been banned. Please contact the administrator.', 'danger')
+                return render_template('auth/login.html', form=form)
+                
+            if not user.isActive:
+                log_security_event('login_blocked', {'reason': 'inactive_user'}, user.userId)
+                flash('Your account is inactive. Please contact support.', 'danger')
+                return render_template('auth/login.html', form=form)
+            
+            # Reset login attempts on successful login
+            user.loginAttempts = 0
+            user.lastLogin = datetime.utcnow()
+            user.lastLoginIP = request.remote_addr
+            db.session.commit()
+            
+            login_user(user, remember=form.remember.data)
+            log_security_event('login_success', {
+                'ip': request.remote_addr,
+                'user_agent': request.user_agent.string
+            }, user.userId)
+            
+            next_page = request.args.get('next')
+            if next_page and url_has_allowed_host_and_scheme(next_page):
+                return redirect(next_page)
+            return redirect(url_for('main.index'))
+            
+        # Log failed login attempt
+        if user:
+            log_security_event('login_failed', {
+                'username': form.username.data,
+                'ip': request.remote_addr,
+                'attempts': user.loginAttempts
+            }, user.userId)
+        else:
+            log_security_event('login_failed', {
+                'username': form.username.data,
+                'ip': request.remote_addr,
+                'reason': 'user_not_found'
+            })
+            
+        flash('Invalid username or password', 'danger')
+    return render_template('auth/login.html', form=form)
+
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.index'))
+    
+    form = RegistrationForm()
+    if form.validate_on_submit():
+        user = User(
+            username=form.username.data,
+            email=form.email.data,
+            mobile=form.mobile.data,
+            roleId=Roles.BUYER  # Default role as buyer
+        )
+        user.set_password(form.password.data)
+        db.session.add(user)
+        db.session.commit()
+        flash('Your account has been created! You can now log in', 'success')
+        return redirect(url_for('auth.login'))
+    return render_template('auth/register.html', form=form)
+
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('main.index'))
+
+
+@bp.route('/profile')
+@login_required
+def profile():
+    if current_user.roleId == Roles.SELLER:  # Seller
+        user_properties = summary_query(PropertySummary.ownerId == current_user.userId).all()
+        return render_template('user/profile.html', user_properties=user_properties)
+    elif current_user.roleId == Roles.BUYER:  # Buyer
+        favorites = favorite_summaries(current_user.userId)
+        return render_template('user/profile.html', favorites=favorites)
+    return render_template('user/profile.html')
+
+
+@bp.route('/settings')
+@login_required
+def settings():
+    return render_template('user/settings.html')
+
+
+@bp.route('/settings/update-profile', methods=['POST'])
+@login_required
+def update_profile():
+    if request.method == 'POST':
+        username = request.form.get('username')
+        email = request.form.get('email')
+        mobile = request.form.get('mobile')
+        
+        # Check if username or email already exists
+        if username != current_user.username and User.query.filter_by(username=username).first():
+            flash('Username already exists', 'danger')
+            return redirect(url_for('auth.settings'))
+        
+        if email != current_user.email and User.query.filter_by(email=email).first():
+            flash('Email already exists', 'danger')
+            return redirect(url_for('auth.settings'))
+        
+        current_user.username = username
+        current_user.email = email
+        current_user.mobile = mobile
+        db.session.commit()
+        user_changed.send(current_app._get_current_object(), user_id=current_user.userId)
+        
+        flash('Profile updated successfully', 'success')
+        return redirect(url_for('auth.settings'))
+
+
+@bp.route('/settings/change-password', methods=['POST'])
+@login_required
+def change_password():
+    if request.method == 'POST':
+        current_password = request.form.get('current_password')
+        new_password = request.form.get('new_password')
+        confirm_password = request.form.get('confirm_password')
+        
+        if not current_user.check_password(current_password):
+            flash('Current password is incorrect', 'danger')
+            return redirect(url_for('auth.settings'))
+        
+        if new_password != confirm_password:
+            flash('New passwords do not match', 'danger')
+            return redirect(url_for('auth.settings'))
+        
+        current_user.set_password(new_password)
+        db.session.commit()
+        
+        flash('Password changed successfully', 'success')
+        return redirect(url_for('auth.settings'))
+
+
+@bp.route('/settings/update-notifications', methods=['POST'])
+@login_required
+def update_notifications():
+    if request.method == 'POST':
+        email_notifications = 'email_notifications' in request.form
+        sms_notifications = 'sms_notifications' in request.form
+        marketing_emails = 'marketing_emails' in request.form
+        
+        # Update user preferences in database
+        # This would require adding these fields to the User model
+        flash('Notification preferences updated', 'success')
+        return redirect(url_for('auth.settings'))
+
+
+@bp.route('/settings/delete-account', methods=['POST'])
+@login_required
+def delete_account():
+    if request.method == 'POST':
+        password = request.form.get('password')
+        
+        if not current_user.check_password(password):
+            flash('Password is incorrect', 'danger')
+            return redirect(url_for('auth.settings'))
+        
+        # Delete user's data
+        if current_user.roleId == Roles.SELLER:  # Seller
+            Property.query.filter_by(ownerId=current_user.userId).delete()
+        Favorites.query.filter_by(userId=current_user.userId).delete()
+        
+        user_id = current_user.userId
+        logout_user()
+        User.query.filter_by(userId=user_id).delete()
+        db.session.commit()
+        user_changed.send(current_app._get_current_object(), user_id=user_id)
+        
+        flash('Your account has been deleted', 'info')
+        return redirect(url_for('main.index'))
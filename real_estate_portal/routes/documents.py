@@ -0,0 +1,327 @@
+"""
+Document routes for the DreamHome Real Estate Portal.
+Uploading, listing, viewing and downloading user verification documents.
+"""
+import mimetypes
+import os
+from datetime import datetime
+from flask import (Blueprint, render_template, request, redirect, url_for,
+                   flash, jsonify, abort, send_file, current_app)
+from flask_login import login_required, current_user
+from models import db, UserDocument, Roles
+from logging_config import log_security_event
+from utils import allowed_file, stage_upload
+from document_checks import check_stored_document
+from jobs import job_queue, JobFailed
+from blob_store import blob_store, register_blob
+from chunked_uploads import InvalidUpload, register_purpose
+
+bp = Blueprint('documents', __name__)
+
+VALID_DOC_TYPES = ['identity', 'address', 'income', 'property', 'legal', 'financial']
+MAX_DOCUMENT_SIZE = 10 * 1024 * 1024  # 10MB
+
+
+@bp.route('/documents/upload', methods=['POST'])
+@login_required
+def upload_document():
+    """
+    Securely handle document uploads with strict validation and error handling.
+    
+    Returns:
+        JSON response with status and document ID or error message
+    """
+    try:
+        # Check if document was uploaded
+        if 'document' not in request.files:
+            return jsonify({'error': 'No file uploaded'}), 400
+        
+        file = request.files['document']
+        
+        # Check if file is empty
+        if file.filename == '':
+            return jsonify({'error': 'Empty file submitted'}), 400
+            
+        # Validate document type
+        if 'doc_type' not in request.form or not request.form['doc_type']:
+            return jsonify({'error': 'Document type is required'}), 400
+            
+        doc_type = request.form['doc_type']
+        
+        # Validate document type value
+        if doc_type not in VALID_DOC_TYPES:
+            return jsonify({'error': 'Invalid document type'}), 400
+        
+        # Check file type and size
+        if not file or not allowed_file(file.filename):
+            return jsonify({'error': 'Invalid file type. Allowed types: pdf, jpg, jpeg, png'}), 400
+            
+        # Check file size (limit to 10MB)
+        if file.content_length and file.content_length > MAX_DOCUMENT_SIZE:
+            return jsonify({'error': 'File too large. Maximum size: 10MB'}), 400
+        
+        # Staged first; identical content is stored only once (see blob_store.py)
+        staged_path = stage_upload(file)
+        
+        return jsonify(record_document(staged_path, file.filename, doc_type, file.content_type))
+    
+    except Exception as e:
+        current_app.logger.error(f"Document upload error: {str(e)}")
+        db.session.rollback()
+        return jsonify({
+            'error': 'Document upload failed',
+            'details': str(e) if current_app.debug else 'An unexpected error occurred'
+        }), 500
+
+
+def record_document(staged_path, original_filename, doc_type, mime_type):
+    """
+    Store an uploaded document of the current user, record it and queue
+    its content check.
+
+    Args:
+        staged_path (str): Uploaded file; moved into the blob store or,
+            if the same content is stored already, deleted
+        original_filename (str): File name sent by the client
+        doc_type (str): Document type
+        mime_type (str): MIME type sent by the client; replaced by the check
+
+    Returns:
+        dict: Response body with the document id and the check's job id
+    """
+    file_size = os.path.getsize(staged_path)
+    digest, key = blob_store.put_document(staged_path)
+    register_blob('document', digest, file_size)
+    
+    # Log document upload for audit purposes
+    log_security_event(
+        event_type="document_upload",
+        details=f"Document uploaded: type={doc_type}, filename={original_filename}, sha256={digest}",
+        user_id=current_user.userId
+    )
+    
+    # Store document metadata in database
+    doc = UserDocument(
+        user_id=current_user.userId,
+        doc_type=doc_type,
+        file_path=key,
+        original_filename=original_filename,
+        file_size=file_size,
+        mime_type=mime_type,
+        upload_date=datetime.now(),
+        content_hash=digest
+    )
+    db.session.add(doc)
+    db.session.commit()
+    
+    # The content check runs in the background; the client can poll status_url
+    extension = original_filename.rsplit('.', 1)[1].lower()
+    job_id = job_queue.submit('document_check', blob_store.documents.spec, key, extension,
+                              context={'doc_id': doc.doc_id}, owner_id=current_user.userId)
+    
+    return {
+        'status': 'success',
+        'message': 'Document uploaded successfully',
+        'document_id': doc.doc_id,
+        'document_type': doc_type,
+        'job_id': job_id,
+        'status_url': url_for('main.job_status', job_id=job_id)
+    }
+
+
+def _authorize_chunked_document(fields):
+    if fields.get('doc_type') not in VALID_DOC_TYPES:
+        raise InvalidUpload('Invalid document type')
+
+
+def _finalize_chunked_document(upload, path):
+    mime_type = mimetypes.guess_type(upload['filename'])[0]
+    return record_document(path, upload['filename'], upload['fields']['doc_type'], mime_type), 200
+
+
+# Chunked uploads (see chunked_uploads.py) end in the same record creation as the form upload
+register_purpose('document', _authorize_chunked_document, _finalize_chunked_document,
+                 max_size=MAX_DOCUMENT_SIZE)
+
+
+@job_queue.task('document_check', check_stored_document)
+def _record_document_check(details, doc_id):
+    """Record a document's checked type, or discard a document that failed (finish of 'document_check')"""
+    doc = db.session.get(UserDocument, doc_id)
+    if doc is None:
+        raise JobFailed('The document no longer exists')
+    if 'error' in details:
+        # A blob's file is removed with its last reference (see blob_store.py)
+        if doc.content_hash is None and doc.file_path and os.path.exists(doc.file_path):
+            os.remove(doc.file_path)
+        db.session.delete(doc)
+        db.session.commit()
+        log_security_event(
+            event_type="document_rejected",
+            details=f"Document {doc_id} rejected: {details['error']}",
+            user_id=doc.user_id
+        )
+        raise JobFailed(details['error'])
+    doc.mime_type = details['mime_type']
+    db.session.commit()
+    return {'document_id': doc_id, 'mime_type': details['mime_type']}
+
+
+@bp.route('/my-documents')
+@login_required
+def user_documents():
+    """
+    Allow users to view and manage their own documents
+    """
+    # Get all documents for the current user
+    documents = UserDocument.query.filter_by(user_id=current_user.userId).order_by(
+        UserDocument.upload_date.desc()
+    ).all()
+    
+    return render_template('user/documents.html', documents=documents)
+
+
+@bp.route('/my-documents/<int:doc_id>/delete', methods=['POST'])
+@login_required
+def user_delete_document(doc_id):
+    """
+    Allow a user to delete their own document
+    """
+    document = UserDocument.query.get_or_404(doc_id)
+    
+    # Ensure the document belongs to the current user
+    if document.user_id != current_user.userId:
+        flash("You don't have permission to delete this document.", "danger")
+        return redirect(url_for('documents.user_documents'))
+    
+    try:
+        # Store file path for deletion after DB record is removed
+        file_path = document.file_path
+        content_hash = document.content_hash
+        
+        # Delete the database record
+        db.session.delete(document)
+        db.session.commit()
+        
+        # Try to delete the physical file; a blob's file goes with its last reference
+        if content_hash is None and file_path and os.path.exists(file_path):
+            os.remove(file_path)
+            
+        flash('Document has been deleted successfully.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error deleting document: {str(e)}")
+        flash('An error occurred while deleting the document.', 'danger')
+    
+    return redirect(url_for('documents.user_documents'))
+
+
+def _document_file_missing(document):
+    """Check for a lost file; blob documents are trusted to exist in their storage"""
+    if not document.file_path:
+        return True
+    return document.content_hash is None and not os.path.exists(document.file_path)
+
+
+def _send_document(document, as_attachment, download_name, mimetype=None):
+    """
+    Respond with a document's file.
+
+    Blob documents are sent by their storage (see storage.py): a redirect to
+    a short-lived presigned URL, or an X-Accel-Redirect to nginx, so the
+    bytes do not pass through this worker.
+    """
+    if document.content_hash is not None:
+        return blob_store.documents.send(document.file_path, mimetype, download_name, as_attachment)
+    return send_file(document.file_path, mimetype=mimetype, as_attachment=as_attachment,
+                     download_name=download_name)
+
+
+@bp.route('/documents/view/<int:doc_id>')
+@login_required
+def document_view(doc_id):
+    """
+    View a document directly in the browser.
+    Only allows access to the document if the user is either:
+    1. The owner of the document
+    2. An admin user
+    """
+    document = UserDocument.query.get_or_404(doc_id)
+      # Security check: Only document owner or admin can view
+    if document.user_id != current_user.userId and current_user.roleId != Roles.ADMIN:
+        log_security_event(
+            event_type="unauthorized_access",
+            user_id=current_user.userId,
+            details=f"Unauthorized attempt to access document ID {doc_id} belonging to user {document.user_id}"
+        )
+        abort(403)
+    
+    # Check if file exists
+    if _document_file_missing(document):
+        flash("The requested file could not be found.", "danger")
+        return redirect(url_for('auth.profile'))
+      # Log access
+    if current_user.roleId == Roles.ADMIN and document.user_id != current_user.userId:
+        log_security_event(
+            event_type="document_view",
+            user_id=current_user.userId,
+            details=f"Admin viewed document ID {doc_id} belonging to user {document.user_id}"
+        )
+    
+    try:
+        # Determine the appropriate MIME type
+        mime_type = document.mime_type or 'application/octet-stream'
+        
+        # Return the file for viewing
+        return _send_document(
+            document,
+            mimetype=mime_type,
+            as_attachment=False,
+            download_name=document.original_filename or f"document_{doc_id}"
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error serving document: {str(e)}")
+        flash("An error occurred while trying to view the document.", "danger")
+        return redirect(url_for('auth.profile'))
+
+
+@bp.route('/documents/download/<int:doc_id>')
+@login_required
+def document_download(doc_id):
+    """
+    Download a document.
+    Enforces the same access controls as document_view.
+    """
+    document = UserDocument.query.get_or_404(doc_id)
+      # Security check: Only document owner or admin can download
+    if document.user_id != current_user.userId and current_user.roleId != Roles.ADMIN:
+        log_security_event(
+            event_type="unauthorized_download",
+            user_id=current_user.userId,
+            details=f"Unauthorized attempt to download document ID {doc_id} belonging to user {document.user_id}"
+        )
+        abort(403)
+    
+    # Check if file exists
+    if _document_file_missing(document):
+        flash("The requested file could not be found.", "danger")
+        return redirect(url_for('auth.profile'))
+      # Log download
+    if current_user.roleId == Roles.ADMIN and document.user_id != current_user.userId:
+        log_security_event(
+            event_type="document_download",
+            user_id=current_user.userId,
+            details=f"Admin downloaded document ID {doc_id} belonging to user {document.user_id}"
+        )
+    
+    try:
+        # Return the file for download
+        return _send_document(
+            document,
+            as_attachment=True,
+            download_name=document.original_filename or f"document_{doc_id}.{document.file_path.split('.')[-1]}"
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error serving document download: {str(e)}")
+        flash("An error occurred while trying to download the document.", "danger")
+        return redirect(url_for('auth.profile'))
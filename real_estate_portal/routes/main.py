@@ -0,0 +1,76 @@
+"""
+Main routes for the DreamHome Real Estate Portal.
+Home page, user dashboard and the static information pages.
+"""
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort
+from flask_login import login_required, current_user
+from models import PropertySummary, Roles
+from listing_queries import summary_query
+from jobs import job_queue
+
+bp = Blueprint('main', __name__)
+
+
+@bp.route('/')
+def index():
+    properties = summary_query(PropertySummary.isActive == True).limit(6).all()
+    return render_template('index.html', properties=properties)
+
+
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    if current_user.roleId == Roles.SELLER:  # Seller
+        properties = summary_query(PropertySummary.ownerId == current_user.userId).all()
+        return render_template('dashboard/seller.html', properties=properties)
+    elif current_user.roleId == Roles.BUYER:  # Buyer
+        favorites = current_user.favorites
+        return render_template('dashboard/buyer.html', favorites=favorites)
+    elif current_user.roleId == Roles.AGENT:  # Agent
+        # For now, just show all active properties since we don't have Listings
+        properties = summary_query(PropertySummary.isActive == True).all()
+        return render_template('dashboard/agent.html', properties=properties)
+    else:
+        return render_template('dashboard/admin.html')
+
+
+@bp.route('/api/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    """Report the progress of a background job started by the current user"""
+    job = job_queue.get(job_id)
+    if job is None or job['owner_id'] != current_user.userId:
+        abort(404)
+    return jsonify({key: job[key] for key in ('id', 'status', 'result', 'error')})
+
+
+@bp.route('/about')
+def about():
+    return render_template('pages/about.html')
+
+
+@bp.route('/contact', methods=['GET', 'POST'])
+def contact():
+    if request.method == 'POST':
+        # Handle contact form submission
+        name = request.form.get('name')
+        email = request.form.get('email')
+        phone = request.form.get('phone')
+        subject = request.form.get('subject')
+        message = request.form.get('message')
+        
+        # Here you would typically send an email or save to database
+        flash('Thank you for your message. We will get back to you soon!', 'success')
+        return redirect(url_for('main.contact'))
+        
+    return render_template('pages/contact.html')
+
+
+@bp.route('/terms')
+def terms():
+    return render_template('pages/terms.html')
+
+
+@bp.route('/privacy')
+def privacy():
+    return render_template('pages/privacy.html')
@@ -0,0 +1,643 @@
+"""
+Property listing routes for the DreamHome Real Estate Portal.
+Listing pages, property details, image uploads, favorites and adding,
+editing or deleting a user's own properties.
+"""
+import random
+from flask import (Blueprint, render_template, request, redirect, url_for,
+                   flash, jsonify, abort, current_app)
+from flask_login import login_required, current_user
+from models import db, Property, PropertyImages, PropertyAmenity, Roles, Favorites
+from forms import PropertyForm
+from search_engine import SearchCriteria
+from signals import property_changed, property_images_changed
+from reference_data import reference_data
+from utils import allowed_file, stage_upload
+from image_manifest import image_manifest, image_file_exists, image_file_path
+from image_variants import delete_image_files, stored_size, variant_url
+from blob_store import blob_store, file_digest, register_blob, store_image
+from jobs import FAILED, job_queue
+from chunked_uploads import InvalidUpload, register_purpose
+from fragment_cache import fragment_cache
+from conditional import conditional_listing, conditional_response, make_etag, owner_version
+from listing_queries import detail_load_options
+from pagination import paginate_with_cached_count
+
+bp = Blueprint('properties', __name__)
+
+
+def _check_image_owner(property_id):
+    property = Property.query.get_or_404(property_id)
+    if property.ownerId != current_user.userId and current_user.roleId != Roles.ADMIN:  # Allow owners and admins
+        abort(403)
+
+
+@bp.route('/upload/<int:property_id>', methods=['POST'])
+@login_required
+def upload_image(property_id):
+    _check_image_owner(property_id)
+    
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file selected'}), 400
+    
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    
+    if file and allowed_file(file.filename):
+        try:
+            return jsonify(queue_property_image(property_id, stage_upload(file))), 202
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    return jsonify({'error': 'Invalid file type'}), 400
+
+
+@bp.route('/upload/temp', methods=['POST'])
+@login_required
+def upload_temp_image():
+    """Upload image temporarily before property is created"""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file selected'}), 400
+    
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    
+    if file and allowed_file(file.filename):
+        try:
+            return jsonify(queue_temp_image(stage_upload(file))), 202
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    return jsonify({'error': 'Invalid file type'}), 400
+
+
+def queue_property_image(property_id, staged_path):
+    """
+    Start the background job turning a staged upload into a property image.
+
+    Args:
+        property_id (int): Property the image belongs to
+        staged_path (str): Uploaded file; removed by the job
+
+    Returns:
+        dict: Response body with the job id and the image's future URLs
+    """
+    # The resized variants are written by a background job into the image's blob
+    # (see blob_store.py), unless the same file was uploaded before; the upload itself is not kept
+    digest = file_digest(staged_path)
+    image_url = blob_store.image_url(digest)
+    job_id = job_queue.submit('property_image', staged_path, blob_store.images.spec, digest,
+                              context={'property_id': property_id, 'digest': digest},
+                              owner_id=current_user.userId)
+    
+    # The client polls statusUrl; the job result carries the new imageId
+    return {
+        'success': True,
+        'jobId': job_id,
+        'statusUrl': url_for('main.job_status', job_id=job_id),
+        'imageUrl': image_url,
+        'thumbnailUrl': variant_url(image_url, 'thumb')
+    }
+
+
+def queue_temp_image(staged_path):
+    """
+    Start the background job turning a staged upload into a temporary image
+    for a property that is still being created.
+
+    Args:
+        staged_path (str): Uploaded file; removed by the job
+
+    Returns:
+        dict: Response body with the job id and the image's temporary URLs
+    """
+    # A background job writes the resized variants into the image's blob; the
+    # blob is kept unreferenced until add_property() uses it (see blob_store.py)
+    digest = file_digest(staged_path)
+    image_url = blob_store.image_url(digest)
+    job_id = _temp_image_job_id(digest)
+    job_queue.submit('temp_image', staged_path, blob_store.images.spec, digest,
+                     context={'digest': digest}, owner_id=current_user.userId, job_id=job_id)
+    
+    # The image URL is posted back with the property form
+    return {
+        'success': True,
+        'jobId': job_id,
+        'statusUrl': url_for('main.job_status', job_id=job_id),
+        'imageUrl': image_url,
+        'thumbnailUrl': variant_url(image_url, 'thumb')
+    }
+
+
+def _temp_image_job_id(digest):
+    """Job id of a temporary image, derived so add_property() can look up its status"""
+    return f'{digest}_{current_user.userId}'
+
+
+def _authorize_chunked_image(fields):
+    property_id = fields.get('property_id')
+    if not isinstance(property_id, int):
+        raise InvalidUpload('property_id is required')
+    _check_image_owner(property_id)
+
+
+# Chunked uploads (see chunked_uploads.py) end in the same jobs as the form uploads above
+register_purpose('property_image', _authorize_chunked_image,
+                 lambda upload, path: (queue_property_image(upload['fields']['property_id'], path), 202))
+register_purpose('temp_image', lambda fields: None,
+                 lambda upload, path: (queue_temp_image(path), 202))
+
+
+@job_queue.task('property_image', store_image)
+def _save_property_image(details, property_id, digest):
+    """Record an image once its variants are written (finish of the 'property_image' job)"""
+    has_images = db.session.query(PropertyImages.imageId).filter_by(propertyId=property_id).first() is not None
+    image_url = blob_store.image_url(digest)
+    register_blob('image', digest, stored_size(details['variants']))
+    image = PropertyImages(
+        propertyId=property_id,
+        imageURL=image_url,
+        isPrimary=not has_images,  # Make first image primary
+        contentHash=digest,
+        **details
+    )
+    db.session.add(image)
+    db.session.commit()
+    property_images_changed.send(current_app._get_current_object(), property_id=property_id)
+    return {'imageId': image.imageId, 'imageUrl': image_url, 'thumbnailUrl': variant_url(image_url, 'thumb')}
+
+
+@job_queue.task('temp_image', store_image)
+def _temp_image_ready(details, digest):
+    """Record a temporary image's blob and report its variants (finish of the 'temp_image' job)"""
+    register_blob('image', digest, stored_size(details['variants']))
+    _complete_images(digest, details)
+    image_url = blob_store.image_url(digest)
+    return {'imageUrl': image_url, 'thumbnailUrl': variant_url(image_url, 'thumb'),
+            'width': details['width'], 'height': details['height']}
+
+
+def _complete_images(digest, details):
+    """
+    Fill in the size and variants of images attached by add_property()
+    while their blob was still being written, and commit.
+
+    Args:
+        digest (str): SHA-256 hex digest of the image blob
+        details (dict): Image description, see BlobStore.image_details()
+    """
+    images = PropertyImages.query.filter(PropertyImages.contentHash == digest,
+                                         PropertyImages.width.is_(None)).all()
+    for image in images:
+        image.width = details['width']
+        image.height = details['height']
+        image.variants = details['variants']
+    db.session.commit()
+    for property_id in {image.propertyId for image in images}:
+        property_images_changed.send(current_app._get_current_object(), property_id=property_id)
+
+
+@bp.route('/properties')
+@conditional_listing
+def properties():
+    criteria = SearchCriteria.from_args(request.args)
+    
+    # Pagination
+    page = request.args.get('page', 1, type=int)
+    properties = paginate_with_cached_count(criteria, page, per_page=9, summaries=True)
+    
+    # Get filter options
+    cities = reference_data.cities()
+    property_types = reference_data.property_types()
+    
+    return render_template('properties/list.html', 
+                         properties=properties,
+                         cities=cities,
+                         property_types=property_types)
+
+
+@bp.route('/property/<int:property_id>')
+def property_detail(property_id):
+    try:
+        property = db.session.get(Property, property_id)
+        if property is None:
+            abort(404)
+        
+        # Check if property is active or if the current user is admin or the property owner
+        can_manage = current_user.is_authenticated and \
+            (current_user.roleId == Roles.ADMIN or property.ownerId == current_user.userId)
+        if not property.isActive and not can_manage:
+            flash('This property is not currently active', 'warning')
+            return redirect(url_for('properties.properties'))
+        
+        is_favorite = current_user.is_authenticated and \
+            db.session.get(Favorites, (current_user.userId, property_id)) is not None
+        
+        # Repeat views of an unchanged property get a 304 before anything is rendered
+        owner = owner_version(property.ownerId)
+        etag = make_etag('property_detail', property_id, property.updatedAt, owner, is_favorite)
+        return conditional_response(
+            etag, property.updatedAt, lambda: _render_detail(property, owner, is_favorite, can_manage)
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error in property_detail route: {str(e)}", extra={'property_id': property_id})
+        flash('An error occurred while loading the property details', 'danger')
+        return redirect(url_for('properties.properties'))
+
+
+def _render_detail(property, owner, is_favorite, can_manage):
+    """Render a property detail page around its cached shared body"""
+    property_id = property.propertyId
+    
+    # Image files are verified when uploaded, so the cached manifest is used as is
+    images = image_manifest.images(property_id, property.updatedAt)
+    if current_app.config['PROPERTY_DETAIL_DEBUG']:
+        _log_image_diagnostics(property_id, images)
+    
+    # The page body is the same for every viewer and is rendered once per property version
+    detail_body = fragment_cache.get_or_render(
+        'detail', property_id, property.updatedAt, owner, lambda: _render_detail_body(property_id, images)
+    )
+    location = reference_data.location(property.locationId)
+    
+    return render_template('properties/detail.html', 
+                        property=property,
+                        detail_body=detail_body,
+                        type_name=reference_data.property_type_name(property.typeId),
+                        city=location.city if location else '',
+                        is_favorite=is_favorite,
+                        can_manage=can_manage)
+
+
+def _render_detail_body(property_id, images):
+    """Render the shared body of a property detail page"""
+    property = Property.query.options(*detail_load_options()) \
+        .execution_options(populate_existing=True).get(property_id)
+    return render_template('properties/partials/detail_body.html',
+                           property=property,
+                           images=images,
+                           amenities=property.amenities)
+
+
+def _log_image_diagnostics(property_id, images):
+    """
+    Log the stored image URLs of a property and whether their files exist.
+
+    Only called when PROPERTY_DETAIL_DEBUG is enabled, as it checks every
+    image file on the filesystem.
+
+    Args:
+        property_id (int): ID of the property being viewed
+        images (list): The property's image manifest
+    """
+    missing = [image['imageURL'] for image in images
+               if not image_file_exists(image_file_path(current_app.root_path, image['imageURL']))]
+    current_app.logger.info('Property detail image diagnostics', extra={
+        'property_id': property_id,
+        'image_count': len(images),
+        'image_urls': [image['imageURL'] for image in images],
+        'missing_files': missing,
+    })
+
+
+@bp.route('/add-property', methods=['GET', 'POST'])
+@login_required
+def add_property():
+    form = PropertyForm()
+    if form.validate_on_submit():
+        try:
+            # Add validation similar to edit_property
+            # Validate carpet area
+            carpet_area = form.carpet_area.data
+            max_area = 100000  # 100,000 sq.ft maximum
+            
+            if isinstance(carpet_area, str):
+                carpet_area = carpet_area.replace(',', '')
+                try:
+                    carpet_area = float(carpet_area)
+                except ValueError:
+                    raise ValueError("Invalid carpet area value")
+                    
+            if carpet_area <= 0 or carpet_area > max_area:
+                raise ValueError(f"Carpet area must be between 1 and {max_area} sq.ft")
+                
+            # Validate price
+            price = form.price.data
+            if isinstance(price, str):
+                price = price.replace(',', '')
+                try:
+                    price = float(price)
+                except ValueError:
+                    raise ValueError("Invalid price value")
+                    
+            # Validate maintenance charge if provided
+            maintenance = form.maintenance_charge.data
+            if maintenance and isinstance(maintenance, str):
+                maintenance = maintenance.replace(',', '')
+                try:
+                    maintenance = float(maintenance) if maintenance else None
+                except ValueError:
+                    raise ValueError("Invalid maintenance charge value")
+            
+            # Create new property with validated data
+            property = Property(
+                address=form.address.data,
+                ownerId=current_user.userId,
+                price=price,
+                carpetArea=carpet_area,
+                typeId=form.property_type.data,
+                locationId=form.location.data,
+                reraRegistered=form.rera_registered.data,
+                furnishingType=form.furnishing_type.data,
+                propertyAge=form.property_age.data,
+                ownershipType=form.ownership_type.data,
+                listingType=form.listing_type.data,
+                propertyCategory=form.property_category.data,
+                latitude=form.latitude.data,
+                longitude=form.longitude.data,
+                maintenanceCharge=maintenance,
+                totalFloors=form.total_floors.data,
+                floorNumber=form.floor_number.data,
+                waterSupply=form.water_supply.data,
+                facing=form.facing.data,
+                overlooking=form.overlooking.data,
+                powerBackup=form.power_backup.data,
+                description=form.description.data
+            )
+            db.session.add(property)
+            db.session.flush()  # Get the property ID without committing            # Save amenities
+            if form.amenities.data:
+                for amenity in form.amenities.data:
+                    prop_amenity = PropertyAmenity(
+                        propertyId=property.propertyId,
+                        amenityId=int(amenity)
+                    )
+                    db.session.add(prop_amenity)
+            
+            # Attach the images uploaded with the form; their blobs are referenced, not copied.
+            # An image whose background job is still writing the variants is attached
+            # now, and the job fills in its size and variants (see _temp_image_ready)
+            image_urls = request.form.getlist('images[]')
+            pending = set()
+            not_attached = []
+            for i, temp_url in enumerate(image_urls):
+                digest = blob_store.image_digest(temp_url)
+                if digest is None:
+                    not_attached.append(i + 1)
+                    continue
+                try:
+                    details = blob_store.image_details(digest)
+                    if details is None:
+                        job = job_queue.get(_temp_image_job_id(digest))
+                        if job is not None and job['status'] == FAILED:
+                            not_attached.append(i + 1)
+                            continue
+                        pending.add(digest)
+                        details = {}
+                    
+                    image = PropertyImages(
+                        propertyId=property.propertyId,
+                        imageURL=temp_url,
+                        isPrimary=(i == 0),  # First image is primary
+                        contentHash=digest,
+                        **details
+                    )
+                    db.session.add(image)
+                except Exception as e:
+                    current_app.logger.error(f"Error adding uploaded image: {str(e)}")
+                    not_attached.append(i + 1)
+            
+            db.session.commit()
+            
+            # A job that finished while the rows were being added had no rows to fill in
+            for digest in pending:
+                details = blob_store.image_details(digest)
+                if details is not None:
+                    _complete_images(digest, details)
+            
+            property_changed.send(current_app._get_current_object(), property_id=property.propertyId, property=property,
+                                  listing_types={property.listingType})
+            flash('Your property has been listed successfully!', 'success')
+            if not_attached:
+                current_app.logger.warning(f"Images {not_attached} not attached to property {property.propertyId}")
+                flash(f"Uploaded image(s) {', '.join(map(str, not_attached))} could not be processed and were "
+                      f"not attached; please upload them again from the property page", 'warning')
+            return redirect(url_for('properties.property_detail', property_id=property.propertyId))
+            
+        except ValueError as e:
+            db.session.rollback()
+            flash(f'Validation error: {str(e)}', 'danger')
+            return render_template('properties/add.html', form=form)
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error listing property: {str(e)}', 'danger')
+            return redirect(url_for('properties.add_property'))
+            
+    return render_template('properties/add.html', form=form)
+
+
+@bp.route('/favorite/<int:property_id>', methods=['POST'])
+@login_required
+def toggle_favorite(property_id):
+    favorite = Favorites.query.filter_by(
+        userId=current_user.userId,
+        propertyId=property_id
+    ).first()
+
+    if favorite:
+        db.session.delete(favorite)
+        db.session.commit()
+        return jsonify({'status': 'removed'})
+    else:
+        new_fav = Favorites(
+            userId=current_user.userId,
+            propertyId=property_id
+        )
+        db.session.add(new_fav)
+        db.session.commit()
+        return jsonify({'status': 'added'})
+
+
+@bp.route('/property/rera-check/<int:property_id>')
+def rera_check(property_id):
+    property = Property.query.get_or_404(property_id)
+    
+    # Mock RERA verification - integrate with real API
+    rera_status = {
+        'is_verified': property.reraRegistered,
+        'registration_number': 'RERA/' + property.location.state[:3].upper() + str(random.randint(1000, 9999)) if property.reraRegistered else None,
+        'builder_details': {
+            'name': 'Sample Builder' if property.reraRegistered else None,
+            'license': 'RERA/' + str(random.randint(100000, 999999)) if property.reraRegistered else None
+        }
+    }
+    
+    return render_template('property/rera_status.html', 
+                         property=property,
+                         rera_status=rera_status)
+
+
+@bp.route('/property/<int:property_id>/edit', methods=['GET', 'POST'])
+@login_required
+def edit_property(property_id):
+    property = Property.query.get_or_404(property_id)
+    
+    # Check if user is the owner
+    if property.ownerId != current_user.userId and current_user.roleId != Roles.ADMIN:
+        abort(403)
+        
+    form = PropertyForm()
+    
+    if request.method == 'GET':
+        # Manually populate the form with existing property data
+        form.address.data = property.address
+        form.price.data = property.price
+        form.carpet_area.data = property.carpetArea
+        form.property_type.data = property.typeId
+        form.location.data = property.locationId
+        form.furnishing_type.data = property.furnishingType
+        form.property_age.data = property.propertyAge
+        form.ownership_type.data = property.ownershipType
+        form.listing_type.data = property.listingType
+        form.property_category.data = property.propertyCategory
+        form.rera_registered.data = property.reraRegistered
+        form.latitude.data = property.latitude
+        form.longitude.data = property.longitude
+        form.maintenance_charge.data = property.maintenanceCharge
+        form.total_floors.data = property.totalFloors
+        form.floor_number.data = property.floorNumber
+        form.water_supply.data = property.waterSupply
+        form.facing.data = property.facing
+        form.overlooking.data = property.overlooking
+        form.power_backup.data = property.powerBackup
+        form.description.data = property.description
+        form.featured.data = property.isFeatured
+        
+        # Populate the amenities - get existing amenity IDs for this property
+        existing_amenities = [pa.amenityId for pa in PropertyAmenity.query.filter_by(propertyId=property_id).all()]
+        form.amenities.data = existing_amenities
+    
+    if form.validate_on_submit():
+        try:
+            # Get form data with validation
+            carpet_area = form.carpet_area.data
+            
+            # Validate carpet_area: ensure it's a reasonable number for a property
+            max_area = 100000  # 100,000 sq.ft is already extremely large
+            
+            # If carpet_area is a string (possibly with commas), clean it
+            if isinstance(carpet_area, str):
+                carpet_area = carpet_area.replace(',', '')
+                try:
+                    carpet_area = float(carpet_area)
+                except ValueError:
+                    raise ValueError("Invalid carpet area value")
+            
+            if carpet_area <= 0 or carpet_area > max_area:
+                raise ValueError(f"Carpet area must be between 1 and {max_area} sq.ft")
+                
+            # Similar validation for price and maintenance charge
+            price = form.price.data
+            if isinstance(price, str):
+                price = price.replace(',', '')
+                try:
+                    price = float(price)
+                except ValueError:
+                    raise ValueError("Invalid price value")
+                    
+            maintenance = form.maintenance_charge.data
+            if maintenance and isinstance(maintenance, str):
+                maintenance = maintenance.replace(',', '')
+                try:
+                    maintenance = float(maintenance) if maintenance else None
+                except ValueError:
+                    raise ValueError("Invalid maintenance charge value")
+            
+            # Update property with validated data
+            previous_listing_type = property.listingType
+            property.address = form.address.data
+            property.price = price
+            property.carpetArea = carpet_area
+            property.typeId = form.property_type.data
+            property.locationId = form.location.data
+            property.furnishingType = form.furnishing_type.data
+            property.propertyAge = form.property_age.data
+            property.ownershipType = form.ownership_type.data
+            property.listingType = form.listing_type.data
+            property.propertyCategory = form.property_category.data
+            property.reraRegistered = form.rera_registered.data
+            property.latitude = form.latitude.data
+            property.longitude = form.longitude.data
+            property.maintenanceCharge = maintenance
+            property.totalFloors = form.total_floors.data
+            property.floorNumber = form.floor_number.data
+            property.waterSupply = form.water_supply.data
+            property.facing = form.facing.data
+            property.overlooking = form.overlooking.data
+            property.powerBackup = form.power_backup.data
+            property.description = form.description.data
+            property.isFeatured = form.featured.data if form.featured else False
+            
+            # Update amenities
+            PropertyAmenity.query.filter_by(propertyId=property_id).delete()
+            if form.amenities.data:
+                for amenity_id in form.amenities.data:
+                    prop_amenity = PropertyAmenity(propertyId=property_id, amenityId=int(amenity_id))
+                    db.session.add(prop_amenity)
+            
+            db.session.commit()
+            property_changed.send(current_app._get_current_object(), property_id=property_id, property=property,
+                                  listing_types={previous_listing_type, property.listingType})
+            flash('Property updated successfully!', 'success')
+            return redirect(url_for('properties.property_detail', property_id=property_id))
+            
+        except ValueError as e:
+            db.session.rollback()
+            flash(f'Validation error: {str(e)}', 'danger')
+            return render_template('properties/add.html', form=form, edit_mode=True)
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error updating property: {str(e)}', 'danger')
+    
+    return render_template('properties/add.html', form=form, edit_mode=True)
+
+
+@bp.route('/property/<int:property_id>/delete', methods=['POST'])
+@login_required
+def delete_property(property_id):
+    property = Property.query.get_or_404(property_id)
+    
+    # Check if user is the owner
+    if property.ownerId != current_user.userId:
+        abort(403)
+    
+    try:
+        # Delete associated images first
+        # Shared blob images are removed once unreferenced (see blob_store.py)
+        for image in property.images:
+            try:
+                if image.contentHash is None:
+                    delete_image_files(current_app.root_path, image.imageURL)
+            except Exception as e:
+                print(f"Error deleting image file: {e}")
+        
+        # Delete property amenities
+        PropertyAmenity.query.filter_by(propertyId=property_id).delete()
+        
+        # Delete property from favorites
+        Favorites.query.filter_by(propertyId=property_id).delete()
+        
+        # Delete the property
+        listing_type = property.listingType
+        db.session.delete(property)
+        db.session.commit()
+        property_changed.send(current_app._get_current_object(), property_id=property_id, listing_types={listing_type})
+        
+        flash('Property has been deleted successfully', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error deleting property: {str(e)}', 'danger')
+    
+    return redirect(url_for('main.dashboard'))
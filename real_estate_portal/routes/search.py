@@ -0,0 +1,132 @@
+"""
+Search routes for the DreamHome Real Estate Portal.
+Search pages, the property search APIs and map search.
+"""
+from flask import Blueprint, render_template, request, url_for, jsonify, current_app
+from listing_queries import with_listing_relations, serialize_listing, serialize_map_marker
+from search_engine import SearchCriteria, build_search_query
+from reference_data import reference_data
+from conditional import conditional_listing
+from map_clusters import parse_viewport, map_contents, InvalidViewport
+from facets import facet_counts
+from pagination import (clamp_per_page, supports_keyset, keyset_paginate,
+                        paginate_with_cached_count, paginate_by_distance,
+                        approximate_count, InvalidCursor)
+
+bp = Blueprint('search', __name__)
+
+
+@bp.route('/search')
+def search():
+    criteria = SearchCriteria.from_args(request.args)
+    properties = build_search_query(criteria).limit(10).all()
+    return render_template('search/results.html', properties=properties, query=criteria.keyword or '')
+
+
+@bp.route('/api/properties/search', methods=['GET'])
+@conditional_listing
+def advanced_search():
+    criteria = SearchCriteria.from_args(request.args)
+    per_page = clamp_per_page(request.args.get('per_page'), default=50)
+    
+    # near=lat,lng&radius_km=: nearest first, with the distance of each result
+    if criteria.near:
+        page = paginate_by_distance(criteria, request.args.get('page', 1, type=int), per_page,
+                                    references=False)
+        return jsonify([dict(property.to_dict(), distance_km=round(page.distances[property.propertyId], 3))
+                        for property in page.items])
+    
+    # The response body is a bare list, so the next cursor travels in a header
+    if supports_keyset(criteria.sort):
+        try:
+            page = keyset_paginate(criteria, cursor=request.args.get('cursor'), per_page=per_page,
+                                   references=False)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        response = jsonify([property.to_dict() for property in page.items])
+        if page.next_cursor:
+            response.headers['X-Next-Cursor'] = page.next_cursor
+        return response
+    
+    results = with_listing_relations(build_search_query(criteria, eager=False), references=False) \
+        .limit(per_page).all()
+    return jsonify([property.to_dict() for property in results])
+
+
+@bp.route('/search')
+def search_page():
+    property_types = reference_data.property_types()
+    return render_template('search/advanced.html', property_types=property_types,
+                           amenities=reference_data.amenities())
+
+
+@bp.route('/api/properties/search')
+@conditional_listing
+def search_properties():
+    criteria = SearchCriteria.from_args(request.args)
+    
+    per_page = clamp_per_page(request.args.get('per_page'), default=9)
+    
+    # Cursor mode: send cursor= (empty for the first page) to page by keyset
+    if 'cursor' in request.args and supports_keyset(criteria.sort):
+        try:
+            page = keyset_paginate(criteria, cursor=request.args.get('cursor'), per_page=per_page,
+                                   references=False)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({
+            'properties': [serialize_listing(p) for p in page.items],
+            'next_cursor': page.next_cursor,
+            'has_next': page.has_next,
+            'total': approximate_count(criteria),
+            'total_is_approximate': True
+        })
+    
+    # Page-number mode; proximity searches (near=lat,lng&radius_km=) are nearest first
+    page = request.args.get('page', 1, type=int)
+    if criteria.near:
+        pagination = paginate_by_distance(criteria, page, per_page, references=False)
+        properties = [dict(serialize_listing(p), distance_km=round(pagination.distances[p.propertyId], 3))
+                      for p in pagination.items]
+    else:
+        pagination = paginate_with_cached_count(criteria, page, per_page, references=False)
+        properties = [serialize_listing(p) for p in pagination.items]
+    
+    return jsonify({
+        'properties': properties,
+        'total': pagination.total,
+        'pages': pagination.pages,
+        'current_page': pagination.page,
+        'has_next': pagination.has_next,
+        'has_prev': pagination.has_prev
+    })
+
+
+@bp.route('/api/properties/facets')
+@conditional_listing
+def property_facets():
+    # Counts per city, type, furnishing, facing, water supply, power backup and amenity
+    return jsonify(facet_counts(SearchCriteria.from_args(request.args)))
+
+
+@bp.route('/map-search')
+def map_search():
+    # Markers are fetched per viewport from /api/map/properties
+    return render_template('search/map.html', 
+                         api_key=current_app.config.get('MAPS_API_KEY', ''))
+
+
+@bp.route('/api/map/properties')
+@conditional_listing
+def map_properties():
+    try:
+        viewport = parse_viewport(request.args)
+    except InvalidViewport as e:
+        return jsonify({'error': str(e)}), 400
+    criteria = SearchCriteria.from_args(request.args)
+    
+    def serialize_marker(row):
+        url = url_for('properties.property_detail', property_id=row.propertyId)
+        return serialize_map_marker(row, url, row.image_url)
+    
+    return jsonify(map_contents(viewport, criteria, serialize_marker))
@@ -0,0 +1,340 @@
+"""
+Tool routes for the DreamHome Real Estate Portal.
+Budget finder, property comparison and the home loan calculators.
+"""
+import random
+from datetime import datetime
+from flask import (Blueprint, render_template, request, redirect, url_for,
+                   flash, session, current_app)
+from flask_login import login_required, current_user
+from models import db, Property, IndianLocation, PropertyAmenity
+from logging_config import log_security_event
+
+bp = Blueprint('tools', __name__)
+
+
+@bp.route('/tools/budget-finder')
+def budget_finder():
+    budget = request.args.get('budget', type=float)
+    city = request.args.get('city')
+    
+    if budget and city:
+        # Find properties within 10% of budget
+        min_price = budget * 0.9
+        max_price = budget * 1.1
+        
+        properties = Property.query.filter(
+            Property.price.between(min_price, max_price),
+            IndianLocation.city == city
+        ).join(IndianLocation).limit(10).all()
+        
+        return render_template('tools/budget_results.html',
+                            properties=properties,
+                            budget=budget,
+                            city=city)
+    
+    return render_template('tools/budget_finder.html')
+
+
+@bp.route('/loan/calculator', methods=['GET', 'POST'])
+def home_loan_calculator():
+    """
+    Simplified loan calculator route that redirects to the main calculator.
+    Maintained for backward compatibility with existing links.
+    """
+    return redirect(url_for('tools.loan_calculator'))
+
+
+@bp.route('/loan/apply', methods=['POST'])
+@login_required
+def apply_loan():
+    if not current_user.is_authenticated:
+        flash("Please log in to apply for a loan", "warning")
+        return redirect(url_for('auth.login', next=url_for('tools.loan_calculator')))
+        
+    try:
+        # Validate amount and convert to float
+        amount = 0
+        try:
+            amount = float(request.form['amount'])
+            if amount <= 0:
+                raise ValueError("Loan amount must be greater than zero")
+        except (ValueError, KeyError):
+            flash("Please enter a valid loan amount", "danger")
+            return redirect(url_for('tools.loan_calculator'))
+        
+        # Validate interest rate
+        rate = 0
+        try:
+            rate = float(request.form.get('rate', 0))
+            if rate <= 0:
+                raise ValueError("Interest rate must be greater than zero")
+        except (ValueError, KeyError):
+            flash("Please enter a valid interest rate", "danger")
+            return redirect(url_for('tools.loan_calculator'))
+            
+        # Validate tenure
+        tenure = 0
+        try:
+            tenure = int(request.form.get('tenure', 0))
+            if tenure <= 0:
+                raise ValueError("Loan tenure must be greater than zero")
+        except (ValueError, KeyError):
+            flash("Please enter a valid loan tenure", "danger")
+            return redirect(url_for('tools.loan_calculator'))
+            
+        # Generate reference ID safely
+        reference_id = f"LOAN{random.randint(100000, 999999)}"
+          # Log loan application for security/audit
+        log_security_event(
+            event_type="loan_application",
+            details=f"Loan application submitted: Amount={amount}, Rate={rate}%, Tenure={tenure} years",
+            user_id=current_user.userId
+        )
+        
+        # Mock approval with safety checks - in real app, this would call a loan approval service
+        # Apply a simple heuristic for demo - higher amounts have more conservative approval
+        if amount > 10000000:  # > 1 crore
+            max_amount = amount * 0.8  # 80% approval for large loans
+        elif amount > 5000000:  # > 50 lakhs
+            max_amount = amount * 0.9  # 90% approval for medium loans
+        else:
+            max_amount = amount * 1.2  # 120% approval for small loans
+        
+        # Create response data
+        bank_response = {
+            'status': 'pre_approved',
+            'reference_id': reference_id,
+            'requested_amount': amount,
+            'max_amount': max_amount,
+            'rate': rate,
+            'tenure': tenure,
+            'user_id': current_user.userId,
+            'application_date': datetime.now()        }
+        
+        return render_template('loan/application_result.html', result=bank_response)
+    except Exception as e:
+        log_security_event(
+            event_type="loan_application_error",
+            details=f"Error during loan application: {str(e)}",
+            user_id=current_user.userId if current_user.is_authenticated else None
+        )
+        flash(f"Error processing loan application: {str(e)}", "danger")
+        return redirect(url_for('tools.loan_calculator'))
+
+
+@bp.route('/tools/compare')
+def compare_properties():
+    """
+    Compare multiple properties side by side.
+    Handles adding, removing, and displaying properties for comparison.
+    Limits comparison to maximum of 3 properties.
+    """
+    # Get property IDs from session or query parameters - create a new list instead of directly referencing
+    properties_to_compare = session.get('compare_list', [])
+    if not isinstance(properties_to_compare, list):
+        properties_to_compare = []
+    else:
+        # Create a new copy to avoid direct modification of the session object
+        properties_to_compare = properties_to_compare.copy()
+    
+    MAX_PROPERTIES = 3  # Maximum number of properties to compare
+    
+    # Handle adding new property to comparison
+    if add_id := request.args.get('add'):
+        try:
+            add_id_int = int(add_id)
+            # Check if property exists
+            property_exists = Property.query.get(add_id_int) is not None
+            
+            if property_exists and len(properties_to_compare) < MAX_PROPERTIES and add_id_int not in properties_to_compare:
+                # Append to our copy, not directly to the session object
+                properties_to_compare.append(add_id_int)
+                # Then update the session with the new list
+                session['compare_list'] = properties_to_compare
+                flash('Property added to comparison', 'success')
+            elif not property_exists:
+                flash('Property not found', 'danger')
+            elif add_id_int in properties_to_compare:
+                flash('Property is already in comparison', 'info')
+            elif len(properties_to_compare) >= MAX_PROPERTIES:
+                flash(f'You can compare a maximum of {MAX_PROPERTIES} properties', 'warning')
+        except ValueError:
+            flash('Invalid property ID', 'danger')
+    
+    # Handle removing property from comparison
+    if remove_id := request.args.get('remove'):
+        try:
+            remove_id_int = int(remove_id)
+            if remove_id_int in properties_to_compare:
+                # Remove from our copy, not directly from the session object
+                properties_to_compare.remove(remove_id_int)
+                # Then update the session with the new list
+                session['compare_list'] = properties_to_compare
+                flash('Property removed from comparison', 'info')
+        except ValueError:
+            flash('Invalid property ID', 'danger')
+    
+    # Handle clearing all properties
+    if request.args.get('clear') == 'all':
+        properties_to_compare = []
+        session['compare_list'] = []
+        flash('Comparison list cleared', 'info')
+    
+    # Fetch property details for comparison with eager loading of relationships
+    properties = []
+    if properties_to_compare:
+        try:
+            properties = Property.query\
+                .options(db.joinedload(Property.property_type))\
+                .options(db.joinedload(Property.location))\
+                .options(db.joinedload(Property.images))\
+                .options(db.joinedload(Property.amenities).joinedload(PropertyAmenity.amenity))\
+                .filter(Property.propertyId.in_(properties_to_compare))\
+                .all()
+                
+            # Maintain the order from properties_to_compare list
+            properties.sort(key=lambda p: properties_to_compare.index(p.propertyId))
+        except Exception as e:
+            current_app.logger.error(f"Error fetching properties for comparison: {str(e)}")
+            flash('Error loading properties for comparison', 'danger')
+    
+    return render_template('tools/compare.html', properties=properties)
+
+
+@bp.route('/tools/loan-calculator', methods=['GET', 'POST'])
+def loan_calculator():
+    def clean_numeric_input(value):
+        """Remove commas and other formatting from numeric input"""
+        if not value:
+            return 0
+        # Remove commas and any non-numeric characters except decimal point
+        cleaned = str(value).replace(',', '').replace(' ', '')
+        try:
+            return float(cleaned)
+        except ValueError:
+            raise ValueError(f"Invalid numeric value: {value}")
+    
+    if request.method == 'POST':
+        try:
+            # Get and validate form inputs with fallbacks for optional fields
+            amount = clean_numeric_input(request.form['amount'])
+            tenure = int(request.form['tenure'])
+            rate = float(request.form['rate'])
+            down_payment = clean_numeric_input(request.form.get('down_payment') or 0)
+            
+            # Validate inputs
+            if amount <= 0 or tenure <= 0 or rate <= 0 or down_payment < 0 or down_payment >= amount:
+                raise ValueError("Invalid input parameters")
+            
+            # Calculate loan amount after down payment
+            principal = amount - down_payment
+            
+            # Convert annual rate to monthly and years to months (once)
+            monthly_rate = rate / 1200  # Divide by 12 and 100 in one go
+            tenure_months = tenure * 12
+            
+            # Calculate EMI using the formula efficiently
+            rate_factor = (1 + monthly_rate) ** tenure_months
+            emi = principal * monthly_rate * rate_factor / (rate_factor - 1)
+            
+            # Calculate derived values
+            total_payment = emi * tenure_months
+            total_interest = total_payment - principal
+            
+            # Calculate percentages (rounded to 1 decimal place)
+            interest_percent = round((total_interest / total_payment) * 100, 1)
+            principal_percent = round((principal / total_payment) * 100, 1)
+              # Calculate yearly amortization with correct formulas
+            amortization = []
+            remaining_balance = principal
+            
+            for year in range(1, tenure + 1):
+                start_balance = remaining_balance
+                yearly_payment = emi * 12
+                yearly_interest = 0
+                yearly_principal = 0
+                
+                # Calculate monthly payments for this year to get accurate yearly totals
+                for month in range(12):
+                    if remaining_balance <= 0:
+                        break
+                    
+                    # Monthly interest on remaining balance
+                    monthly_interest = remaining_balance * monthly_rate
+                    # Monthly principal payment
+                    monthly_principal = emi - monthly_interest
+                    
+                    # Accumulate yearly totals
+                    yearly_interest += monthly_interest
+                    yearly_principal += monthly_principal
+                    
+                    # Update remaining balance
+                    remaining_balance -= monthly_principal
+                
+                # Ensure we don't go negative due to rounding
+                remaining_balance = max(0, remaining_balance)
+                
+                amortization.append({
+                    'year': year,
+                    'principal_paid': yearly_principal,
+                    'interest_paid': yearly_interest,
+                    'total_payment': yearly_principal + yearly_interest,
+                    'balance': max(0, remaining_balance)
+                })
+
+            # Cache the result in session for potential reuse
+            session['last_loan_calculation'] = {
+                'inputs': {
+                    'amount': amount,
+                    'tenure': tenure,
+                    'rate': rate,
+                    'down_payment': down_payment
+                },
+                'results': {
+                    'emi': emi,
+                    'total_payment': total_payment,
+                    'total_interest': total_interest,
+                    'interest_percent': interest_percent,
+                    'principal_percent': principal_percent
+                }
+            }
+
+            return render_template('tools/loan_calculator.html', 
+                                form_data={
+                                    'amount': amount,
+                                    'tenure': tenure,
+                                    'rate': rate,
+                                    'down_payment': down_payment
+                                },
+                                emi=emi,
+                                total_payment=total_payment,
+                                total_interest=total_interest,
+                                interest_percent=interest_percent,
+                                principal_percent=principal_percent,
+                                amortization=amortization,
+                                calculated=True)
+        except (ValueError, ZeroDivisionError, KeyError) as e:
+            flash(f'Please enter valid numeric values for all fields: {str(e)}', 'error')
+            return render_template('tools/loan_calculator.html')
+    
+    # Check if we have property_id and amount from a redirect
+    property_id = request.args.get('property_id')
+    amount = request.args.get('amount')
+    
+    if property_id and amount:
+        # Pre-populate form for a specific property
+        try:
+            property_amount = float(amount)
+            default_down_payment = property_amount * 0.2  # 20% down payment
+            return render_template('tools/loan_calculator.html', 
+                                form_data={
+                                    'amount': property_amount,
+                                    'down_payment': default_down_payment,
+                                    'tenure': 20,  # Default 20 years
+                                    'rate': 8.5    # Default 8.5% interest
+                                })
+        except ValueError:
+            pass
+    
+    return render_template('tools/loan_calculator.html')
@@ -0,0 +1,86 @@
+"""
+Chunked upload routes for the DreamHome Real Estate Portal.
+Start, append to, resume, finalize and abort resumable uploads of property
+images and documents; see chunked_uploads.py for the protocol.
+"""
+from flask import Blueprint, request, jsonify, abort, current_app
+from flask_login import login_required, current_user
+from chunked_uploads import (InvalidUpload, OffsetMismatch, ChecksumMismatch, UploadGone, start_upload,
+                             load_upload, upload_offset, append_chunk, finish_upload, discard_upload)
+
+bp = Blueprint('uploads', __name__)
+
+
+def _describe(upload, offset):
+    return {
+        'uploadId': upload['id'],
+        'offset': offset,
+        'size': upload['size'],
+        'chunkSize': current_app.config['CHUNKED_UPLOAD_CHUNK_SIZE'],
+    }
+
+
+def _owned_upload(upload_id):
+    upload = load_upload(upload_id, current_user.userId)
+    if upload is None:
+        abort(404)
+    return upload
+
+
+@bp.route('/api/uploads', methods=['POST'])
+@login_required
+def start_chunked_upload():
+    fields = request.get_json(silent=True) or {}
+    try:
+        upload = start_upload(current_user.userId, fields)
+    except InvalidUpload as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(_describe(upload, 0)), 201
+
+
+@bp.route('/api/uploads/<upload_id>', methods=['GET'])
+@login_required
+def chunked_upload_status(upload_id):
+    """Where to resume an upload, e.g. after a dropped connection"""
+    upload = _owned_upload(upload_id)
+    return jsonify(_describe(upload, upload_offset(upload)))
+
+
+@bp.route('/api/uploads/<upload_id>', methods=['PATCH'])
+@login_required
+def append_upload_chunk(upload_id):
+    upload = _owned_upload(upload_id)
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'Upload-Offset header is required'}), 400
+    
+    # The body is read from request.stream, never parsed or buffered as a form
+    try:
+        new_offset = append_chunk(upload, offset, request.stream, request.headers.get('Upload-Checksum'))
+    except OffsetMismatch as e:
+        return jsonify({'error': str(e), 'offset': e.offset}), 409
+    except ChecksumMismatch as e:
+        return jsonify({'error': str(e), 'offset': offset}), 422
+    except InvalidUpload as e:
+        return jsonify({'error': str(e), 'offset': offset}), 400
+    return jsonify(_describe(upload, new_offset))
+
+
+@bp.route('/api/uploads/<upload_id>/finalize', methods=['POST'])
+@login_required
+def finalize_chunked_upload(upload_id):
+    upload = _owned_upload(upload_id)
+    try:
+        body, status = finish_upload(upload)
+    except UploadGone:
+        abort(404)
+    except InvalidUpload as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(body), status
+
+
+@bp.route('/api/uploads/<upload_id>', methods=['DELETE'])
+@login_required
+def abort_chunked_upload(upload_id):
+    discard_upload(_owned_upload(upload_id))
+    return jsonify({'success': True})
@@ -0,0 +1,131 @@
+"""
+Search result cache for the DreamHome Real Estate Portal.
+Caches the property ids and counts produced by a search, keyed on the
+normalized criteria hash plus the page position, so popular filter
+combinations skip the filtered and sorted query. Listings are still loaded
+by primary key on every request, so prices, images and amenities shown on
+a page are never stale.
+
+Entries are partitioned by listing type. When a property changes, the
+generation of its old and new listing types (and of searches without a
+listing type filter) is bumped; entries of other listing types stay valid.
+
+Generations live in the backend, so with Redis a bump made by one worker
+is seen by all of them. The memory backend only sees its own worker's
+bumps, so its keys also embed the listing change version read from the
+database (conditional.listing_version): any change made by any worker
+moves every worker to new keys, and a page is never served under a
+listing ETag newer than the data it was cached from.
+
+Backends (SEARCH_CACHE_BACKEND):
+- 'memory': per-process LRU with TTL
+- 'redis': shared by every worker, at SEARCH_CACHE_REDIS_URL
+- 'null': caching disabled
+"""
+from cache_backends import MemoryBackend, NullBackend, create_backend
+from conditional import request_listing_version
+from signals import property_changed
+
+# Partition of searches that do not filter on listing type
+ALL_LISTING_TYPES = '*'
+
+
+class SearchCache:
+    """
+    Flask extension caching search results by criteria hash.
+    Invalidated through the property_changed signal.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.backend = NullBackend()
+        self.ttl = 60
+        self.per_process = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SEARCH_CACHE_BACKEND', 'memory')
+        app.config.setdefault('SEARCH_CACHE_TTL', 60)
+        app.config.setdefault('SEARCH_CACHE_MAX_ENTRIES', 2048)
+        app.config.setdefault('SEARCH_CACHE_REDIS_URL', None)
+
+        self.backend = create_backend(
+            app.config['SEARCH_CACHE_BACKEND'],
+            max_entries=app.config['SEARCH_CACHE_MAX_ENTRIES'],
+            redis_url=app.config['SEARCH_CACHE_REDIS_URL'],
+            prefix='dreamhome:search:'
+        )
+        self.ttl = app.config['SEARCH_CACHE_TTL']
+        # Per-process generations miss other workers' bumps, see the module docstring
+        self.per_process = isinstance(self.backend, MemoryBackend)
+
+        property_changed.connect(self._on_property_changed, weak=False)
+
+    def key(self, namespace, criteria, *position):
+        """
+        Build the cache key of a search result.
+
+        The key embeds the current generation of the criteria's listing type
+        partition (and, per process, the listing change version), so
+        invalidation never has to find and delete entries.
+
+        Args:
+            namespace (str): Kind of result, e.g. 'page' or 'count'
+            criteria (SearchCriteria): Search criteria
+            *position: Page number, cursor, page size...
+
+        Returns:
+            str: Cache key
+        """
+        partition = criteria.listing_type or ALL_LISTING_TYPES
+        generation = self.backend.generation(partition)
+        parts = [namespace, partition, str(generation), criteria.cache_key()]
+        if self.per_process:
+            deletes, last_modified = request_listing_version()
+            parts.append(f'{deletes or 0}@{last_modified.isoformat() if last_modified else ""}')
+        return ':'.join(parts + [str(part) for part in position])
+
+    def get_or_set(self, namespace, criteria, compute, *position, ttl=None):
+        """
+        Get a cached search result, computing and storing it on a miss.
+
+        The key is taken before computing, so a result that raced with a
+        property change is stored under the old generation and never served.
+
+        Args:
+            namespace (str): Kind of result, e.g. 'page' or 'count'
+            criteria (SearchCriteria): Search criteria
+            compute (callable): Produces the JSON-serializable result
+            *position: Page number, cursor, page size...
+            ttl (int): Lifetime in seconds (defaults to SEARCH_CACHE_TTL)
+
+        Returns:
+            The cached or freshly computed result
+        """
+        key = self.key(namespace, criteria, *position)
+        value = self.backend.get(key)
+        if value is None:
+            value = compute()
+            self.backend.set(key, value, ttl or self.ttl)
+        return value
+
+    def invalidate(self, listing_types=()):
+        """
+        Drop cached results that a change to properties of these listing types can affect.
+
+        Args:
+            listing_types (iterable): Listing types before and after the change
+        """
+        partitions = {ALL_LISTING_TYPES} | {listing_type for listing_type in listing_types if listing_type}
+        self.backend.bump(partitions)
+
+    def clear(self):
+        """Drop every cached result"""
+        self.backend.clear()
+
+    def _on_property_changed(self, sender, listing_types=(), **kwargs):
+        self.invalidate(listing_types)
+
+
+search_cache = SearchCache()
@@ -0,0 +1,343 @@
+"""
+Property search engine for the DreamHome Real Estate Portal.
+Parses search parameters into a typed criteria object once and compiles it
+into a single SQLAlchemy query shared by every search and listing route.
+
+Usage:
+    criteria = SearchCriteria.from_args(request.args)
+    pagination = build_search_query(criteria).paginate(page=1, per_page=9)
+"""
+import hashlib
+import json
+from dataclasses import dataclass, asdict, replace
+from sqlalchemy import func, or_, select
+from models import Property, IndianLocation, PropertyAmenity
+from listing_queries import with_listing_relations
+from text_search import keyword_search
+from geo_search import near_filters
+
+SORT_OPTIONS = ('newest', 'price_low', 'price_high', 'area', 'relevance', 'distance')
+
+# Request parameter aliases used by the different search forms
+_PARAM_ALIASES = {
+    'type_id': ('type', 'type_id'),
+    'ownership': ('ownership', 'ownership_type'),
+}
+
+
+def _parse_float(value):
+    """Parse a float from a query string value, ignoring bad input"""
+    if value in (None, ''):
+        return None
+    try:
+        return float(str(value).replace(',', ''))
+    except ValueError:
+        return None
+
+
+def _parse_int(value):
+    """Parse an int from a query string value, ignoring bad input"""
+    number = _parse_float(value)
+    return int(number) if number is not None else None
+
+
+def _parse_point(value):
+    """Parse a "lat,lng" query string value, ignoring bad or out of range input"""
+    parts = str(value or '').split(',')
+    if len(parts) != 2:
+        return None
+    latitude, longitude = _parse_float(parts[0]), _parse_float(parts[1])
+    if latitude is None or longitude is None:
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+def _parse_str(value):
+    """Normalize a free-text query string value"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+@dataclass(frozen=True)
+class SearchCriteria:
+    """
+    Normalized property search criteria.
+
+    Every field is optional; None means "no filter". Instances are immutable
+    and hashable so they can be used as cache keys.
+    """
+    keyword: str = None          # Full-text match on address/description/overlooking, or city/state
+    location: str = None         # Matches city or state
+    city: str = None
+    locality: str = None         # Matches address
+    type_id: int = None
+    category: str = None
+    listing_type: str = None
+    ownership: str = None
+    property_age: str = None
+    furnishing: str = None
+    facing: str = None
+    water_supply: str = None
+    power_backup: str = None
+    min_price: float = None
+    max_price: float = None
+    min_area: float = None
+    max_area: float = None
+    min_floor: int = None
+    max_floor: int = None
+    amenities: tuple = ()
+    rera_registered: bool = False
+    near: tuple = None           # (latitude, longitude); results are within radius_km of it
+    radius_km: float = None      # Defaults to GEO_SEARCH_DEFAULT_RADIUS_KM
+    active_only: bool = True
+    sort: str = 'newest'
+
+    @classmethod
+    def from_args(cls, args, **overrides):
+        """
+        Build criteria from request arguments.
+
+        Args:
+            args: Request args (MultiDict or dict)
+            **overrides: Field values that take precedence over args
+
+        Returns:
+            SearchCriteria: Parsed criteria; malformed numbers are ignored
+        """
+        def first(name):
+            for key in _PARAM_ALIASES.get(name, (name,)):
+                if args.get(key) not in (None, ''):
+                    return args.get(key)
+            return None
+
+        if hasattr(args, 'getlist'):
+            raw_amenities = args.getlist('amenities')
+        else:
+            raw_amenities = args.get('amenities') or []
+            if not isinstance(raw_amenities, (list, tuple)):
+                raw_amenities = [raw_amenities]
+        amenities = tuple(sorted({a for a in (_parse_int(v) for v in raw_amenities) if a is not None}))
+
+        keyword = _parse_str(args.get('q'))
+        near = _parse_point(args.get('near'))
+        sort = args.get('sort') or ('relevance' if keyword else 'newest')
+        if sort not in SORT_OPTIONS:
+            sort = 'newest'
+        # Proximity searches are always ranked by distance, and only they can be
+        if near:
+            sort = 'distance'
+        elif sort == 'distance':
+            sort = 'newest'
+
+        values = dict(
+            keyword=keyword,
+            location=_parse_str(first('location')),
+            city=_parse_str(first('city')),
+            locality=_parse_str(first('locality')),
+            type_id=_parse_int(first('type_id')),
+            category=_parse_str(first('category')),
+            listing_type=_parse_str(first('listing_type')),
+            ownership=_parse_str(first('ownership')),
+            property_age=_parse_str(first('property_age')),
+            furnishing=_parse_str(first('furnishing')),
+            facing=_parse_str(first('facing')),
+            water_supply=_parse_str(first('water_supply')),
+            power_backup=_parse_str(first('power_backup')),
+            min_price=_parse_float(first('min_price')),
+            max_price=_parse_float(first('max_price')),
+            min_area=_parse_float(first('min_area')),
+            max_area=_parse_float(first('max_area')),
+            min_floor=_parse_int(first('min_floor')),
+            max_floor=_parse_int(first('max_floor')),
+            amenities=amenities,
+            rera_registered='rera_registered' in args,
+            near=near,
+            radius_km=_parse_float(args.get('radius_km')) if near else None,
+            sort=sort,
+        )
+        values.update(overrides)
+        return cls(**values)
+
+    def with_changes(self, **changes):
+        """Return a copy of the criteria with some fields replaced"""
+        return replace(self, **changes)
+
+    def to_dict(self):
+        """
+        Get the criteria fields that are actually set.
+
+        Returns:
+            dict: Field name to value, omitting unset filters
+        """
+        defaults = SearchCriteria()
+        return {
+            name: value for name, value in asdict(self).items()
+            if value != getattr(defaults, name)
+        }
+
+    def cache_key(self):
+        """
+        Get a stable hash of the criteria.
+
+        Two requests that parse to the same criteria share the same key,
+        whatever parameter names or ordering they used.
+
+        Returns:
+            str: Hex digest identifying these criteria
+        """
+        payload = json.dumps(self.to_dict(), sort_keys=True, default=list)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _location_ids(*conditions):
+    """Subquery of location ids matching any of the given conditions"""
+    return select(IndianLocation.locationId).where(or_(*conditions))
+
+
+def _with_all_amenities(amenity_ids):
+    """
+    Subquery of the properties that have every one of the given amenities.
+
+    One grouped lookup on the (amenityId, propertyId) index, whatever the
+    number of amenities: rows for any of them are grouped per property and
+    only properties with all k distinct amenities are kept.
+    """
+    return (
+        select(PropertyAmenity.propertyId)
+        .where(PropertyAmenity.amenityId.in_(amenity_ids))
+        .group_by(PropertyAmenity.propertyId)
+        .having(func.count(PropertyAmenity.amenityId.distinct()) == len(amenity_ids))
+    )
+
+
+def build_filters(criteria, keyword_match=None):
+    """
+    Compile criteria into SQL filter expressions on Property.
+
+    Location and amenity filters are expressed as subqueries so the main
+    statement never needs extra joins, which keeps it compatible with the
+    listing layer's eager loading.
+
+    Args:
+        criteria (SearchCriteria): Search criteria
+        keyword_match (tuple): Precomputed keyword_search() result, if any
+
+    Returns:
+        list: SQLAlchemy boolean expressions
+    """
+    c = criteria
+    filters = []
+
+    if c.active_only:
+        filters.append(Property.isActive == True)
+
+    if c.keyword:
+        keyword_filter, _ = keyword_match or keyword_search(c.keyword)
+        filters.append(keyword_filter)
+    if c.location:
+        pattern = f'%{c.location}%'
+        filters.append(Property.locationId.in_(_location_ids(
+            IndianLocation.city.ilike(pattern),
+            IndianLocation.state.ilike(pattern)
+        )))
+    if c.city:
+        filters.append(Property.locationId.in_(_location_ids(
+            IndianLocation.city.ilike(f'%{c.city}%')
+        )))
+    if c.locality:
+        filters.append(Property.address.ilike(f'%{c.locality}%'))
+
+    if c.min_price is not None:
+        filters.append(Property.price >= c.min_price)
+    if c.max_price is not None:
+        filters.append(Property.price <= c.max_price)
+    if c.min_area is not None:
+        filters.append(Property.carpetArea >= c.min_area)
+    if c.max_area is not None:
+        filters.append(Property.carpetArea <= c.max_area)
+    if c.min_floor is not None:
+        filters.append(Property.floorNumber >= c.min_floor)
+    if c.max_floor is not None:
+        filters.append(Property.floorNumber <= c.max_floor)
+
+    if c.type_id is not None:
+        filters.append(Property.typeId == c.type_id)
+
+    equality_filters = (
+        (c.category, Property.propertyCategory),
+        (c.listing_type, Property.listingType),
+        (c.ownership, Property.ownershipType),
+        (c.property_age, Property.propertyAge),
+        (c.furnishing, Property.furnishingType),
+        (c.facing, Property.facing),
+        (c.water_supply, Property.waterSupply),
+        (c.power_backup, Property.powerBackup),
+    )
+    for value, column in equality_filters:
+        if value:
+            filters.append(column == value)
+
+    # A property must have every requested amenity
+    if c.amenities:
+        filters.append(Property.propertyId.in_(_with_all_amenities(c.amenities)))
+
+    if c.rera_registered:
+        filters.append(Property.reraRegistered == True)
+
+    # Candidates only; geo_search.rank_by_distance() applies the exact radius
+    if c.near:
+        filters.extend(near_filters(c))
+
+    return filters
+
+
+def sort_columns(sort):
+    """
+    Get the ORDER BY clause for a sort option.
+
+    propertyId breaks ties so the order is total, which keyset pagination
+    relies on. Relevance ordering needs the keyword score and is handled by
+    build_search_query(), and distance ordering is done in Python by
+    pagination.paginate_by_distance(); here both fall back to newest first.
+
+    Args:
+        sort (str): One of SORT_OPTIONS
+
+    Returns:
+        tuple: SQLAlchemy order-by expressions
+    """
+    if sort == 'price_low':
+        return Property.price.asc(), Property.propertyId.asc()
+    if sort == 'price_high':
+        return Property.price.desc(), Property.propertyId.desc()
+    if sort == 'area':
+        return Property.carpetArea.desc(), Property.propertyId.desc()
+    return Property.createdAt.desc(), Property.propertyId.desc()
+
+
+def build_search_query(criteria, eager=True):
+    """
+    Compile criteria into a single Property query.
+
+    Args:
+        criteria (SearchCriteria): Search criteria
+        eager (bool): Eagerly load listing relations (type, location,
+            images, amenities) for rendering
+
+    Returns:
+        Query: Filtered and ordered Property query
+    """
+    keyword_match = keyword_search(criteria.keyword) if criteria.keyword else None
+
+    order_by = sort_columns(criteria.sort)
+    if criteria.sort == 'relevance' and keyword_match is not None:
+        order_by = (keyword_match[1].desc(),) + order_by
+
+    query = Property.query.filter(*build_filters(criteria, keyword_match)).order_by(*order_by)
+    if eager:
+        query = with_listing_relations(query)
+    return query
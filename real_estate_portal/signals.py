@@ -0,0 +1,28 @@
+"""
+Application signals for the DreamHome Real Estate Portal.
+Lets caches and indexes react to data changes without the routes knowing
+about each of them.
+
+Usage:
+    property_changed.send(app, property_id=5001, property=property,
+                          listing_types={'Sell'})
+
+Receivers of property_changed get the id of the changed property, the
+Property itself (None when it was deleted) and every listing type the
+property had before or after the change. reference_data_changed is sent
+after property types, locations, amenities or roles are edited; its
+receivers may write to the sender's session, and the sender commits after
+sending it.
+user_changed is sent with the user_id of a user whose role, status or
+profile changed. property_images_changed is sent with the property_id of a
+property whose images were added or removed outside a property_changed
+update.
+"""
+from blinker import Namespace
+
+_signals = Namespace()
+
+property_changed = _signals.signal('property-changed')
+reference_data_changed = _signals.signal('reference-data-changed')
+user_changed = _signals.signal('user-changed')
+property_images_changed = _signals.signal('property-images-changed')
@@ -0,0 +1,112 @@
+"""
+Cold-start benchmark for the DreamHome Real Estate Portal.
+Starts fresh Python processes that import the app module and call
+create_app(), and reports how long each step takes. Exits with status 1
+when the median cold start is over the budget, so it can run in CI.
+
+Nothing here touches the database; DATABASE_URL only has to be set.
+
+Usage:
+    python startup_benchmark.py                  # 5 runs, 1500 ms budget
+    python startup_benchmark.py --runs 10 --budget-ms 800
+    python startup_benchmark.py --top 15         # also list the slowest imports
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Default budget for import + create_app(), in milliseconds
+DEFAULT_BUDGET_MS = 1500
+
+# Runs in the child process; prints the timings as JSON
+PROBE = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'create_ms': (created - imported) * 1000}))
+"""
+
+
+def measure_cold_start():
+    """
+    Time one cold start in a new interpreter.
+
+    Returns:
+        dict: import_ms, create_ms, startup_ms (import + create) and
+              process_ms (wall time including interpreter start-up)
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    )
+    process_ms = (time.perf_counter() - start) * 1000
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['startup_ms'] = timings['import_ms'] + timings['create_ms']
+    timings['process_ms'] = process_ms
+    return timings
+
+
+def slowest_imports(limit):
+    """
+    List the modules with the largest cumulative import time during a cold start.
+
+    Args:
+        limit (int): Number of modules to return
+
+    Returns:
+        list: (cumulative_ms, module name) tuples, slowest first
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app; app.create_app()'],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((int(cumulative) / 1000, name.strip()))
+    modules.sort(reverse=True)
+    return modules[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the cold-start time of the application.')
+    parser.add_argument('--runs', type=int, default=5, help='Number of cold starts to time')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help='Maximum median import + create_app() time')
+    parser.add_argument('--top', type=int, default=0, help='Also list the N slowest imports')
+    args = parser.parse_args()
+
+    runs = [measure_cold_start() for _ in range(args.runs)]
+    for field, label in (('import_ms', 'import app'), ('create_ms', 'create_app()'),
+                         ('startup_ms', 'total'), ('process_ms', 'process')):
+        values = [run[field] for run in runs]
+        print(f"{label:13} median {statistics.median(values):8.1f} ms"
+              f"   min {min(values):8.1f} ms   max {max(values):8.1f} ms")
+
+    if args.top:
+        print("\nSlowest imports (cumulative):")
+        for cumulative_ms, name in slowest_imports(args.top):
+            print(f"{cumulative_ms:8.1f} ms  {name}")
+
+    median_ms = statistics.median(run['startup_ms'] for run in runs)
+    if median_ms > args.budget_ms:
+        print(f"\nCold start {median_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+    print(f"\nCold start {median_ms:.1f} ms is within the {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == '__main__':
+    main()
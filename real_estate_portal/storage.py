@@ -0,0 +1,294 @@
+"""
+File storage backends for the DreamHome Real Estate Portal.
+Uploaded images and documents (see blob_store.py) are written, read,
+served and deleted through a storage, so that several app servers can
+share them without sharing a disk.
+
+Backends (STORAGE_BACKEND):
+- 'local': a directory on this server, for a single node or a shared
+  volume. Public files (images) are served by the web server from their
+  static URL. Private files (documents) are handed to nginx with an
+  X-Accel-Redirect header when an internal location is configured for
+  them, else sent with send_file.
+- 's3': a bucket of an S3-compatible object store (AWS S3, MinIO, moto in
+  tests). Public files are served from the bucket's public or CDN URL.
+  Private files are served by redirecting to a presigned URL that expires.
+  boto3 is imported only by this backend, and it takes credentials from
+  its usual sources (environment, profile, instance role). No secret is
+  kept in app config or job arguments.
+
+In both cases, serving a file never streams its bytes through a Python
+worker, except for local storage without X-Accel-Redirect.
+
+A storage is described by a spec, a JSON-serializable dict. Background job
+workers, which have no app context, open the same storage with
+create_storage(spec).
+"""
+import json
+import mimetypes
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+from urllib.parse import quote
+from flask import current_app, redirect, send_file
+
+# Stored files never change (they are named by their content), so caches may keep them
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def content_disposition(download_name, as_attachment):
+    """
+    Build a Content-Disposition header value that is safe for any file name.
+
+    Args:
+        download_name (str): File name shown to the user
+        as_attachment (bool): Download rather than display inline
+
+    Returns:
+        str: Header value
+    """
+    disposition = 'attachment' if as_attachment else 'inline'
+    return f"{disposition}; filename*=UTF-8''{quote(download_name)}"
+
+
+def _guess_type(download_name):
+    return mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+
+
+class LocalStorage:
+    """
+    Files in a directory on the local filesystem, addressed by relative key.
+    """
+
+    def __init__(self, folder, base_url=None, accel_redirect=None):
+        self.folder = folder
+        self.base_url = base_url
+        self.accel_redirect = accel_redirect
+        self.spec = {'backend': 'local', 'folder': folder, 'base_url': base_url,
+                     'accel_redirect': accel_redirect}
+
+    def path(self, key):
+        """Filesystem path of a key"""
+        return os.path.join(self.folder, *key.split('/'))
+
+    def url(self, key):
+        """Public URL of a key (None for private storages)"""
+        return f'{self.base_url}/{key}' if self.base_url else None
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def put_file(self, key, source_path, content_type=None):
+        """
+        Move a file in under a key, replacing what was stored there.
+
+        Args:
+            key (str): Key to store the file under
+            source_path (str): File to move; gone afterwards
+            content_type (str): MIME type (not stored by this backend)
+        """
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Moved next to the target first where a rename cannot cross filesystems,
+        # so the key never points at a partly written file
+        partial = f'{path}.{uuid.uuid4().hex}.partial'
+        shutil.move(source_path, partial)
+        os.replace(partial, path)
+
+    def put_bytes(self, key, data, content_type=None):
+        """Store bytes under a key, replacing what was stored there"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f'{path}.{uuid.uuid4().hex}.partial'
+        with open(partial, 'wb') as f:
+            f.write(data)
+        os.replace(partial, path)
+
+    def read_bytes(self, key):
+        """
+        Read a stored file.
+
+        Returns:
+            bytes: Content, or None if the key does not exist
+        """
+        try:
+            with open(self.path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def local_copy(self, key):
+        """Context manager yielding a filesystem path holding the file of a key"""
+        yield self.path(key)
+
+    def delete(self, key):
+        """Remove the file of a key; a missing file is ignored"""
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def send(self, key, mimetype, download_name, as_attachment):
+        """
+        Respond with the file of a key.
+
+        Args:
+            key (str): Stored file
+            mimetype (str): Content type, or None to guess from download_name
+            download_name (str): File name shown to the user
+            as_attachment (bool): Download rather than display inline
+
+        Returns:
+            Response: nginx X-Accel-Redirect response, or the file itself
+        """
+        mimetype = mimetype or _guess_type(download_name)
+        if self.accel_redirect:
+            response = current_app.response_class(mimetype=mimetype)
+            response.headers['X-Accel-Redirect'] = f'{self.accel_redirect}/{key}'
+            response.headers['Content-Disposition'] = content_disposition(download_name, as_attachment)
+            return response
+        return send_file(self.path(key), mimetype=mimetype, as_attachment=as_attachment,
+                         download_name=download_name)
+
+
+class S3Storage:
+    """
+    Objects under a key prefix of an S3-compatible bucket.
+    """
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None, base_url=None, presign_ttl=300):
+        # Imported on first use: only deployments using this backend need boto3
+        import boto3
+        from botocore.exceptions import ClientError
+
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+        self.ClientError = ClientError
+        self.bucket = bucket
+        self.prefix = prefix
+        self.base_url = base_url
+        self.presign_ttl = presign_ttl
+        self.spec = {'backend': 's3', 'bucket': bucket, 'prefix': prefix, 'endpoint_url': endpoint_url,
+                     'region': region, 'base_url': base_url, 'presign_ttl': presign_ttl}
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def url(self, key):
+        """Public URL of a key (None for private storages)"""
+        return f'{self.base_url}/{key}' if self.base_url else None
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except self.ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return True
+
+    def _put_args(self, content_type):
+        args = {'CacheControl': IMMUTABLE_CACHE_CONTROL}
+        if content_type:
+            args['ContentType'] = content_type
+        return args
+
+    def put_file(self, key, source_path, content_type=None):
+        """
+        Upload a file under a key (multipart for large files), then delete it.
+
+        Args:
+            key (str): Key to store the file under
+            source_path (str): File to upload; gone afterwards
+            content_type (str): MIME type sent when the object is served
+        """
+        self.client.upload_file(source_path, self.bucket, self._key(key), ExtraArgs=self._put_args(content_type))
+        os.remove(source_path)
+
+    def put_bytes(self, key, data, content_type=None):
+        """Store bytes under a key, replacing what was stored there"""
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data, **self._put_args(content_type))
+
+    def read_bytes(self, key):
+        """
+        Read a stored object.
+
+        Returns:
+            bytes: Content, or None if the key does not exist
+        """
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        except self.ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return response['Body'].read()
+
+    @contextmanager
+    def local_copy(self, key):
+        """Context manager yielding a temporary file downloaded from a key"""
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, self._key(key), path)
+            yield path
+        finally:
+            os.remove(path)
+
+    def delete(self, key):
+        """Remove the object of a key; a missing object is ignored"""
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def send(self, key, mimetype, download_name, as_attachment):
+        """
+        Redirect to a presigned URL of a key, valid for presign_ttl seconds.
+
+        Args:
+            key (str): Stored object
+            mimetype (str): Content type, or None to guess from download_name
+            download_name (str): File name shown to the user
+            as_attachment (bool): Download rather than display inline
+
+        Returns:
+            Response: Redirect the browser follows to the object store
+        """
+        url = self.client.generate_presigned_url('get_object', Params={
+            'Bucket': self.bucket,
+            'Key': self._key(key),
+            'ResponseContentType': mimetype or _guess_type(download_name),
+            'ResponseContentDisposition': content_disposition(download_name, as_attachment),
+        }, ExpiresIn=self.presign_ttl)
+        response = redirect(url)
+        response.headers['Cache-Control'] = 'private, no-store'
+        return response
+
+
+def create_storage(spec):
+    """
+    Create a storage from its spec. Storages are reused per process, so
+    job workers do not build a new S3 client for every job.
+
+    Args:
+        spec (dict): Storage spec, see LocalStorage.spec and S3Storage.spec
+
+    Returns:
+        Storage instance
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    return _create_storage(json.dumps(spec, sort_keys=True))
+
+
+@lru_cache(maxsize=None)
+def _create_storage(spec_json):
+    options = json.loads(spec_json)
+    backend = options.pop('backend')
+    if backend == 'local':
+        return LocalStorage(**options)
+    if backend == 's3':
+        return S3Storage(**options)
+    raise ValueError(f"Unknown storage backend '{backend}'")
@@ -0,0 +1,103 @@
+"""
+Test fixtures for the DreamHome Real Estate Portal.
+Every test gets its own app on a fresh SQLite database, with uploads staged
+and stored under a temporary folder and background jobs run inline. Tests
+push an app context only around their own database reads, as Flask-Login
+keeps the signed-in user on the app context.
+
+Usage (from real_estate_portal/):
+    pip install -r requirements-dev.txt
+    python -m pytest
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from config import Config  # noqa: E402
+from models import db, User, UserRole, Roles, Property, PropertyType, IndianLocation  # noqa: E402
+from storage import _create_storage  # noqa: E402
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    """Config values of the test app; override in a test module to change them"""
+    return {
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'JOB_QUEUE_BACKEND': 'inline',
+        'UPLOAD_STAGING_FOLDER': str(tmp_path / 'staging'),
+        'IMAGE_BLOB_FOLDER': str(tmp_path / 'images'),
+        'DOCUMENT_BLOB_FOLDER': str(tmp_path / 'documents'),
+        # Unreferenced images are removed at once rather than after the grace period
+        'BLOB_ORPHAN_TTL': 0,
+    }
+
+
+@pytest.fixture
+def app(app_config):
+    # Extensions are module-level singletons: each app re-initializes them
+    _create_storage.cache_clear()
+    app = create_app(type('TestConfig', (Config,), app_config))
+    with app.app_context():
+        db.create_all()
+        db.session.add(UserRole(roleId=Roles.ADMIN, roleName='Admin'))
+        db.session.add(UserRole(roleId=Roles.BUYER, roleName='Buyer'))
+        db.session.add(PropertyType(typeId=1, typeName='Apartment'))
+        db.session.add(IndianLocation(locationId=1, city='Mumbai', state='Maharashtra'))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def create_user(app, username, role_id):
+    """
+    Add a user.
+
+    Returns:
+        int: The new user's id
+    """
+    with app.app_context():
+        user = User(username=username, email=f'{username}@example.com',
+                    mobile=str(9000000000 + User.query.count()), roleId=role_id)
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+        return user.userId
+
+
+def signed_in_client(app, user_id):
+    """Test client with a session signed in as a user"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+@pytest.fixture
+def user_id(app):
+    """An admin user"""
+    return create_user(app, 'owner', Roles.ADMIN)
+
+
+@pytest.fixture
+def property_id(app, user_id):
+    """A property of user_id"""
+    with app.app_context():
+        property = Property(address='1 Marine Drive', ownerId=user_id, price=5000000, carpetArea=800,
+                            typeId=1, locationId=1, listingType='Buy')
+        db.session.add(property)
+        db.session.commit()
+        return property.propertyId
+
+
+@pytest.fixture
+def client(app, user_id):
+    """Test client signed in as user_id"""
+    return signed_in_client(app, user_id)
@@ -0,0 +1,154 @@
+"""
+Tests of the chunked upload protocol (/api/uploads, see chunked_uploads.py).
+"""
+import hashlib
+import os
+import time
+import pytest
+from blob_store import blob_store
+from chunked_uploads import load_upload, purge_expired
+from models import db, Roles, UserDocument
+from routes import uploads as upload_routes
+from conftest import create_user, signed_in_client
+
+DOCUMENT = b'%PDF-1.4\n' + b'x' * 5000
+
+
+def _start(client, data=DOCUMENT, **fields):
+    body = {'purpose': 'document', 'filename': 'deed.pdf', 'size': len(data), 'doc_type': 'legal', **fields}
+    response = client.post('/api/uploads', json=body)
+    assert response.status_code == 201
+    return response.json['uploadId']
+
+
+def _patch(client, upload_id, offset, chunk, checksum=None):
+    return client.patch(f'/api/uploads/{upload_id}', data=chunk, headers={
+        'Upload-Offset': str(offset),
+        'Upload-Checksum': checksum or hashlib.sha256(chunk).hexdigest(),
+    })
+
+
+def _chunked_folder(app):
+    return os.path.join(app.config['UPLOAD_STAGING_FOLDER'], 'chunked')
+
+
+def test_start_reports_offset_zero(client):
+    upload_id = _start(client)
+    response = client.get(f'/api/uploads/{upload_id}')
+    assert response.json['offset'] == 0
+    assert response.json['size'] == len(DOCUMENT)
+
+
+def test_start_rejects_unknown_purpose_and_oversize(client):
+    assert client.post('/api/uploads', json={'purpose': 'avatar', 'filename': 'a.pdf', 'size': 10}).status_code == 400
+    response = client.post('/api/uploads', json={'purpose': 'document', 'filename': 'a.pdf', 'size': 10 ** 9,
+                                                 'doc_type': 'legal'})
+    assert response.status_code == 400
+
+
+def test_offset_mismatch_is_409_with_current_offset(client):
+    upload_id = _start(client)
+    assert _patch(client, upload_id, 0, DOCUMENT[:1000]).status_code == 200
+
+    response = _patch(client, upload_id, 500, DOCUMENT[500:1500])
+    assert response.status_code == 409
+    assert response.json['offset'] == 1000
+
+
+def test_bad_checksum_is_422_and_chunk_is_dropped(client):
+    upload_id = _start(client)
+    response = _patch(client, upload_id, 0, DOCUMENT[:1000], checksum='0' * 64)
+    assert response.status_code == 422
+    assert client.get(f'/api/uploads/{upload_id}').json['offset'] == 0
+
+
+def test_chunk_past_declared_size_is_rejected(client):
+    upload_id = _start(client)
+    response = _patch(client, upload_id, 0, DOCUMENT + b'extra')
+    assert response.status_code == 400
+    assert client.get(f'/api/uploads/{upload_id}').json['offset'] == 0
+
+
+def test_resume_and_finalize_once(app, client):
+    upload_id = _start(client, sha256=hashlib.sha256(DOCUMENT).hexdigest())
+    assert _patch(client, upload_id, 0, DOCUMENT[:2000]).status_code == 200
+
+    # After a dropped connection the client asks where to continue
+    offset = client.get(f'/api/uploads/{upload_id}').json['offset']
+    assert offset == 2000
+    assert _patch(client, upload_id, offset, DOCUMENT[offset:]).json['offset'] == len(DOCUMENT)
+
+    response = client.post(f'/api/uploads/{upload_id}/finalize')
+    assert response.status_code == 200
+    with app.app_context():
+        document = db.session.get(UserDocument, response.json['document_id'])
+        assert document.content_hash == hashlib.sha256(DOCUMENT).hexdigest()
+        assert blob_store.documents.read_bytes(document.file_path) == DOCUMENT
+
+    # An upload can only be finalized once
+    assert client.post(f'/api/uploads/{upload_id}/finalize').status_code == 404
+    with app.app_context():
+        assert UserDocument.query.count() == 1
+
+
+def test_finalize_racing_a_finished_finalize_is_404(app, client, user_id, monkeypatch):
+    upload_id = _start(client)
+    _patch(client, upload_id, 0, DOCUMENT)
+    # A second finalize request that loaded the state before the first one removed it
+    with app.test_request_context():
+        upload = load_upload(upload_id, user_id)
+    assert client.post(f'/api/uploads/{upload_id}/finalize').status_code == 200
+
+    monkeypatch.setattr(upload_routes, 'load_upload', lambda upload_id, user_id: upload)
+    assert client.post(f'/api/uploads/{upload_id}/finalize').status_code == 404
+    with app.app_context():
+        assert UserDocument.query.count() == 1
+
+
+def test_incomplete_upload_cannot_be_finalized(client):
+    upload_id = _start(client)
+    _patch(client, upload_id, 0, DOCUMENT[:1000])
+    assert client.post(f'/api/uploads/{upload_id}/finalize').status_code == 400
+    assert client.get(f'/api/uploads/{upload_id}').json['offset'] == 1000
+
+
+def test_whole_file_checksum_mismatch_discards_upload(client):
+    upload_id = _start(client, sha256='0' * 64)
+    _patch(client, upload_id, 0, DOCUMENT)
+    assert client.post(f'/api/uploads/{upload_id}/finalize').status_code == 400
+    assert client.get(f'/api/uploads/{upload_id}').status_code == 404
+
+
+def test_failed_finalize_removes_data(app, client, monkeypatch):
+    def broken(source_path):
+        raise RuntimeError('storage unavailable')
+    monkeypatch.setattr(blob_store, 'put_document', broken)
+
+    upload_id = _start(client)
+    _patch(client, upload_id, 0, DOCUMENT)
+    with pytest.raises(RuntimeError):
+        client.post(f'/api/uploads/{upload_id}/finalize')
+    assert os.listdir(_chunked_folder(app)) == []
+
+
+def test_other_users_cannot_use_upload(app, client):
+    upload_id = _start(client)
+    other = signed_in_client(app, create_user(app, 'buyer', Roles.BUYER))
+    assert other.get(f'/api/uploads/{upload_id}').status_code == 404
+    assert _patch(other, upload_id, 0, DOCUMENT).status_code == 404
+    assert client.get(f'/api/uploads/{upload_id}').json['offset'] == 0
+
+
+def test_purge_removes_expired_uploads_and_orphaned_parts(app, client):
+    upload_id = _start(client)
+    folder = _chunked_folder(app)
+    orphan = os.path.join(folder, 'f' * 32 + '.part')
+    open(orphan, 'wb').close()
+    old = time.time() - app.config['CHUNKED_UPLOAD_TTL'] - 1
+    for name in os.listdir(folder):
+        os.utime(os.path.join(folder, name), (old, old))
+
+    with app.test_request_context():
+        purge_expired()
+    assert os.listdir(folder) == []
+    assert client.get(f'/api/uploads/{upload_id}').status_code == 404
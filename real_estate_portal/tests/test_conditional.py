@@ -0,0 +1,60 @@
+"""
+Tests of the change versions behind HTTP validators and cached fragments
+(conditional.py, fragment_cache.py, search_cache.py): every write path must
+change them.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from models import db, Amenity, Property, PropertyAmenity, User
+from search_cache import search_cache
+from search_engine import SearchCriteria
+
+
+def _revalidate(client, url, response):
+    return client.get(url, headers={'If-None-Match': response.headers['ETag']})
+
+
+def test_bulk_amenity_delete_changes_detail_page(app, client, property_id):
+    with app.app_context():
+        db.session.add(Amenity(amenityId=2, name='Gym'))
+        db.session.add(PropertyAmenity(propertyId=property_id, amenityId=2))
+        db.session.commit()
+    url = f'/property/{property_id}'
+    first = client.get(url)
+    assert b'Gym' in first.data
+
+    with app.app_context():
+        before = db.session.get(Property, property_id).updatedAt
+        PropertyAmenity.query.filter_by(propertyId=property_id).delete()
+        db.session.commit()
+        assert db.session.get(Property, property_id).updatedAt > before
+
+    response = _revalidate(client, url, first)
+    assert response.status_code == 200
+    assert b'Gym' not in response.data
+
+
+def test_owner_change_changes_detail_page(app, client, property_id, user_id):
+    url = f'/property/{property_id}'
+    first = client.get(url)
+    assert _revalidate(client, url, first).status_code == 304
+
+    with app.app_context():
+        db.session.get(User, user_id).mobile = '9876543210'
+        db.session.commit()
+
+    response = _revalidate(client, url, first)
+    assert response.status_code == 200
+    assert b'9876543210' in response.data
+
+
+def test_search_cache_follows_listing_version(app, property_id):
+    # A bulk UPDATE sends no property_changed, like a change made by another worker
+    criteria = SearchCriteria.from_args({})
+    with app.test_request_context('/'):
+        assert search_cache.get_or_set('page', criteria, lambda: [property_id]) == [property_id]
+    with app.app_context():
+        db.session.execute(update(Property).values(updatedAt=datetime.utcnow() + timedelta(seconds=1)))
+        db.session.commit()
+    with app.test_request_context('/'):
+        assert search_cache.get_or_set('page', criteria, lambda: []) == []
@@ -0,0 +1,12 @@
+"""
+Tests of the background job setup (jobs.py).
+"""
+import pytest
+from app import create_app
+from config import Config
+
+
+def test_redis_queue_refuses_per_process_status(app_config):
+    config = dict(app_config, JOB_QUEUE_BACKEND='redis', JOB_STATUS_BACKEND='memory')
+    with pytest.raises(ValueError):
+        create_app(type('TestConfig', (Config,), config))
@@ -0,0 +1,45 @@
+"""
+Tests of the per-page query budget of listing endpoints (query_counter.py):
+a page must cost the same number of queries whatever its size.
+"""
+import pytest
+from models import db, Amenity, Property, PropertyAmenity, PropertyImages
+from query_counter import count_queries
+
+
+@pytest.fixture
+def app_config(app_config):
+    # Cached ids and counts would make the second request cheaper than the first
+    return dict(app_config, SEARCH_CACHE_BACKEND='null')
+
+
+@pytest.fixture
+def listings(app, user_id):
+    """60 properties, each with an image and an amenity"""
+    with app.app_context():
+        db.session.add(Amenity(amenityId=1, name='Gym'))
+        for i in range(60):
+            property = Property(address=f'{i} Marine Drive', ownerId=user_id, price=5000000 + i,
+                                carpetArea=800, typeId=1, locationId=1, listingType='Buy')
+            db.session.add(property)
+            db.session.flush()
+            db.session.add(PropertyImages(propertyId=property.propertyId,
+                                          imageURL=f'/static/images/{i}.jpg', isPrimary=True))
+            db.session.add(PropertyAmenity(propertyId=property.propertyId, amenityId=1))
+        db.session.commit()
+
+
+def _count_listing_queries(app, per_page):
+    with app.test_request_context(f'/api/properties/search?per_page={per_page}'):
+        with count_queries() as counter:
+            response = app.full_dispatch_request()
+        assert response.status_code == 200
+        assert len(response.get_json()) == per_page
+    return counter['count']
+
+
+def test_listing_page_queries_do_not_grow_with_page_size(app, listings):
+    # Warm the reference data cache so neither measured request loads it
+    _count_listing_queries(app, 5)
+
+    assert _count_listing_queries(app, 5) == _count_listing_queries(app, 50)
@@ -0,0 +1,14 @@
+"""
+Tests of the hot listing query plans (query_plans.py): none may fall back to
+a full scan of the Property table.
+"""
+from query_plans import HOT_QUERIES, check_query_plans
+
+
+def test_hot_queries_use_an_index(app, property_id):
+    with app.app_context():
+        results = check_query_plans()
+
+    assert len(results) == len(HOT_QUERIES)
+    full_scans = {result.name: result.plan for result in results if result.full_scan}
+    assert not full_scans
@@ -0,0 +1,140 @@
+"""
+Tests of the S3 storage backend (storage.py) against moto's in-memory S3:
+uploads, deduplication, presigned document links and removal of blobs
+once their last reference is deleted.
+"""
+import hashlib
+import io
+from urllib.parse import parse_qs, urlparse
+import pytest
+from PIL import Image
+from models import db, Blob, PropertyImages
+
+moto = pytest.importorskip('moto')
+boto3 = pytest.importorskip('boto3')
+
+BUCKET = 'dreamhome'
+DOCUMENT = b'%PDF-1.4\n' + b'd' * 3000
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """moto's S3 with an empty bucket"""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    with moto.mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def app_config(app_config, s3):
+    return {**app_config, 'STORAGE_BACKEND': 's3', 'STORAGE_S3_BUCKET': BUCKET, 'STORAGE_S3_REGION': 'us-east-1'}
+
+
+def _keys(s3, prefix):
+    return [item['Key'] for item in s3.list_objects_v2(Bucket=BUCKET, Prefix=prefix).get('Contents', [])]
+
+
+def _jpeg():
+    buffer = io.BytesIO()
+    Image.new('RGB', (900, 600), (30, 90, 160)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def _upload_image(client, property_id, data):
+    response = client.post(f'/upload/{property_id}', data={'file': (io.BytesIO(data), 'house.jpg')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 202
+    job = client.get(response.json['statusUrl']).json
+    assert job['status'] == 'done', job
+    return job['result']
+
+
+def _upload_document(client, data=DOCUMENT, filename='deed.pdf'):
+    response = client.post('/documents/upload', data={'document': (io.BytesIO(data), filename), 'doc_type': 'legal'},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    return response.json['document_id']
+
+
+def test_image_upload_writes_variants_once(app, client, property_id, s3):
+    data = _jpeg()
+    digest = hashlib.sha256(data).hexdigest()
+    first = _upload_image(client, property_id, data)
+    keys = _keys(s3, 'images/')
+    assert keys and all(digest in key for key in keys)
+
+    # The same file again is stored once and referenced twice
+    second = _upload_image(client, property_id, data)
+    assert second['imageUrl'] == first['imageUrl']
+    assert _keys(s3, 'images/') == keys
+    with app.app_context():
+        assert db.session.get(Blob, ('image', digest)).refCount == 2
+        image = db.session.get(PropertyImages, first['imageId'])
+        assert image.contentHash == digest and image.variants
+
+    head = s3.head_object(Bucket=BUCKET, Key=keys[0])
+    assert 'immutable' in head['CacheControl']
+
+
+def test_image_removed_with_last_reference(app, client, property_id, s3):
+    data = _jpeg()
+    digest = hashlib.sha256(data).hexdigest()
+    images = [_upload_image(client, property_id, data)['imageId'] for _ in range(2)]
+
+    assert client.post(f'/admin/property/delete-image/{images[0]}').status_code == 200
+    assert _keys(s3, 'images/')
+    with app.app_context():
+        assert db.session.get(Blob, ('image', digest)).refCount == 1
+
+    assert client.post(f'/admin/property/delete-image/{images[1]}').status_code == 200
+    assert _keys(s3, 'images/') == []
+    with app.app_context():
+        assert db.session.get(Blob, ('image', digest)) is None
+
+
+def test_document_is_sent_by_presigned_redirect(client, s3):
+    document_id = _upload_document(client, filename='sale deed.pdf')
+    assert len(_keys(s3, 'documents/')) == 1
+
+    response = client.get(f'/documents/view/{document_id}')
+    assert response.status_code == 302
+    assert response.headers['Cache-Control'] == 'private, no-store'
+    location = urlparse(response.headers['Location'])
+    query = parse_qs(location.query)
+    assert 'X-Amz-Signature' in query or 'Signature' in query
+    assert query['response-content-type'] == ['application/pdf']
+    assert query['response-content-disposition'][0].startswith('inline')
+
+    response = client.get(f'/documents/download/{document_id}')
+    query = parse_qs(urlparse(response.headers['Location']).query)
+    assert query['response-content-disposition'][0].startswith('attachment')
+
+
+def test_document_deduplicated_and_removed_with_last_reference(app, client, s3):
+    digest = hashlib.sha256(DOCUMENT).hexdigest()
+    documents = [_upload_document(client) for _ in range(2)]
+    assert len(_keys(s3, 'documents/')) == 1
+    with app.app_context():
+        assert db.session.get(Blob, ('document', digest)).refCount == 2
+
+    client.post(f'/my-documents/{documents[0]}/delete')
+    assert len(_keys(s3, 'documents/')) == 1
+
+    # Documents are removed as soon as nothing refers to them
+    app.config['BLOB_ORPHAN_TTL'] = 24 * 3600
+    client.post(f'/my-documents/{documents[1]}/delete')
+    assert _keys(s3, 'documents/') == []
+    with app.app_context():
+        assert db.session.get(Blob, ('document', digest)) is None
+
+
+def test_rejected_document_is_removed(app, client, s3):
+    # A Windows executable named .pdf fails the content check
+    _upload_document(client, data=b'MZ' + b'\x00' * 500, filename='invoice.pdf')
+    assert _keys(s3, 'documents/') == []
+    with app.app_context():
+        assert Blob.query.filter_by(kind='document').count() == 0
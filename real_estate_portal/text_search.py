@@ -0,0 +1,362 @@
+"""
+Full-text keyword search for the DreamHome Real Estate Portal.
+Matches search keywords against property address, description and
+overlooking using the best engine available for the database:
+
+- MySQL: the FULLTEXT index ft_property_text, ranked with MATCH ... AGAINST
+- SQLite: the FTS5 table property_fts, ranked with bm25()
+- Anything else (or TEXT_SEARCH_BACKEND = 'memory'): an in-process
+  inverted index built from the Property table
+
+City and state are matched through the small IndianLocation table so a
+keyword like "Pune" still finds every listing in that city.
+"""
+import heapq
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import DDL, Float, event, inspect, or_, select, case, literal, literal_column, text
+from sqlalchemy.dialects.mysql import match
+from models import db, Property, IndianLocation
+from signals import property_changed
+
+TEXT_COLUMNS = ('address', 'description', 'overlooking')
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# SQLite FTS5 mirror of the searchable Property columns, kept in sync by triggers
+_SQLITE_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS property_fts USING fts5(
+        address, description, overlooking,
+        content='Property', content_rowid='propertyId'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS property_fts_ai AFTER INSERT ON Property BEGIN
+        INSERT INTO property_fts(rowid, address, description, overlooking)
+        VALUES (new.propertyId, new.address, new.description, new.overlooking);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS property_fts_ad AFTER DELETE ON Property BEGIN
+        INSERT INTO property_fts(property_fts, rowid, address, description, overlooking)
+        VALUES ('delete', old.propertyId, old.address, old.description, old.overlooking);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS property_fts_au AFTER UPDATE ON Property BEGIN
+        INSERT INTO property_fts(property_fts, rowid, address, description, overlooking)
+        VALUES ('delete', old.propertyId, old.address, old.description, old.overlooking);
+        INSERT INTO property_fts(rowid, address, description, overlooking)
+        VALUES (new.propertyId, new.address, new.description, new.overlooking);
+    END
+    """,
+)
+
+for _statement in _SQLITE_FTS_DDL:
+    event.listen(Property.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+
+
+def tokenize(value):
+    """
+    Split text into lowercase search tokens.
+
+    Args:
+        value (str): Text to tokenize
+
+    Returns:
+        list: Tokens in order of appearance
+    """
+    if not value:
+        return []
+    return [token.lower() for token in _TOKEN_RE.findall(value)]
+
+
+class InvertedIndex:
+    """
+    In-process inverted index over the searchable Property columns.
+    Used when the database has no native full-text support. Postings map
+    each token to {propertyId: term frequency}; scoring is TF-IDF.
+
+    Changes made through this process are applied as they happen (see
+    _reindex_property). Every ttl seconds the index is rebuilt from the
+    table in a background thread, to pick up changes made by other
+    processes; searches keep using the current index meanwhile.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._built_at = None
+        self._rebuilding = False
+        # Properties changed while a build reads the table, re-read once it is done
+        self._changed_during_build = None
+
+    def build(self):
+        """Rebuild the index from the Property table"""
+        with self._lock:
+            self._changed_during_build = set()
+        postings = defaultdict(dict)
+        documents = {}
+        rows = db.session.query(
+            Property.propertyId, Property.address, Property.description, Property.overlooking
+        ).yield_per(1000)
+        for property_id, *values in rows:
+            tokens = self._index_document(postings, property_id, values)
+            documents[property_id] = tokens
+        with self._lock:
+            self._postings = postings
+            self._documents = documents
+            self._built_at = time.monotonic()
+            changed, self._changed_during_build = self._changed_during_build, None
+        if changed:
+            self._reload(changed)
+
+    def _reload(self, property_ids):
+        """Re-index properties from the table, dropping those that are gone"""
+        rows = {
+            property_id: values for property_id, *values in db.session.query(
+                Property.propertyId, Property.address, Property.description, Property.overlooking
+            ).filter(Property.propertyId.in_(property_ids))
+        }
+        with self._lock:
+            for property_id in property_ids:
+                self.remove(property_id)
+                if property_id in rows:
+                    self._documents[property_id] = self._index_document(
+                        self._postings, property_id, rows[property_id])
+
+    @staticmethod
+    def _index_document(postings, property_id, values):
+        tokens = set()
+        for value in values:
+            for token in tokenize(value):
+                postings[token][property_id] = postings[token].get(property_id, 0) + 1
+                tokens.add(token)
+        return tokens
+
+    def update(self, property):
+        """
+        Re-index a single property after it was added or edited.
+
+        Args:
+            property (Property): The changed property
+        """
+        with self._lock:
+            if self._changed_during_build is not None:
+                self._changed_during_build.add(property.propertyId)
+            if self._built_at is None:
+                return
+            self.remove(property.propertyId)
+            self._documents[property.propertyId] = self._index_document(
+                self._postings, property.propertyId,
+                [getattr(property, column) for column in TEXT_COLUMNS]
+            )
+
+    def remove(self, property_id):
+        """
+        Drop a property from the index.
+
+        Args:
+            property_id (int): ID of the deleted property
+        """
+        with self._lock:
+            if self._changed_during_build is not None:
+                self._changed_during_build.add(property_id)
+            for token in self._documents.pop(property_id, ()):
+                self._postings[token].pop(property_id, None)
+                if not self._postings[token]:
+                    del self._postings[token]
+
+    def _ensure_fresh(self):
+        with self._lock:
+            if self._built_at is not None:
+                if self._rebuilding or time.monotonic() - self._built_at <= self.ttl:
+                    return
+                self._rebuilding = True
+                app = current_app._get_current_object()
+                threading.Thread(target=self._rebuild_in_background, args=(app,), daemon=True).start()
+                return
+        # Nothing to search yet: the first build runs in the request
+        self.build()
+
+    def _rebuild_in_background(self, app):
+        try:
+            with app.app_context():
+                self.build()
+        except Exception as e:
+            app.logger.error(f"Error rebuilding the keyword search index: {str(e)}")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    def search(self, keyword, limit=None):
+        """
+        Find the properties best matching a keyword.
+
+        Args:
+            keyword (str): Free-text query
+            limit (int): Most matches to return, or None for all
+
+        Returns:
+            list: (propertyId, score) pairs, best match first
+        """
+        self._ensure_fresh()
+        tokens = set(tokenize(keyword))
+        with self._lock:
+            total = max(len(self._documents), 1)
+            scores = defaultdict(float)
+            for token in tokens:
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for property_id, frequency in postings.items():
+                    scores[property_id] += frequency * idf
+        if limit is None:
+            return sorted(scores.items(), key=_best_first)
+        return heapq.nsmallest(limit, scores.items(), key=_best_first)
+
+
+def _best_first(item):
+    property_id, score = item
+    return -score, property_id
+
+
+inverted_index = InvertedIndex()
+
+
+@property_changed.connect
+def _reindex_property(sender, property_id, property=None, **kwargs):
+    """Keep the in-process index in step with property changes"""
+    if property is None:
+        inverted_index.remove(property_id)
+    else:
+        inverted_index.update(property)
+
+_sqlite_fts_available = {}
+
+
+def _backend():
+    """Pick the text search backend for the current database"""
+    configured = current_app.config.get('TEXT_SEARCH_BACKEND', 'auto')
+    if configured != 'auto':
+        return configured
+
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        return 'mysql'
+    if dialect == 'sqlite':
+        url = str(db.engine.url)
+        if url not in _sqlite_fts_available:
+            with db.engine.connect() as conn:
+                _sqlite_fts_available[url] = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'property_fts'"
+                )).first() is not None
+        if _sqlite_fts_available[url]:
+            return 'sqlite'
+    return 'memory'
+
+
+def _fts5_query(keyword):
+    """Build an FTS5 MATCH expression that ORs the quoted keyword tokens"""
+    return ' OR '.join(f'"{token}"' for token in tokenize(keyword))
+
+
+def _location_match(keyword):
+    pattern = f'%{keyword}%'
+    return Property.locationId.in_(
+        select(IndianLocation.locationId).where(or_(
+            IndianLocation.city.ilike(pattern),
+            IndianLocation.state.ilike(pattern)
+        ))
+    )
+
+
+def keyword_search(keyword):
+    """
+    Compile a keyword into a filter and a relevance score.
+
+    Args:
+        keyword (str): Free-text query
+
+    Returns:
+        tuple: (filter expression, score expression); higher scores rank first
+    """
+    backend = _backend()
+
+    if not tokenize(keyword):
+        # Nothing indexable (e.g. only punctuation): fall back to a substring match
+        return or_(Property.address.ilike(f'%{keyword}%'), _location_match(keyword)), literal(0)
+
+    if backend == 'mysql':
+        score = match(Property.address, Property.description, Property.overlooking,
+                      against=keyword).in_natural_language_mode()
+        ids = select(Property.propertyId).where(score > 0)
+        return or_(Property.propertyId.in_(ids), _location_match(keyword)), score
+
+    if backend == 'sqlite':
+        fts_query = _fts5_query(keyword)
+        ids = text('SELECT rowid FROM property_fts WHERE property_fts MATCH :fts_query') \
+            .bindparams(fts_query=fts_query).columns(Property.propertyId)
+        # bm25() is negative, lower is better
+        score = -select(literal_column('bm25(property_fts)', Float)) \
+            .select_from(text('property_fts')) \
+            .where(text('property_fts MATCH :fts_score_query').bindparams(fts_score_query=fts_query)) \
+            .where(text('property_fts.rowid = "Property"."propertyId"')) \
+            .scalar_subquery()
+        return or_(Property.propertyId.in_(ids), _location_match(keyword)), score
+
+    # Only the best TEXT_SEARCH_MAX_CANDIDATES matches are kept, so the IN list and
+    # the case() stay bounded (and under SQLite's bound parameter limit) however
+    # many properties match
+    limit = current_app.config.get('TEXT_SEARCH_MAX_CANDIDATES', 1000)
+    ranked = inverted_index.search(keyword, limit=limit)
+    if not ranked:
+        return _location_match(keyword), literal(0)
+    score = case(dict(ranked), value=Property.propertyId, else_=0)
+    matches = [property_id for property_id, _ in ranked]
+    return or_(Property.propertyId.in_(matches), _location_match(keyword)), score
+
+
+def create_text_index(conn):
+    """
+    Create the database full-text index on an existing Property table.
+
+    Safe to run repeatedly: existing indexes are left as they are, and the
+    SQLite FTS5 table is repopulated from Property.
+
+    Args:
+        conn: SQLAlchemy connection inside a transaction
+    """
+    dialect = conn.dialect.name
+    if dialect == 'mysql':
+        existing = {index['name'] for index in inspect(conn).get_indexes(Property.__tablename__)}
+        if 'ft_property_text' not in existing:
+            for index in Property.__table__.indexes:
+                if index.name == 'ft_property_text':
+                    index.create(conn)
+    elif dialect == 'sqlite':
+        for statement in _SQLITE_FTS_DDL:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO property_fts(property_fts) VALUES ('rebuild')"))
+        _sqlite_fts_available.clear()
+
+
+def rebuild_text_index():
+    """
+    Build or refresh the full-text index for the current database.
+
+    On MySQL the FULLTEXT index is maintained by the server; on SQLite the
+    FTS5 table is created if missing and repopulated; the in-process index
+    is rebuilt in every case.
+    """
+    with db.engine.begin() as conn:
+        create_text_index(conn)
+    inverted_index.build()
@@ -0,0 +1,180 @@
+"""
+Cached user principals for the DreamHome Real Estate Portal.
+Flask-Login's user_loader runs on every authenticated request; instead of
+loading the full Users row each time it builds a slim UserPrincipal from a
+small cache (in-process LRU with TTL, or Redis).
+
+A principal holds only what most requests need: userId, roleId, isBanned,
+isActive and username. Any other attribute (email, favorites,
+check_password...) transparently loads the full User row on first use, and
+attribute writes go to that row so `db.session.commit()` persists them.
+
+Cached entries are dropped when the user_changed signal is sent, so role,
+ban and profile changes show up on the user's next request. With the
+shared Redis backend that holds in every worker; the per-process memory
+backend only hears its own worker's signals, so it keeps entries for
+USER_CACHE_MEMORY_TTL (a few seconds) and a demoted or banned user loses
+access everywhere within that time.
+"""
+from sqlalchemy import select
+from models import db, User
+from cache_backends import NullBackend, create_backend
+from signals import user_changed
+
+# User columns copied into each principal
+PRINCIPAL_FIELDS = ('userId', 'roleId', 'isBanned', 'isActive', 'username')
+
+
+class UserPrincipal:
+    """
+    Lightweight stand-in for a signed-in User, implementing the interface
+    Flask-Login expects (same behaviour as UserMixin).
+
+    Principals are created per request from cached data and never shared
+    between requests, so the lazily loaded User row always belongs to the
+    current request's session.
+    """
+    __slots__ = PRINCIPAL_FIELDS + ('_user',)
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, userId, roleId, isBanned, isActive, username):
+        object.__setattr__(self, 'userId', userId)
+        object.__setattr__(self, 'roleId', roleId)
+        object.__setattr__(self, 'isBanned', isBanned)
+        object.__setattr__(self, 'isActive', isActive)
+        object.__setattr__(self, 'username', username)
+        object.__setattr__(self, '_user', None)
+
+    @classmethod
+    def from_user(cls, user):
+        """Build a principal from a User row"""
+        return cls(*(getattr(user, field) for field in PRINCIPAL_FIELDS))
+
+    def to_dict(self):
+        """Get the cached fields as a JSON-serializable dict"""
+        return {field: getattr(self, field) for field in PRINCIPAL_FIELDS}
+
+    @property
+    def is_active(self):
+        return True
+
+    def get_id(self):
+        return str(self.userId)
+
+    @property
+    def user(self):
+        """
+        The full User row, loaded on first access.
+
+        Returns:
+            User: ORM row in the current session, or None if it was deleted
+        """
+        if self._user is None:
+            object.__setattr__(self, '_user', db.session.get(User, self.userId))
+        return self._user
+
+    def __getattr__(self, name):
+        # Only called for attributes the principal does not hold itself
+        if name.startswith('__'):
+            raise AttributeError(name)
+        user = self.user
+        if user is None:
+            raise AttributeError(name)
+        return getattr(user, name)
+
+    def __setattr__(self, name, value):
+        # Write through to the ORM row so the change is persisted on commit
+        setattr(self.user, name, value)
+        if name in PRINCIPAL_FIELDS:
+            object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        if isinstance(other, (UserPrincipal, User)):
+            return self.get_id() == other.get_id()
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return NotImplemented
+        return not equal
+
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        return f'<UserPrincipal {self.userId} {self.username}>'
+
+
+class UserCache:
+    """
+    Flask extension caching principal data by user id.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.backend = NullBackend()
+        self.ttl = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('USER_CACHE_REDIS_URL', None)
+        app.config.setdefault('USER_CACHE_BACKEND', 'redis' if app.config['USER_CACHE_REDIS_URL'] else 'memory')
+        app.config.setdefault('USER_CACHE_TTL', 300)
+        app.config.setdefault('USER_CACHE_MEMORY_TTL', 5)
+        app.config.setdefault('USER_CACHE_MAX_ENTRIES', 10000)
+
+        self.backend = create_backend(
+            app.config['USER_CACHE_BACKEND'],
+            max_entries=app.config['USER_CACHE_MAX_ENTRIES'],
+            redis_url=app.config['USER_CACHE_REDIS_URL'],
+            prefix='dreamhome:user:'
+        )
+        self.ttl = app.config['USER_CACHE_TTL']
+        if app.config['USER_CACHE_BACKEND'] == 'memory':
+            # Other workers never see this worker's invalidations
+            self.ttl = min(self.ttl, app.config['USER_CACHE_MEMORY_TTL'])
+
+        user_changed.connect(self._on_user_changed, weak=False)
+
+    @staticmethod
+    def _key(user_id):
+        return f'principal:{user_id}'
+
+    def load(self, user_id):
+        """
+        Get a fresh principal for a user, querying only on a cache miss.
+
+        Args:
+            user_id (int): ID of the user
+
+        Returns:
+            UserPrincipal: Principal for this request, or None if the user does not exist
+        """
+        data = self.backend.get(self._key(user_id))
+        if data is None:
+            row = db.session.execute(
+                select(*(getattr(User, field) for field in PRINCIPAL_FIELDS)).where(User.userId == user_id)
+            ).first()
+            if row is None:
+                return None
+            data = dict(row._mapping)
+            self.backend.set(self._key(user_id), data, self.ttl)
+        return UserPrincipal(**data)
+
+    def invalidate(self, user_id):
+        """
+        Forget a user's cached principal.
+
+        Args:
+            user_id (int): ID of the changed user
+        """
+        self.backend.delete(self._key(user_id))
+
+    def _on_user_changed(self, sender, user_id, **kwargs):
+        self.invalidate(user_id)
+
+
+user_cache = UserCache()
@@ -35,6 +35,23 @@ def allowed_file(filename, allowed_extensions=None):
            filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
 
+def stage_upload(file):
+    """
+    Save an upload to the staging folder, e.g. for a background job.
+    
+    Args:
+        file (FileStorage): Uploaded file
+        
+    Returns:
+        str: Absolute path of the staged file
+    """
+    staging_folder = os.path.abspath(current_app.config['UPLOAD_STAGING_FOLDER'])
+    os.makedirs(staging_folder, exist_ok=True)
+    path = os.path.join(staging_folder, uuid.uuid4().hex)
+    file.save(path)
+    return path
+
+
 def generate_unique_filename(filename):
     """
     Generate a unique filename to prevent naming conflicts.